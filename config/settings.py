@@ -73,12 +73,66 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# تنظیمات دیتابیس از متغیرهای محیطی خوانده می‌شود:
+# DB_ENGINE=postgresql برای production و در غیر این صورت SQLite با حالت WAL برای استقرار تک‌سروره
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'atish_hot'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            'ATOMIC_REQUESTS': os.environ.get('DB_ATOMIC_REQUESTS') == '1',
+            'OPTIONS': {},
+        }
+    }
+    if os.environ.get('DB_POOL') == '1':
+        # pool روی psycopg 3 (Django 5.1+)؛ با pool باید CONN_MAX_AGE صفر باشد
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'ATOMIC_REQUESTS': os.environ.get('DB_ATOMIC_REQUESTS') == '1',
+            'OPTIONS': {
+                # WAL: خواندن همزمان با نوشتن؛ IMMEDIATE: قفل نوشتن از ابتدای تراکنش تا خطای database is locked رخ ندهد
+                'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL; PRAGMA busy_timeout=20000;',
+                'transaction_mode': 'IMMEDIATE',
+            },
+            # دیتابیس تست روی فایل تا تست‌های همزمانی (چند thread) با قفل‌های واقعی SQLite اجرا شوند
+            'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+        }
+    }
+
+# کش: بدون CACHE_URL کش حافظه محلی (توسعه و تست)؛ در production یک کش مشترک (Redis) بین پروسه‌ها
+CACHE_URL = os.environ.get('CACHE_URL')
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'atish-hot',
+        }
     }
-}
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -118,9 +172,56 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_URL = 'media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
+# فایل‌های آپلودی بر اساس هش محتوا و فقط یک بار ذخیره می‌شوند (core.storage)؛ فایل‌های بدون ارجاع با collect_media حذف می‌شوند
+STORAGES = {
+    'default': {
+        'BACKEND': 'core.storage.ContentAddressedStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'core.User'
+
+# Exchange rate
+# نرخ دلار در کش نگهداری می‌شود و با دستور refresh_exchange_rate (cron) بروزرسانی می‌شود
+
+EXCHANGE_RATE = {
+    'FETCHER': 'core.exchange.fetch_tgju_rate',
+    'TTL': 5 * 60,
+    'STALE_TTL': 60 * 60,
+    'TIMEOUT': 10,
+}
+
+# Catalog cache
+# کش اشیا و صفحه‌های لیست محصولات و دسته‌بندی‌ها (core.catalog_cache) با شمارنده نسل برای باطل کردن
+
+CATALOG_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': 5 * 60,
+    'STATS_FLUSH_EVERY': 100,
+}
+
+# Sales dashboard
+# داشبورد فروش ادمین از جدول‌های گزارش (core.dashboard) با کش کوتاه مدت
+
+SALES_DASHBOARD = {
+    'TIMEOUT': 60,
+    'DAYS': 30,
+    'TOP_LIMIT': 10,
+    'LOW_STOCK_LIMIT': 20,
+}
+
+# Inventory alerts
+# آستانه پیش‌فرض موجودی کم (برای محصولات و دسته‌بندی‌های بدون reorder_level)؛
+# بعد از تغییر، دستور stock_digest --sync آستانه محصولات موجود را بروز می‌کند
+
+INVENTORY_ALERTS = {
+    'REORDER_LEVEL': 5,
+}
@@ -1,7 +1,17 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from . import dashboard
+from .exports import CONTENT_TYPES, iter_export
+from .filters import AutocompleteFilter, AutocompleteFilterMixin, StockLevelFilter
+from .search import search
 from .models import (User, Categories, Products, ProductsImage,
                      Customer, Orders, OrderItem, Vendors, VendorProfile,
-                     Profile)
+                     Profile, ExchangeRate, VendorLedgerEntry, OrderStatusHistory, DailySalesRollup)
 
 
 # Register your models here.
@@ -9,11 +19,13 @@ from .models import (User, Categories, Products, ProductsImage,
 class ProductsImageInline(admin.TabularInline):
     model = ProductsImage
     extra = 1
+    readonly_fields = ('get_thumbnail',)
 
 
 class VendorProfileInline(admin.TabularInline):
     model = VendorProfile
     extra = 1
+    readonly_fields = ('profit', 'get_thumbnail')
 
 
 class ProfileInline(admin.TabularInline):
@@ -24,6 +36,17 @@ class ProfileInline(admin.TabularInline):
 class OrdersItemInline(admin.TabularInline):
     model = OrderItem
     extra = 1
+    autocomplete_fields = ('product',)
+
+
+class OrderStatusHistoryInline(admin.TabularInline):
+    model = OrderStatusHistory
+    extra = 0
+    readonly_fields = ('from_status', 'to_status', 'created_at')
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(User)
@@ -68,6 +91,7 @@ class CategoriesAdmin(admin.ModelAdmin):
         'id',
         'name',
         'slug',
+        'reorder_level',
         'created_at',
         'updated_at',
     )
@@ -97,6 +121,18 @@ class CategoriesAdmin(admin.ModelAdmin):
         return request.user.is_superuser or request.user.is_staff
 
 
+class SearchRankChangeList(ChangeList):
+    """
+    مرتب‌سازی نتایج جستجو بر اساس امتیاز، مگر اینکه ستونی برای مرتب‌سازی انتخاب شده باشد.
+    """
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        if 'search_rank' in queryset.query.annotations and ORDER_VAR not in self.params:
+            queryset = queryset.order_by('-search_rank', '-pk')
+        return queryset
+
+
 @admin.register(Products)
 class ProductsAdmin(admin.ModelAdmin):
     list_display = (
@@ -107,6 +143,7 @@ class ProductsAdmin(admin.ModelAdmin):
         'price',
         'ir_price',
         'stock',
+        'low_stock_threshold',
         'is_active',
         'is_sale',
         'new_price',
@@ -120,13 +157,22 @@ class ProductsAdmin(admin.ModelAdmin):
 
     inlines = [ProductsImageInline]
 
-    list_filter = ('is_active', 'is_sale', 'is_suggestion', 'category')
+    list_filter = (StockLevelFilter, 'is_active', 'is_sale', 'is_suggestion', 'category')
     search_fields = ('name', 'slug')
     ordering = ('-created_at',)
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('low_stock_threshold', 'created_at', 'updated_at')
     list_editable = ('is_active', 'is_sale', 'category', 'new_price', 'price')
     prepopulated_fields = {'slug': ('name',)}
 
+    def get_search_results(self, request, queryset, search_term):
+        # جستجو با ایندکس معکوس (نام و توضیحات) به جای icontains روی کل جدول
+        if not search_term.strip():
+            return queryset, False
+        return search(queryset, search_term), False
+
+    def get_changelist(self, request, **kwargs):
+        return SearchRankChangeList
+
     def has_add_permission(self, request):
         return request.user.is_superuser or request.user.is_staff
 
@@ -179,7 +225,7 @@ class CustomerAdmin(admin.ModelAdmin):
 
 
 @admin.register(Orders)
-class OrdersAdmin(admin.ModelAdmin):
+class OrdersAdmin(AutocompleteFilterMixin, admin.ModelAdmin):
     list_display = (
         'id',
         'full_name',
@@ -196,11 +242,30 @@ class OrdersAdmin(admin.ModelAdmin):
         'updated_at',
     )
 
-    list_filter = ('customer', 'status', 'date_shipped', 'city', 'created_at')
+    list_filter = (('customer', AutocompleteFilter), 'status', 'date_shipped', 'city', 'created_at')
     search_fields = ('full_name', 'city',)
     ordering = ('-created_at',)
     readonly_fields = ('created_at', 'updated_at')
-    inlines = [OrdersItemInline]
+    inlines = [OrdersItemInline, OrderStatusHistoryInline]
+    list_select_related = ('customer',)
+    autocomplete_fields = ('customer', 'vendor')
+    date_hierarchy = 'created_at'
+    show_full_result_count = False
+    actions = ('export_orders_csv', 'export_orders_jsonl')
+
+    def export_orders(self, queryset, format):
+        # خروجی جریانی: سفارش‌ها دسته به دسته خوانده و بلافاصله برای کاربر ارسال می‌شوند
+        response = StreamingHttpResponse(iter_export(format, queryset), content_type=CONTENT_TYPES[format])
+        response['Content-Disposition'] = f'attachment; filename="orders-{timezone.now():%Y%m%d-%H%M}.{format}"'
+        return response
+
+    @admin.action(description='خروجی CSV برای حسابداری')
+    def export_orders_csv(self, request, queryset):
+        return self.export_orders(queryset, 'csv')
+
+    @admin.action(description='خروجی JSONL برای حسابداری')
+    def export_orders_jsonl(self, request, queryset):
+        return self.export_orders(queryset, 'jsonl')
 
     def has_add_permission(self, request):
         return request.user.is_superuser or request.user.is_staff
@@ -243,7 +308,7 @@ class VendorsAdmin(admin.ModelAdmin):
 
     search_fields = ('first_name', 'last_name', 'code')
     ordering = ('-created_at',)
-    readonly_fields = ('created_at', 'updated_at', 'code')
+    readonly_fields = ('created_at', 'updated_at', 'code', 'profit')
     inlines = [VendorProfileInline]
 
     prepopulated_fields = {'slug': ('first_name', 'last_name', 'phone_number')}
@@ -262,3 +327,156 @@ class VendorsAdmin(admin.ModelAdmin):
 
     def has_module_permission(self, request, obj=None):
         return request.user.is_superuser or request.user.is_staff
+
+
+@admin.register(ExchangeRate)
+class ExchangeRateAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'rate',
+        'source',
+        'created_at',
+    )
+
+    list_filter = ('source', 'created_at')
+    ordering = ('-created_at',)
+    readonly_fields = ('created_at',)
+
+    def has_add_permission(self, request):
+        return request.user.is_superuser
+
+    def has_delete_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def has_change_permission(self, request, obj=None):
+        return request.user.is_superuser
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_superuser or request.user.is_staff
+
+    def has_module_permission(self, request, obj=None):
+        return request.user.is_superuser or request.user.is_staff
+
+
+@admin.register(VendorLedgerEntry)
+class VendorLedgerEntryAdmin(admin.ModelAdmin):
+    list_display = (
+        'id',
+        'vendor',
+        'order',
+        'kind',
+        'amount',
+        'created_at',
+    )
+
+    list_filter = ('kind', 'created_at')
+    search_fields = ('vendor__first_name', 'vendor__last_name', 'vendor__code')
+    ordering = ('-created_at',)
+    list_select_related = ('vendor', 'order')
+    readonly_fields = ('vendor', 'order', 'kind', 'amount', 'created_at')
+
+    # دفتر سود فقط قابل افزودن توسط سیستم است
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_superuser or request.user.is_staff
+
+    def has_module_permission(self, request, obj=None):
+        return request.user.is_superuser or request.user.is_staff
+
+
+@admin.register(DailySalesRollup)
+class DailySalesRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        'date',
+        'category',
+        'vendor',
+        'city',
+        'order_count',
+        'quantity',
+        'revenue',
+    )
+
+    list_filter = ('date', 'category', 'city')
+    search_fields = ('city', 'vendor__code')
+    ordering = ('-date',)
+    list_select_related = ('category', 'vendor')
+    date_hierarchy = 'date'
+    readonly_fields = ('date', 'category', 'vendor', 'city', 'order_count', 'quantity', 'revenue', 'updated_at')
+    change_list_template = 'admin/core/dailysalesrollup/change_list.html'
+
+    def get_urls(self):
+        # داشبورد فروش و داده نمودارهای آن زیر آدرس همین جدول در سایت ادمین
+        return [
+            path('dashboard/', self.admin_site.admin_view(self.dashboard_view), name='core_sales_dashboard'),
+            path('dashboard/<str:section>/', self.admin_site.admin_view(self.dashboard_data_view), name='core_sales_dashboard_data'),
+        ] + super().get_urls()
+
+    def dashboard_view(self, request):
+        """
+        داشبورد فروش با تعداد ثابتی کوئری روی جدول‌های گزارش (یکی برای هر بخش و فقط هنگام نبودن در کش).
+        """
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            start, end = dashboard.parse_range(request.GET)
+        except ValueError as e:
+            self.message_user(request, str(e), level='error')
+            start, end = dashboard.get_default_range()
+        data = dashboard.get_dashboard(start, end)
+
+        # عرض میله‌های نمودار درآمد روزانه نسبت به بیشترین روز
+        peak = max((int(day['revenue']) for day in data['revenue']), default=0)
+        revenue = [dict(day, width=int(day['revenue']) * 100 // peak if peak else 0) for day in data['revenue']]
+        context = dict(
+            self.admin_site.each_context(request),
+            title='Sales dashboard',
+            opts=self.model._meta,
+            start=start,
+            end=end,
+            sections=list(dashboard.SECTIONS),
+            summary=data['summary'],
+            revenue=revenue,
+            top_products=data['top_products'],
+            top_vendors=data['top_vendors'],
+            low_stock=data['low_stock'],
+        )
+        return TemplateResponse(request, 'admin/core/sales_dashboard.html', context)
+
+    def dashboard_data_view(self, request, section):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        if section not in dashboard.SECTIONS:
+            raise Http404
+        try:
+            start, end = dashboard.parse_range(request.GET)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        return JsonResponse({
+            'start': str(start),
+            'end': str(end),
+            'results': dashboard.get_section(section, start, end),
+        })
+
+    # جدول گزارش فقط توسط سیگنال‌های سفارش و دستور rebuild_sales_rollups نوشته می‌شود
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_view_permission(self, request, obj=None):
+        return request.user.is_superuser or request.user.is_staff
+
+    def has_module_permission(self, request, obj=None):
+        return request.user.is_superuser or request.user.is_staff
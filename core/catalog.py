@@ -0,0 +1,310 @@
+import csv
+import json
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .catalog_cache import invalidate_catalog
+from .models import Categories, ExchangeRate, Products, default_reorder_level
+from .normalization import normalize_persian, normalize_text
+from .search import index_products
+from .serializers import serialize_decimal
+from .slugs import assign_slugs
+
+# ستون‌های فایل کاتالوگ (category اسلاگ دسته‌بندی است)
+FIELDS = (
+    'slug', 'name', 'category', 'description', 'price', 'ir_price', 'new_price', 'ir_new_price',
+    'stock', 'is_active', 'is_sale', 'is_suggestion',
+)
+DECIMAL_FIELDS = {'price': 2, 'ir_price': 0, 'new_price': 2, 'ir_new_price': 0}
+BOOLEAN_FIELDS = ('is_active', 'is_sale', 'is_suggestion')
+FORMATS = ('csv', 'jsonl')
+# فقط تعداد محدودی خطا نگه داشته می‌شود تا حافظه برای فایل‌های بزرگ ثابت بماند
+MAX_REPORTED_ERRORS = 100
+
+TRUE_VALUES = ('1', 'true', 'True', 'yes')
+FALSE_VALUES = ('0', 'false', 'False', 'no', '')
+
+
+class CatalogRowError(ValueError):
+    pass
+
+
+def read_rows(stream, format):
+    """
+    خواندن ردیف‌های فایل به صورت جریانی (هر بار یک ردیف در حافظه).
+    خروجی (شماره خط، ردیف)؛ ردیفی که قابل خواندن نیست به جای ردیف یک CatalogRowError است تا بقیه فایل وارد شود.
+    """
+    if format == 'csv':
+        reader = csv.DictReader(stream)
+        while True:
+            try:
+                row = next(reader)
+            except StopIteration:
+                return
+            except csv.Error as e:
+                yield reader.line_num, CatalogRowError(f'invalid CSV: {e}')
+                continue
+            # line_num خط پایانی ردیف است (فیلدهای چند خطی)
+            yield reader.line_num, row
+        return
+    for lineno, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield lineno, CatalogRowError(f'invalid JSON: {e}')
+            continue
+        if not isinstance(row, dict):
+            yield lineno, CatalogRowError('row must be a JSON object')
+            continue
+        yield lineno, row
+
+
+def write_rows(stream, format, rows):
+    if format == 'csv':
+        writer = csv.DictWriter(stream, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+        return
+    for row in rows:
+        stream.write(json.dumps(row, ensure_ascii=False))
+        stream.write('\n')
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def parse_text(value, field):
+    # مقدار JSONL ممکن است عدد یا شیء باشد؛ عدد به متن تبدیل و بقیه به عنوان خطای ردیف گزارش می‌شوند
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return str(value)
+    raise CatalogRowError(f'{field} must be a string, not {type(value).__name__}')
+
+
+def check_scalar(value, field):
+    if isinstance(value, (bool, dict, list)):
+        raise CatalogRowError(f'{field} must be a number, not {type(value).__name__}')
+
+
+def parse_decimal(value, places, field='price'):
+    if value in (None, ''):
+        return None
+    check_scalar(value, field)
+    try:
+        return Decimal(normalize_persian(str(value)).replace(',', '')).quantize(Decimal(1).scaleb(-places), ROUND_HALF_UP)
+    except InvalidOperation:
+        raise CatalogRowError(f'invalid number {value!r}')
+
+
+def parse_boolean(value):
+    if isinstance(value, bool):
+        return value
+    value = '' if value is None else str(value).strip()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise CatalogRowError(f'invalid boolean {value!r}')
+
+
+def parse_stock(value):
+    check_scalar(value, 'stock')
+    try:
+        stock = int(normalize_persian(str(value or 0)))
+    except ValueError:
+        raise CatalogRowError(f'invalid stock {value!r}')
+    if stock < 0:
+        raise CatalogRowError('stock must not be negative')
+    return stock
+
+
+def check_decimal(field, value):
+    # مقدار باید در ستون دیتابیس جا شود؛ در غیر این صورت bulk_create کل دسته را از بین می‌برد
+    field = Products._meta.get_field(field)
+    if value is not None and value.adjusted() >= field.max_digits - field.decimal_places:
+        raise CatalogRowError(f'{field.name} has more than {field.max_digits - field.decimal_places} digits')
+
+
+def check_length(field, value):
+    field = Products._meta.get_field(field)
+    if value and len(value) > field.max_length:
+        raise CatalogRowError(f'{field.name} is longer than {field.max_length} characters')
+
+
+def to_ir_price(value, rate):
+    if value is None or rate is None:
+        return None
+    return (value * rate).quantize(Decimal(1), ROUND_HALF_UP)
+
+
+class CatalogImporter:
+    """
+    درج و بروزرسانی دسته‌ای محصولات از ردیف‌های کاتالوگ.
+    هر دسته در یک تراکنش با یک SELECT برای محصولات موجود (بر اساس اسلاگ)، bulk_create،
+    bulk_update فقط برای ستون‌های تغییر کرده و بازسازی ایندکس جستجو نوشته می‌شود؛ دسته‌بندی‌ها یک بار در حافظه نگه داشته می‌شوند.
+    """
+
+    def __init__(self, batch_size=1000, create_categories=False):
+        self.batch_size = batch_size
+        self.create_categories = create_categories
+        self.categories = dict(Categories.objects.values_list('slug', 'pk'))
+        self.reorder_levels = dict(Categories.objects.values_list('pk', 'reorder_level'))
+        self.default_reorder_level = default_reorder_level()
+        latest_rate = ExchangeRate.objects.order_by('-created_at').values_list('rate', flat=True).first()
+        self.rate = None if latest_rate is None else Decimal(latest_rate)
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.error_count = 0
+        self.errors = []
+
+    def get_category_id(self, slug):
+        slug = normalize_text(parse_text(slug, 'category'))
+        if not slug:
+            raise CatalogRowError('category is required')
+        if slug not in self.categories:
+            if not self.create_categories:
+                raise CatalogRowError(f'unknown category {slug!r}')
+            category = Categories.objects.create(name=slug, slug=slug)
+            self.categories[slug] = self.categories[category.slug] = category.pk
+            self.reorder_levels[category.pk] = category.reorder_level
+        return self.categories[slug]
+
+    def get_threshold(self, reorder_level, category_id):
+        # همان قاعده Products.get_reorder_level (bulk_create/bulk_update متد save را اجرا نمی‌کنند)
+        if reorder_level is not None:
+            return reorder_level
+        category_level = self.reorder_levels.get(category_id)
+        return self.default_reorder_level if category_level is None else category_level
+
+    def clean_row(self, row):
+        name = normalize_text(parse_text(row.get('name'), 'name'))
+        if not name:
+            raise CatalogRowError('name is required')
+        check_length('name', name)
+        values = {
+            'name': name,
+            'slug': slugify(normalize_text(parse_text(row.get('slug'), 'slug')), allow_unicode=True) or None,
+            'category_id': self.get_category_id(row.get('category')),
+            'description': parse_text(row.get('description'), 'description'),
+            'stock': parse_stock(row.get('stock')),
+        }
+        for field, places in DECIMAL_FIELDS.items():
+            values[field] = parse_decimal(row.get(field), places, field)
+        # قیمت ریالی در صورت نبودن در فایل از آخرین نرخ ثبت شده محاسبه می‌شود
+        if values['ir_price'] is None:
+            values['ir_price'] = to_ir_price(values['price'], self.rate)
+        if values['ir_new_price'] is None:
+            values['ir_new_price'] = to_ir_price(values['new_price'], self.rate)
+        for field in DECIMAL_FIELDS:
+            check_decimal(field, values[field])
+        check_length('slug', values['slug'])
+        for field in BOOLEAN_FIELDS:
+            if row.get(field) not in (None, ''):
+                values[field] = parse_boolean(row[field])
+        # همان قاعده سیگنال activate_product (bulk_create سیگنال‌ها را اجرا نمی‌کند)
+        if values['stock'] > 0:
+            values['is_active'] = True
+        return values
+
+    def add_error(self, line, error):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, str(error)))
+
+    def import_rows(self, rows):
+        """
+        rows دنباله (شماره خط، ردیف یا CatalogRowError) مانند خروجی read_rows است.
+        """
+        for chunk in chunked(rows, self.batch_size):
+            self.import_chunk(chunk)
+        return self
+
+    def import_chunk(self, rows):
+        cleaned = {}
+        unnamed = []
+        for line, row in rows:
+            if isinstance(row, CatalogRowError):
+                self.add_error(line, row)
+                continue
+            try:
+                values = self.clean_row(row)
+            except CatalogRowError as e:
+                self.add_error(line, e)
+                continue
+            if values['slug']:
+                # ردیف‌های تکراری با یک اسلاگ در یک دسته: آخرین ردیف اعمال می‌شود
+                cleaned[values['slug']] = values
+            else:
+                unnamed.append(values)
+
+        now = timezone.now()
+        with transaction.atomic():
+            existing = Products.objects.in_bulk(list(cleaned), field_name='slug')
+            to_create = []
+            to_update = []
+            reindex = []
+            fields = set()
+            for slug, values in cleaned.items():
+                product = existing.get(slug)
+                if product is None:
+                    to_create.append(Products(**values, low_stock_threshold=self.get_threshold(None, values['category_id'])))
+                    continue
+                values = dict(values, low_stock_threshold=self.get_threshold(product.reorder_level, values['category_id']))
+                # فقط ستون‌های تغییر کرده بروز می‌شوند و ردیف‌های بدون تغییر نوشته نمی‌شوند
+                changed = {field for field, value in values.items() if getattr(product, field) != value}
+                if not changed:
+                    self.unchanged += 1
+                    continue
+                for field in changed:
+                    setattr(product, field, values[field])
+                fields.update(changed)
+                product.updated_at = now
+                to_update.append(product)
+                if changed & {'name', 'description'}:
+                    reindex.append(product)
+            Products.objects.bulk_create(to_create, batch_size=self.batch_size)
+
+            # اسلاگ ردیف‌های بدون اسلاگ پس از درج ردیف‌های دارای اسلاگ رزرو می‌شود تا با آن‌ها برخورد نکند
+            unnamed = assign_slugs(
+                [Products(**values, low_stock_threshold=self.get_threshold(None, values['category_id'])) for values in unnamed],
+                lambda product: product.name,
+            )
+            Products.objects.bulk_create(unnamed, batch_size=self.batch_size)
+            to_create.extend(unnamed)
+            if to_update:
+                Products.objects.bulk_update(to_update, sorted(fields | {'updated_at'}), batch_size=self.batch_size)
+            index_products(to_create + reindex)
+            if to_create or to_update:
+                invalidate_catalog()
+
+        self.created += len(to_create)
+        self.updated += len(to_update)
+
+
+def export_rows(queryset=None, chunk_size=2000):
+    """
+    تولید ردیف‌های کاتالوگ به صورت جریانی با iterator (بدون نگه داشتن همه محصولات در حافظه).
+    """
+    if queryset is None:
+        queryset = Products.objects.all()
+    columns = [field for field in FIELDS if field != 'category'] + ['category__slug']
+    for values in queryset.order_by('pk').values_list(*columns).iterator(chunk_size=chunk_size):
+        row = dict(zip(columns, values))
+        row['category'] = row.pop('category__slug')
+        for field in DECIMAL_FIELDS:
+            row[field] = serialize_decimal(row[field])
+        yield row
@@ -0,0 +1,185 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+DEFAULTS = {
+    'ALIAS': 'default',
+    'TIMEOUT': 5 * 60,
+    'STATS_FLUSH_EVERY': 100,  # شمارنده‌های hit/miss پس از این تعداد خواندن به کش مشترک منتقل می‌شوند
+}
+
+# epoch همه کلیدها را باطل می‌کند (تغییر دسته‌بندی یا بروزرسانی دسته‌ای)؛ نسل لیست‌ها با تغییر عضویت محصولات بالا می‌رود
+EPOCH_KEY = 'catalog:epoch'
+LISTS_KEY = 'catalog:lists'
+GENERATION_KEYS = (EPOCH_KEY, LISTS_KEY)
+STATS_KEYS = {'hit': 'catalog:stats:hit', 'miss': 'catalog:stats:miss'}
+
+MISSING = object()
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'CATALOG_CACHE', {}))
+    return config
+
+
+def new_generation():
+    # مقدار اولیه وابسته به زمان تا بعد از حذف کلید از کش، نسل‌های قدیمی دوباره استفاده نشوند
+    return time.time_ns()
+
+
+class CatalogCache:
+    """
+    کش محصولات و دسته‌بندی‌ها: هر شیء زیر نسخه شناسه یا اسلاگ خود و هر صفحه لیست زیر شمارنده نسل ذخیره می‌شود.
+    باطل کردن با افزایش چند شمارنده انجام می‌شود (O(1)) و پس از commit تراکنش اعمال می‌شود؛
+    خواننده‌ای که قبل از آن از دیتابیس خوانده، مقدار قدیمی را زیر نسخه قبلی می‌نویسد که دیگر خوانده نمی‌شود.
+    """
+
+    def __init__(self):
+        self.stats = Counter()
+        self._unflushed = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[get_config()['ALIAS']]
+
+    def get_counters(self, *keys):
+        values = self.cache.get_many(keys)
+        for key in keys:
+            if key not in values:
+                self.cache.add(key, new_generation(), timeout=self.counter_timeout(key))
+                values[key] = self.cache.get(key)
+        return [values[key] for key in keys]
+
+    def get_generations(self):
+        return self.get_counters(EPOCH_KEY, LISTS_KEY)
+
+    def counter_timeout(self, key):
+        # نسخه هر شیء همراه با خود شیء منقضی می‌شود؛ مقدار جدید وابسته به زمان و بزرگ‌تر از نسخه‌های قبلی است
+        return None if key in GENERATION_KEYS else get_config()['TIMEOUT']
+
+    def record(self, outcome):
+        config = get_config()
+        with self._lock:
+            self.stats[outcome] += 1
+            self._unflushed[outcome] += 1
+            if sum(self._unflushed.values()) < config['STATS_FLUSH_EVERY']:
+                return
+            unflushed, self._unflushed = self._unflushed, Counter()
+        for name, count in unflushed.items():
+            self.incr(STATS_KEYS[name], count)
+
+    def incr(self, key, delta=1):
+        try:
+            return self.cache.incr(key, delta)
+        except ValueError:
+            if self.cache.add(key, delta, timeout=None):
+                return delta
+            return self.cache.incr(key, delta)
+
+    def bump(self, key):
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            # شمارنده از کش حذف شده است
+            self.cache.add(key, new_generation(), timeout=self.counter_timeout(key))
+
+    def get_or_load(self, key, loader):
+        value = self.cache.get(key, MISSING)
+        if value is not MISSING:
+            self.record('hit')
+            return value
+        self.record('miss')
+        value = loader()
+        if value is not None:
+            self.cache.set(key, value, timeout=get_config()['TIMEOUT'])
+        return value
+
+    # اشیا
+
+    def version_key(self, kind, lookup, value):
+        return f'catalog:version:{kind}:{lookup}:{value}'
+
+    def slug_key(self, kind, pk):
+        return f'catalog:slug:{kind}:{pk}'
+
+    def object_key(self, kind, lookup, value, epoch, version):
+        return f'catalog:{epoch}:{kind}:{lookup}:{value}:{version}'
+
+    def get_object(self, kind, lookup, value, loader):
+        """
+        خواندن شیء سریال شده با شناسه یا اسلاگ؛ loader در صورت نبودن شیء None برمی‌گرداند.
+        نسخه قبل از خواندن از دیتابیس گرفته می‌شود، پس شیء فقط زیر کلید همان lookup ذخیره می‌شود
+        (نسخه lookup دیگر ممکن است در این فاصله بالا رفته باشد)؛ اسلاگ خوانده شده برای باطل کردن
+        کلید اسلاگ قبلی بعد از تغییر اسلاگ، با شناسه نگه داشته می‌شود.
+        """
+        epoch, version = self.get_counters(EPOCH_KEY, self.version_key(kind, lookup, value))
+        key = self.object_key(kind, lookup, value, epoch, version)
+        payload = self.cache.get(key, MISSING)
+        if payload is not MISSING:
+            self.record('hit')
+            return payload
+        self.record('miss')
+        payload = loader()
+        if payload is not None:
+            self.cache.set_many({
+                key: payload,
+                self.slug_key(kind, payload['id']): payload['slug'],
+            }, timeout=get_config()['TIMEOUT'])
+        return payload
+
+    def get_list(self, kind, params, loader):
+        """
+        صفحه لیست (مثلاً با فیلترها و cursor) زیر نسل فعلی لیست‌ها.
+        """
+        epoch, generation = self.get_generations()
+        digest = hashlib.sha1(repr(sorted(params)).encode('utf-8')).hexdigest()
+        return self.get_or_load(f'catalog:{epoch}:{generation}:{kind}:{digest}', loader)
+
+    # باطل کردن
+
+    def invalidate_objects(self, kind, ids=(), slugs=(), lists=True):
+        """
+        افزایش نسخه اشیای داده شده (شناسه و اسلاگ فعلی و اسلاگ قبلی ذخیره شده در کش)؛
+        نسل لیست‌ها فقط با lists (تغییر عضویت یا ترتیب لیست‌ها) بالا می‌رود.
+        """
+        ids = [str(pk) for pk in ids]
+        slugs = set(slugs) | set(self.cache.get_many([self.slug_key(kind, pk) for pk in ids]).values())
+        for key in [self.version_key(kind, 'id', pk) for pk in ids] + [self.version_key(kind, 'slug', slug) for slug in slugs if slug]:
+            self.bump(key)
+        if lists:
+            self.bump(LISTS_KEY)
+
+    def invalidate_all(self):
+        self.bump(EPOCH_KEY)
+
+    def get_stats(self):
+        shared = self.cache.get_many(list(STATS_KEYS.values()))
+        stats = {name: shared.get(key, 0) + self._unflushed[name] for name, key in STATS_KEYS.items()}
+        total = stats['hit'] + stats['miss']
+        stats['hit_rate'] = stats['hit'] / total if total else 0.0
+        return stats
+
+    def reset_stats(self):
+        with self._lock:
+            self._unflushed = Counter()
+        self.cache.delete_many(list(STATS_KEYS.values()))
+
+
+catalog_cache = CatalogCache()
+
+
+def invalidate_products(ids=(), slugs=(), lists=True):
+    ids, slugs = list(ids), list(slugs)
+    transaction.on_commit(lambda: catalog_cache.invalidate_objects('product', ids, slugs, lists))
+
+
+def invalidate_catalog():
+    # برای تغییر دسته‌بندی‌ها (که در اطلاعات محصولات هم آمده‌اند) و بروزرسانی‌های دسته‌ای
+    transaction.on_commit(catalog_cache.invalidate_all)
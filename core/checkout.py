@@ -0,0 +1,73 @@
+from decimal import Decimal
+
+from django.db import transaction
+
+from .inventory import merge_lines, reserve_stock
+from .models import Customer, OrderItem, Orders, Products, Vendors
+
+
+def get_item_price(product):
+    # قیمت حراج در صورت فعال بودن، در غیر این صورت قیمت عادی (ریال)
+    if product.is_sale and product.ir_new_price is not None:
+        return product.ir_new_price
+    return product.ir_price
+
+
+@transaction.atomic
+def place_order(full_name, phone_number, city, address, postal_code, lines, identification_code=None):
+    """
+    ثبت کامل یک سفارش در یک تراکنش با تعداد ثابتی نوشتن:
+    ثبت یا بروزرسانی مشتری، یک UPDATE شرطی موجودی برای هر محصول، درج سفارش (با فروشنده و قیمت کل) و درج همه آیتم‌ها با یک کوئری.
+    lines لیستی از (product_id, quantity) است.
+    """
+    lines = merge_lines(lines)
+    products = Products.objects.in_bulk([product_id for product_id, _ in lines])
+
+    vendor = None
+    if identification_code:
+        try:
+            vendor = Vendors.objects.get(code=identification_code)
+        except Vendors.DoesNotExist:
+            raise ValueError("فروشنده‌ای با این کد وجود ندارد.")
+
+    items = []
+    total_price = Decimal(0)
+    for product_id, quantity in lines:
+        product = products.get(product_id)
+        if product is None:
+            raise ValueError(f"Product {product_id} does not exist")
+        price = get_item_price(product)
+        if price is None:
+            raise ValueError(f"{product.name} has no price")
+        items.append(OrderItem(product=product, quantity=quantity, price=price))
+        total_price += quantity * price
+
+    for reservation in reserve_stock(lines):
+        if not reservation.reserved:
+            raise ValueError(f"Not enough stock for {products[reservation.product_id].name}")
+
+    customer = Customer.objects.upsert(
+        full_name=full_name,
+        phone_number=phone_number,
+        city=city,
+        address=address,
+        postal_code=postal_code,
+    )
+    order = Orders.objects.create(
+        full_name=full_name,
+        phone_number=phone_number,
+        city=city,
+        address=address,
+        postal_code=postal_code,
+        identification_code=identification_code,
+        customer=customer,
+        vendor=vendor,
+        total_price=total_price,
+        item_count=sum(quantity for _, quantity in lines),
+    )
+
+    # آیتم‌ها با bulk_create درج می‌شوند؛ موجودی و قیمت کل در بالا ثبت شده است
+    for item in items:
+        item.order = order
+    OrderItem.objects.bulk_create(items)
+    return order
@@ -0,0 +1,115 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, Value, When
+
+from .normalization import address_fingerprint, normalize_phone
+
+
+def normalize_customers(customer_model, batch_size=1000, order_model=None):
+    """
+    نرمال کردن شماره تماس و محاسبه اثر انگشت آدرس مشتری‌های موجود به صورت دسته‌ای.
+    اگر رکورد نرمال شده با مشتری دیگری تکراری شود و order_model داده شده باشد،
+    سفارش‌های آن به مشتری موجود منتقل و رکورد حذف می‌شود؛ در غیر این صورت رد می‌شود.
+    خروجی: (تعداد بروز شده، تعداد ادغام شده، تعداد رد شده)
+    """
+    updated = merged = skipped = 0
+    last_pk = None
+    while True:
+        queryset = customer_model.objects.order_by('pk')
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+        batch = list(queryset.only('pk', 'phone_number', 'city', 'address', 'postal_code', 'address_fingerprint')[:batch_size])
+        if not batch:
+            return updated, merged, skipped
+        last_pk = batch[-1].pk
+
+        changed = []
+        for customer in batch:
+            phone_number = normalize_phone(customer.phone_number)
+            fingerprint = address_fingerprint(customer.city, customer.address, customer.postal_code)
+            if customer.phone_number != phone_number or customer.address_fingerprint != fingerprint:
+                customer.phone_number = phone_number
+                customer.address_fingerprint = fingerprint
+                changed.append(customer)
+        if not changed:
+            continue
+
+        try:
+            with transaction.atomic():
+                customer_model.objects.bulk_update(changed, ['phone_number', 'address_fingerprint'])
+            updated += len(changed)
+            continue
+        except IntegrityError:
+            pass
+
+        # دسته با محدودیت یکتایی برخورد کرده است؛ رکوردها یکی یکی بروز می‌شوند
+        for customer in changed:
+            try:
+                with transaction.atomic():
+                    customer_model.objects.filter(pk=customer.pk).update(
+                        phone_number=customer.phone_number,
+                        address_fingerprint=customer.address_fingerprint,
+                    )
+                updated += 1
+            except IntegrityError:
+                if order_model is None:
+                    skipped += 1
+                    continue
+                keeper = customer_model.objects.filter(
+                    phone_number=customer.phone_number,
+                    address_fingerprint=customer.address_fingerprint,
+                ).values_list('pk', flat=True).first()
+                with transaction.atomic():
+                    order_model.objects.filter(customer_id=customer.pk).update(customer=keeper)
+                    customer_model.objects.filter(pk=customer.pk).delete()
+                merged += 1
+
+
+def merge_duplicate_customers(customer_model, order_model, batch_size=500):
+    """
+    ادغام مشتری‌های تکراری (شماره و اثر انگشت آدرس یکسان) به صورت دسته‌ای.
+    قدیمی‌ترین رکورد نگه داشته می‌شود، اطلاعات آن از جدیدترین رکورد بروز می‌شود
+    و سفارش‌های رکوردهای تکراری به آن منتقل می‌شوند.
+    برای هر دسته: یک SELECT، یک UPDATE سفارش‌ها، یک bulk_update و یک DELETE.
+    """
+    merged = 0
+    while True:
+        groups = list(
+            customer_model.objects.order_by()
+            .values_list('phone_number', 'address_fingerprint')
+            .annotate(count=Count('pk'))
+            .filter(count__gt=1)[:batch_size]
+        )
+        if not groups:
+            return merged
+
+        keys = {(phone_number, fingerprint) for phone_number, fingerprint, _ in groups}
+        customers = customer_model.objects.filter(
+            phone_number__in={phone_number for phone_number, _ in keys},
+            address_fingerprint__in={fingerprint for _, fingerprint in keys},
+        ).order_by('created_at', 'pk')
+
+        grouped = {}
+        for customer in customers:
+            key = (customer.phone_number, customer.address_fingerprint)
+            if key in keys:
+                grouped.setdefault(key, []).append(customer)
+
+        keepers = []
+        mapping = {}
+        for group in grouped.values():
+            keeper, latest = group[0], group[-1]
+            keeper.full_name = latest.full_name
+            keeper.city = latest.city
+            keeper.address = latest.address
+            keeper.postal_code = latest.postal_code
+            keepers.append(keeper)
+            for duplicate in group[1:]:
+                mapping[duplicate.pk] = keeper.pk
+
+        with transaction.atomic():
+            order_model.objects.filter(customer_id__in=mapping).update(
+                customer=Case(*[When(customer_id=duplicate, then=Value(keeper)) for duplicate, keeper in mapping.items()])
+            )
+            customer_model.objects.bulk_update(keepers, ['full_name', 'city', 'address', 'postal_code'])
+            customer_model.objects.filter(pk__in=mapping).delete()
+        merged += len(mapping)
@@ -0,0 +1,150 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import DailyProductSales, DailySalesRollup, DailySalesTotal, Products
+from .serializers import serialize_decimal
+
+DEFAULTS = {
+    'TIMEOUT': 60,  # مدت کش هر بخش داشبورد (ثانیه)
+    'DAYS': 30,  # بازه پیش‌فرض
+    'TOP_LIMIT': 10,
+    'LOW_STOCK_LIMIT': 20,
+}
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'SALES_DASHBOARD', {}))
+    return config
+
+
+def get_default_range():
+    end = timezone.localdate() + datetime.timedelta(days=1)
+    return end - datetime.timedelta(days=get_config()['DAYS']), end
+
+
+def sum_sales(queryset):
+    return queryset.annotate(
+        total_orders=Sum('order_count'),
+        total_quantity=Sum('quantity'),
+        total_revenue=Sum('revenue'),
+    )
+
+
+def serialize_sales(row, **extra):
+    return dict(
+        extra,
+        order_count=row['total_orders'] or 0,
+        quantity=row['total_quantity'] or 0,
+        revenue=serialize_decimal(row['total_revenue'] or 0),
+    )
+
+
+def load_summary(start, end):
+    row = DailySalesTotal.objects.filter(date__gte=start, date__lt=end).aggregate(
+        total_orders=Sum('order_count'),
+        total_quantity=Sum('quantity'),
+        total_revenue=Sum('revenue'),
+    )
+    return serialize_sales(row)
+
+
+def load_revenue(start, end):
+    # یک ردیف برای هر روز؛ روزهای بدون فروش (بدون ردیف یا با ردیف صفر قفل روز) نمی‌آیند
+    totals = DailySalesTotal.objects.filter(date__gte=start, date__lt=end, order_count__gt=0).order_by('date')
+    return [
+        {
+            'date': str(total.date),
+            'order_count': total.order_count,
+            'quantity': total.quantity,
+            'revenue': serialize_decimal(total.revenue),
+        }
+        for total in totals
+    ]
+
+
+def load_top_products(start, end):
+    rows = sum_sales(
+        DailyProductSales.objects.filter(date__gte=start, date__lt=end)
+        .order_by().values('product', 'product__name')
+    ).order_by('-total_revenue')[:get_config()['TOP_LIMIT']]
+    return [serialize_sales(row, id=str(row['product']), name=row['product__name']) for row in rows]
+
+
+def load_top_vendors(start, end):
+    # جمع order_count ردیف‌های دسته‌بندی، سفارش‌های چند دسته‌ای را چند بار می‌شمارد؛ فقط تعداد اقلام و درآمد برگردانده می‌شود
+    rows = sum_sales(
+        DailySalesRollup.objects.filter(date__gte=start, date__lt=end, vendor__isnull=False)
+        .order_by().values('vendor', 'vendor__code', 'vendor__first_name', 'vendor__last_name')
+    ).order_by('-total_revenue')[:get_config()['TOP_LIMIT']]
+    vendors = []
+    for row in rows:
+        vendor = serialize_sales(
+            row, id=str(row['vendor']), code=row['vendor__code'],
+            name=f"{row['vendor__first_name']} {row['vendor__last_name']}",
+        )
+        del vendor['order_count']
+        vendors.append(vendor)
+    return vendors
+
+
+def load_low_stock(start=None, end=None):
+    # با ایندکس جزئی products_low_stock_idx؛ محصولات تمام شده (غیرفعال شده هنگام فروش) هم می‌آیند
+    products = (
+        Products.objects.low_stock()
+        .order_by('stock', 'name')
+        .values('id', 'name', 'slug', 'stock', 'low_stock_threshold')[:get_config()['LOW_STOCK_LIMIT']]
+    )
+    return [dict(product, id=str(product['id'])) for product in products]
+
+
+# هر بخش با یک کوئری از جدول‌های از پیش جمع شده خوانده می‌شود
+SECTIONS = {
+    'summary': load_summary,
+    'revenue': load_revenue,
+    'top_products': load_top_products,
+    'top_vendors': load_top_vendors,
+    'low_stock': load_low_stock,
+}
+# بخش‌هایی که به بازه تاریخ وابسته نیستند با یک کلید برای همه بازه‌ها کش می‌شوند
+UNDATED_SECTIONS = ('low_stock',)
+
+
+def get_section(name, start, end):
+    """
+    داده یک بخش داشبورد از کش (با عمر کوتاه) یا در صورت نبودن، از جدول‌های گزارش.
+    """
+    key = f'sales_dashboard:{name}' if name in UNDATED_SECTIONS else f'sales_dashboard:{name}:{start}:{end}'
+    data = cache.get(key)
+    if data is None:
+        data = SECTIONS[name](start, end)
+        cache.set(key, data, timeout=get_config()['TIMEOUT'])
+    return data
+
+
+def get_dashboard(start, end):
+    return {name: get_section(name, start, end) for name in SECTIONS}
+
+
+def parse_range(params):
+    """
+    بازه [start, end) از پارامترهای start و end (YYYY-MM-DD)؛ برای تاریخ نامعتبر ValueError.
+    """
+    default_start, default_end = get_default_range()
+    dates = {}
+    for name in ('start', 'end'):
+        value = params.get(name)
+        if value:
+            dates[name] = parse_date(value)
+            if dates[name] is None:
+                raise ValueError(f'Invalid {name} date: {value}')
+    end = dates.get('end') or default_end
+    start = dates.get('start') or end - (default_end - default_start)
+    if start >= end:
+        raise ValueError('start must be before end')
+    return start, end
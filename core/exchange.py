@@ -0,0 +1,173 @@
+import threading
+import time
+
+import requests
+from bs4 import BeautifulSoup
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+TGJU_URL = 'https://www.tgju.org/profile/price_dollar_rl'
+CACHE_KEY = 'exchange_rate:usd_irr'
+
+DEFAULTS = {
+    'FETCHER': 'core.exchange.fetch_tgju_rate',
+    'TTL': 5 * 60,  # مدت تازه بودن نرخ (ثانیه)
+    'STALE_TTL': 60 * 60,  # مدتی که نرخ کهنه همراه با بروزرسانی پس‌زمینه برگردانده می‌شود
+    'TIMEOUT': 10,
+    'RETRY_AFTER': 60,  # بعد از خطای دریافت، تا این مدت (ثانیه) درخواست دوباره ارسال نمی‌شود
+}
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'EXCHANGE_RATE', {}))
+    return config
+
+
+def fetch_tgju_rate(timeout=10):
+    """
+    دریافت نرخ دلار به ریال از سایت tgju.
+    """
+    response = requests.get(TGJU_URL, timeout=timeout)
+    response.raise_for_status()
+
+    # پیدا کردن تگ <td> که قیمت دلار را در خود دارد
+    soup = BeautifulSoup(response.text, 'html.parser')
+    rate_tag = soup.find('td', class_='text-left')
+    if not rate_tag:
+        raise ValueError('Rate not found')
+
+    usd_to_irr = rate_tag.text.strip().replace(',', '')  # حذف کاما از عدد
+    return int(usd_to_irr) * 10  # تبدیل به ریال
+
+
+class RateProvider:
+    """
+    نگهداری یک نرخ مشترک همراه با زمان دریافت آن.
+    خواندن نرخ از حافظه پروسه انجام می‌شود و در صورت کهنه شدن یا نبودن، در پس‌زمینه بروزرسانی می‌شود؛
+    درخواست هیچ‌وقت منتظر درخواست شبکه نمی‌ماند.
+    """
+
+    def __init__(self, fetcher=None, cache_key=CACHE_KEY):
+        self._fetcher = fetcher
+        self.cache_key = cache_key
+        self._entry = None  # (rate, fetched_at)
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._failed_at = None
+
+    @property
+    def failure_key(self):
+        return f'{self.cache_key}:failed'
+
+    def set_fetcher(self, fetcher):
+        # برای تست‌ها می‌توان یک fetcher محلی جایگزین کرد
+        self._fetcher = fetcher
+        self.reset()
+
+    def reset(self):
+        self._entry = None
+        self._failed_at = None
+        cache.delete_many([self.cache_key, self.failure_key])
+
+    def get_fetcher(self):
+        if self._fetcher is not None:
+            return self._fetcher
+        return import_string(get_config()['FETCHER'])
+
+    def get_entry(self):
+        config = get_config()
+        entry = self._entry
+        if entry is None or time.time() - entry[1] > config['TTL']:
+            # ممکن است پروسه دیگری نرخ را بروزرسانی کرده باشد
+            shared = cache.get(self.cache_key)
+            if shared is not None and (entry is None or shared[1] > entry[1]):
+                entry = self._entry = tuple(shared)
+        return entry
+
+    def get_last_known_rate(self):
+        # آخرین نرخ ثبت شده در تاریخچه (refresh_exchange_rate) برای کش خالی، مثلاً بعد از راه‌اندازی پروسه
+        from .models import ExchangeRate
+        return ExchangeRate.objects.order_by('-created_at').values_list('rate', flat=True).first()
+
+    def get_rate(self):
+        config = get_config()
+        entry = self.get_entry()
+        if entry is None:
+            self.refresh_in_background()
+            return self.get_last_known_rate()
+
+        age = time.time() - entry[1]
+        if age <= config['TTL']:
+            return entry[0]
+        self.refresh_in_background()
+        if age <= config['TTL'] + config['STALE_TTL']:
+            return entry[0]
+        return self.get_last_known_rate() or entry[0]
+
+    def in_cooldown(self):
+        # خطای اخیر در همین پروسه یا پروسه‌های دیگر (کش مشترک)
+        retry_after = get_config()['RETRY_AFTER']
+        if self._failed_at is not None and time.time() - self._failed_at < retry_after:
+            return True
+        return cache.get(self.failure_key) is not None
+
+    def begin_refresh(self, force=False):
+        """
+        قفل فقط برای علامت زدن _refreshing گرفته می‌شود (نه در طول درخواست شبکه).
+        اگر دریافت دیگری در جریان باشد، نرخ در این فاصله تازه شده باشد یا در بازه انتظار بعد از خطا باشیم False برمی‌گرداند.
+        """
+        with self._lock:
+            if self._refreshing:
+                return False
+            if not force:
+                entry = self.get_entry()
+                if entry is not None and time.time() - entry[1] <= get_config()['TTL']:
+                    return False
+                if self.in_cooldown():
+                    return False
+            self._refreshing = True
+            return True
+
+    def fetch(self):
+        config = get_config()
+        try:
+            try:
+                rate = self.get_fetcher()(timeout=config['TIMEOUT'])
+            except Exception:
+                # نتیجه منفی کش می‌شود تا درخواست‌های بعدی منتظر درخواست شبکه نمانند
+                self._failed_at = time.time()
+                cache.set(self.failure_key, self._failed_at, timeout=config['RETRY_AFTER'])
+                return None
+            entry = (rate, time.time())
+            self._entry = entry
+            self._failed_at = None
+            cache.set(self.cache_key, entry, timeout=config['TTL'] + config['STALE_TTL'])
+            cache.delete(self.failure_key)
+            return rate
+        finally:
+            self._refreshing = False
+
+    def refresh(self, force=False):
+        """
+        دریافت نرخ جدید و ذخیره آن در کش. در صورت خطا، دریافت همزمان یا بازه انتظار بعد از خطا
+        بدون انتظار نرخ فعلی (یا None) برمی‌گرداند.
+        """
+        if not self.begin_refresh(force):
+            entry = self.get_entry()
+            return entry[0] if entry is not None else None
+        return self.fetch()
+
+    def refresh_in_background(self):
+        if self.begin_refresh():
+            thread = threading.Thread(target=self.fetch, daemon=True)
+            thread.start()
+            return thread
+
+
+provider = RateProvider()
+
+
+def get_usd_to_irr_rate():
+    return provider.get_rate()
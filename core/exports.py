@@ -0,0 +1,112 @@
+import csv
+import json
+
+from django.db.models import BigIntegerField, DecimalField, ExpressionWrapper, F, OuterRef, Prefetch, Subquery, Sum
+
+from .models import OrderItem, Orders, VendorLedgerEntry
+from .serializers import serialize_decimal
+
+# هر ردیف CSV یک قلم سفارش است؛ ستون‌های سفارش برای هر قلم تکرار می‌شوند
+ORDER_FIELDS = (
+    'order_id', 'created_at', 'status', 'full_name', 'phone_number', 'city', 'postal_code',
+    'vendor_code', 'vendor_name', 'order_total', 'order_units', 'vendor_profit',
+)
+ITEM_FIELDS = ('product_id', 'product_name', 'quantity', 'price', 'line_total')
+FORMATS = ('csv', 'jsonl')
+CONTENT_TYPES = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+
+class Echo:
+    # شیء شبه‌فایل برای csv.writer که به جای نوشتن، رشته را برمی‌گرداند (برای StreamingHttpResponse)
+    def write(self, value):
+        return value
+
+
+def get_export_queryset(queryset=None):
+    """
+    سفارش‌ها همراه با فروشنده (JOIN)، ستون‌های ذخیره شده قیمت کل و تعداد اقلام، مانده سود فروشنده
+    از دفتر سود (زیرکوئری روی ایندکس سفارش) و اقلام هر دسته از سفارش‌ها با یک کوئری prefetch.
+    """
+    if queryset is None:
+        queryset = Orders.objects.all()
+    items = OrderItem.objects.select_related('product').only(
+        'order_id', 'product_id', 'product__name', 'quantity', 'price',
+    ).annotate(
+        line_total=ExpressionWrapper(F('quantity') * F('price'), output_field=DecimalField(max_digits=20, decimal_places=0)),
+    ).order_by('pk')
+    profit = (
+        VendorLedgerEntry.objects.filter(order=OuterRef('pk'), vendor=OuterRef('vendor_id'))
+        .order_by().values('order').annotate(balance=Sum('amount')).values('balance')
+    )
+    return (
+        queryset
+        .select_related(None)
+        .select_related('vendor')
+        .only(
+            'id', 'created_at', 'status', 'full_name', 'phone_number', 'city', 'postal_code',
+            'total_price', 'item_count', 'vendor__code', 'vendor__first_name', 'vendor__last_name',
+        )
+        .annotate(vendor_profit=Subquery(profit, output_field=BigIntegerField()))
+        .prefetch_related(Prefetch('order_items', queryset=items))
+        .order_by('created_at', 'pk')
+    )
+
+
+def serialize_order(order):
+    vendor = order.vendor
+    return {
+        'order_id': str(order.pk),
+        'created_at': order.created_at.isoformat(),
+        'status': order.status,
+        'full_name': order.full_name,
+        'phone_number': order.phone_number,
+        'city': order.city,
+        'postal_code': order.postal_code,
+        'vendor_code': vendor.code if vendor else None,
+        'vendor_name': str(vendor) if vendor else None,
+        'order_total': serialize_decimal(order.total_price),
+        'order_units': order.item_count,
+        # سود ثبت شده در دفتر سود (صفر بعد از برگشت و خالی برای سفارش بدون سند)
+        'vendor_profit': serialize_decimal(order.vendor_profit),
+        'items': [
+            {
+                'product_id': str(item.product_id),
+                'product_name': item.product.name,
+                'quantity': item.quantity,
+                'price': serialize_decimal(item.price),
+                'line_total': serialize_decimal(item.line_total),
+            }
+            for item in order.order_items.all()
+        ],
+    }
+
+
+def iter_orders(queryset=None, chunk_size=2000):
+    """
+    سفارش‌ها به صورت جریانی: هر chunk_size سفارش با یک کوئری خوانده و اقلام آن‌ها با یک کوئری prefetch می‌شوند.
+    """
+    for order in get_export_queryset(queryset).iterator(chunk_size=chunk_size):
+        yield serialize_order(order)
+
+
+def iter_csv(orders):
+    writer = csv.writer(Echo())
+    yield writer.writerow(ORDER_FIELDS + ITEM_FIELDS)
+    for order in orders:
+        head = [order[field] for field in ORDER_FIELDS]
+        # سفارش بدون قلم هم در خروجی با ستون‌های خالی اقلام آمده است
+        for item in order['items'] or [dict.fromkeys(ITEM_FIELDS)]:
+            yield writer.writerow(head + [item[field] for field in ITEM_FIELDS])
+
+
+def iter_jsonl(orders):
+    for order in orders:
+        yield json.dumps(order, ensure_ascii=False) + '\n'
+
+
+def iter_export(format, queryset=None, chunk_size=2000):
+    """
+    خطوط خروجی (CSV یا JSONL) که به ترتیب تولید می‌شوند و می‌توانند مستقیماً در فایل یا پاسخ HTTP نوشته شوند.
+    """
+    orders = iter_orders(queryset, chunk_size)
+    return iter_csv(orders) if format == 'csv' else iter_jsonl(orders)
@@ -0,0 +1,184 @@
+import bisect
+import datetime
+
+from django.db import transaction
+from django.db.models import Q
+
+from .catalog_cache import catalog_cache
+from .models import ProductFeed, Products
+from .serializers import serialize_product
+
+# شرط عضویت در هر فید (علاوه بر فعال بودن و موجودی)
+FEEDS = {
+    'suggested': 'is_suggestion',
+    'sale': 'is_sale',
+}
+# تعداد محصولاتی که برای هر فید سریال و کش می‌شوند
+FEED_LIMIT = 50
+
+FEED_FIELDS = ('pk', 'category_id', 'is_active', 'stock', 'is_sale', 'is_suggestion', 'created_at')
+
+
+def qualifies(product, name):
+    return product.is_active and product.stock > 0 and getattr(product, FEEDS[name])
+
+
+def feed_entry(pk, created_at):
+    """
+    عضو ذخیره شده فید: [زمان ساخت (UTC با طول ثابت)، شناسه]. اعضا به ترتیب صعودی نگه داشته می‌شوند
+    تا افزودن و حذف یک محصول با bisect و بدون خواندن دوباره محصولات فید انجام شود؛
+    شناسه محصولات قدیمی UUIDv4 است و ترتیب آن‌ها با زمان ساخت یکی نیست.
+    """
+    return [created_at.astimezone(datetime.timezone.utc).isoformat(timespec='microseconds'), str(pk)]
+
+
+def find_entry(entries, entry):
+    index = bisect.bisect_left(entries, entry)
+    if index < len(entries) and entries[index] == entry:
+        return index
+    # زمان ساخت نمونه با مقدار ذخیره شده یکی نیست؛ جستجو با شناسه
+    return next(index for index, (_, pk) in enumerate(entries) if pk == entry[1])
+
+
+def feed_cache_key(name, category_id=None):
+    epoch, _ = catalog_cache.get_generations()
+    return f'catalog:{epoch}:feed:{name}:{category_id or "all"}'
+
+
+def invalidate_feeds(feeds):
+    keys = [feed_cache_key(feed.name, feed.category_id) for feed in feeds]
+    if keys:
+        transaction.on_commit(lambda: catalog_cache.cache.delete_many(keys))
+
+
+@transaction.atomic
+def rebuild_feeds():
+    """
+    ساخت کامل همه فیدها با یک کوئری برای هر فید (برای backfill و بعد از بروزرسانی‌های دسته‌ای).
+    """
+    feeds = {}
+    for name, flag in FEEDS.items():
+        feeds[(name, None)] = []
+        rows = (
+            Products.objects.filter(is_active=True, stock__gt=0, **{flag: True})
+            .order_by('created_at', 'pk').values_list('pk', 'category_id', 'created_at')
+        )
+        for pk, category_id, created_at in rows:
+            entry = feed_entry(pk, created_at)
+            feeds[(name, None)].append(entry)
+            feeds.setdefault((name, category_id), []).append(entry)
+
+    existing = {(feed.name, feed.category_id): feed for feed in ProductFeed.objects.select_for_update()}
+    to_update = []
+    to_create = []
+    for key, entries in feeds.items():
+        feed = existing.pop(key, None)
+        if feed is None:
+            to_create.append(ProductFeed(name=key[0], category_id=key[1], product_ids=entries))
+        elif feed.product_ids != entries:
+            feed.product_ids = entries
+            to_update.append(feed)
+    # فید دسته‌بندی‌هایی که دیگر محصولی در آن فید ندارند خالی می‌شود
+    for feed in existing.values():
+        if feed.product_ids:
+            feed.product_ids = []
+            to_update.append(feed)
+
+    ProductFeed.objects.bulk_create(to_create)
+    ProductFeed.objects.bulk_update(to_update, ['product_ids', 'updated_at'])
+    invalidate_feeds(to_create + to_update)
+    return len(to_create) + len(to_update)
+
+
+def get_feed_filter(products):
+    # فیدهای کل فروشگاه و دسته‌بندی فعلی و قبلی (خوانده شده از دیتابیس) محصولات
+    categories = set()
+    for product in products:
+        loaded = getattr(product, '_loaded_category_id', product.category_id)
+        if loaded is None:
+            # دسته‌بندی قبلی معلوم نیست (فیلد defer شده)؛ همه فیدها بررسی می‌شوند
+            return Q()
+        categories.update((loaded, product.category_id))
+    return Q(category__isnull=True) | Q(category_id__in=categories)
+
+
+def update_products(products, deleted=False):
+    """
+    بروزرسانی تدریجی فیدها برای محصولات تغییر کرده: فقط ردیف‌های فیدهای کل فروشگاه و دسته‌بندی‌های
+    این محصولات خوانده و ردیف‌هایی که عضویت در آن‌ها تغییر کرده قفل و بروز می‌شوند
+    (هر محصول با bisect در جای خود درج یا حذف می‌شود)؛ کش فیدهایی که این محصولات را دارند (یا داشته‌اند) حذف می‌شود.
+    """
+    products = {str(product.pk): product for product in products}
+    if not products:
+        return
+
+    feeds = {
+        (feed.name, feed.category_id): feed
+        for feed in ProductFeed.objects.filter(get_feed_filter(products.values()))
+    }
+    wanted = {}
+    for pk, product in products.items():
+        for name in FEEDS:
+            member = not deleted and qualifies(product, name)
+            for key in ((name, None), (name, product.category_id)):
+                wanted[(key, pk)] = member or wanted.get((key, pk), False)
+
+    changed = set()
+    touched = []
+    for feed_key in set(key for key, _ in wanted) | set(feeds):
+        feed = feeds.get(feed_key)
+        current = {pk for _, pk in feed.product_ids} if feed else set()
+        for pk in products:
+            member = wanted.get((feed_key, pk), False)
+            if (pk in current) != member:
+                changed.add(feed_key)
+            elif member:
+                touched.append(feed)
+
+    if changed:
+        with transaction.atomic():
+            locked = {
+                (feed.name, feed.category_id): feed
+                for feed in ProductFeed.objects.select_for_update().filter(pk__in=[feeds[key].pk for key in changed if key in feeds])
+            }
+            for feed_key in changed:
+                feed = locked.get(feed_key)
+                if feed is None:
+                    feed, _ = ProductFeed.objects.get_or_create(name=feed_key[0], category_id=feed_key[1])
+                entries = feed.product_ids
+                current = {pk for _, pk in entries}
+                for pk, product in products.items():
+                    entry = feed_entry(pk, product.created_at)
+                    if pk in current:
+                        del entries[find_entry(entries, entry)]
+                    if wanted.get((feed_key, pk), False):
+                        bisect.insort(entries, entry)
+                feed.save(update_fields=['product_ids', 'updated_at'])
+                touched.append(feed)
+
+    # اطلاعات محصولات عضو (قیمت، نام، موجودی) در کش فید آمده است
+    invalidate_feeds(touched)
+
+
+def refresh_products(product_ids):
+    """
+    بروزرسانی فیدها پس از تغییر موجودی با UPDATE مستقیم (بدون سیگنال)؛
+    فقط برای محصولاتی که موجودی آن‌ها صفر شده یا دوباره موجود شده‌اند صدا زده می‌شود.
+    """
+    update_products(Products.objects.filter(pk__in=list(product_ids)).only(*FEED_FIELDS))
+
+
+def get_feed(name, category_id=None):
+    """
+    محصولات سریال شده یک فید از کش؛ در صورت نبودن در کش، شناسه‌ها از product_feed
+    و محصولات با کلید اصلی خوانده می‌شوند (بدون پیمایش جدول محصولات).
+    """
+    def load():
+        feed = ProductFeed.objects.filter(name=name, category_id=category_id).values_list('product_ids', flat=True).first()
+        # اعضا صعودی ذخیره شده‌اند؛ جدیدترین‌ها آخر لیست هستند
+        product_ids = [pk for _, pk in reversed((feed or [])[-FEED_LIMIT:])]
+        products = Products.objects.select_related('category').prefetch_related('images').in_bulk(product_ids)
+        products = {str(pk): product for pk, product in products.items()}
+        return [serialize_product(products[pk]) for pk in product_ids if pk in products]
+
+    return catalog_cache.get_or_load(feed_cache_key(name, category_id), load)
@@ -0,0 +1,18 @@
+from django.db import models
+
+from .normalization import normalize_phone
+
+
+class PhoneNumberField(models.CharField):
+    """
+    شماره موبایل که قبل از اعتبارسنجی و ذخیره به قالب 09xxxxxxxxx نرمال می‌شود
+    تا شماره با ارقام فارسی یا پیش‌شماره +98 هم پذیرفته و یکسان ذخیره شود.
+    """
+
+    def to_python(self, value):
+        return normalize_phone(super().to_python(value))
+
+    def pre_save(self, model_instance, add):
+        value = normalize_phone(getattr(model_instance, self.attname))
+        setattr(model_instance, self.attname, value)
+        return value
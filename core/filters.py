@@ -0,0 +1,75 @@
+from django import forms
+from django.contrib import admin
+from django.contrib.admin.utils import get_last_value_from_parameters
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.utils.translation import gettext_lazy as _
+
+
+class AutocompleteFilter(admin.FieldListFilter):
+    """
+    فیلتر کلید خارجی با جستجوی autocomplete به جای نمایش همه رکوردها در سایدبار.
+    فقط رکورد انتخاب شده از دیتابیس خوانده می‌شود.
+    مدل مرتبط باید در ادمین search_fields داشته باشد.
+    """
+    template = 'admin/core/autocomplete_filter.html'
+
+    def __init__(self, field, request, params, model, model_admin, field_path):
+        self.lookup_kwarg = f'{field_path}__{field.target_field.name}__exact'
+        self.lookup_val = get_last_value_from_parameters(params, self.lookup_kwarg)
+        super().__init__(field, request, params, model, model_admin, field_path)
+        self.form_field = forms.ModelChoiceField(
+            queryset=field.remote_field.model._default_manager.all(),
+            required=False,
+            widget=AutocompleteSelect(field, model_admin.admin_site),
+        )
+
+    def expected_parameters(self):
+        return [self.lookup_kwarg]
+
+    def choices(self, changelist):
+        # آدرس انتخاب یک رکورد؛ __value__ در جاوااسکریپت با شناسه انتخاب شده جایگزین می‌شود
+        self.query_string = changelist.get_query_string({self.lookup_kwarg: '__value__'})
+        self.clear_query_string = changelist.get_query_string(remove=[self.lookup_kwarg])
+        self.widget = self.form_field.widget.render(self.lookup_kwarg, self.lookup_val)
+        yield {
+            'selected': self.lookup_val is None,
+            'query_string': self.clear_query_string,
+            'display': _('All'),
+        }
+
+
+class AutocompleteFilterMixin:
+    """
+    افزودن فایل‌های select2 به صفحه لیست برای فیلترهای AutocompleteFilter.
+    """
+
+    @property
+    def media(self):
+        media = super().media
+        for list_filter in self.list_filter:
+            if isinstance(list_filter, (list, tuple)) and issubclass(list_filter[1], AutocompleteFilter):
+                field = self.model._meta.get_field(list_filter[0])
+                media += AutocompleteSelect(field, self.admin_site).media
+        return media + forms.Media(js=['core/js/autocomplete_filter.js'])
+
+
+class StockLevelFilter(admin.SimpleListFilter):
+    """
+    فیلتر محصولات کم موجودی و تمام شده با شرط ایندکس جزئی products_low_stock_idx.
+    """
+    title = _('stock level')
+    parameter_name = 'stock_level'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('low', _('Low stock')),
+            ('out', _('Out of stock')),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() == 'low':
+            return queryset.low_stock().filter(stock__gt=0)
+        if self.value() == 'out':
+            # stock=0 همیشه کمتر از آستانه است؛ شرط low_stock برای استفاده از ایندکس جزئی آمده است
+            return queryset.low_stock().filter(stock=0)
+        return queryset
@@ -0,0 +1,30 @@
+import os
+import threading
+import time
+import uuid
+
+_lock = threading.Lock()
+_last = [0, 0]  # آخرین (میلی‌ثانیه، شمارنده)
+
+
+def uuid7():
+    """
+    تولید UUID نسخه ۷ (مرتب بر اساس زمان).
+    ۴۸ بیت اول زمان بر حسب میلی‌ثانیه است، پس رکوردهای جدید در انتهای ایندکس درج می‌شوند.
+    در یک میلی‌ثانیه یک شمارنده ۱۲ بیتی ترتیب را حفظ می‌کند.
+    """
+    with _lock:
+        ms = time.time_ns() // 1_000_000
+        if ms <= _last[0]:
+            ms = _last[0]
+            counter = _last[1] + 1
+            if counter > 0xFFF:
+                ms += 1
+                counter = 0
+        else:
+            counter = int.from_bytes(os.urandom(2), 'big') & 0x7FF
+        _last[0], _last[1] = ms, counter
+
+    rand = int.from_bytes(os.urandom(8), 'big') & 0x3FFFFFFFFFFFFFFF
+    value = (ms & 0xFFFFFFFFFFFF) << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | rand
+    return uuid.UUID(int=value)
@@ -0,0 +1,111 @@
+import hashlib
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger(__name__)
+
+# اندازه‌های مشتق شده از هر تصویر: thumbnail برش مربعی و medium فقط کوچک‌سازی با حفظ نسبت
+DERIVATIVES = {
+    'thumbnail': {'size': (200, 200), 'crop': True},
+    'medium': {'size': (800, 800), 'crop': False},
+}
+FORMAT, EXTENSION = ('WEBP', 'webp') if features.check('webp') else ('JPEG', 'jpg')
+QUALITY = 80
+
+
+def render(image, size, crop):
+    if crop:
+        image = ImageOps.fit(image, size, Image.LANCZOS)
+    else:
+        image = image.copy()
+        image.thumbnail(size, Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, FORMAT, quality=QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def derivative_name(source_name, size_name, content):
+    """
+    مسیر نسخه مشتق شده کنار تصویر اصلی با هش محتوا در نام (تغییر تصویر = آدرس جدید).
+    با ContentAddressedStorage نام نهایی را storage از روی هش محتوا تعیین می‌کند.
+    """
+    directory, filename = os.path.split(source_name)
+    stem = os.path.splitext(filename)[0]
+    digest = hashlib.sha1(content).hexdigest()[:12]
+    return os.path.join(directory, f'{stem}.{size_name}.{digest}.{EXTENSION}')
+
+
+def generate_derivatives(fieldfile):
+    """
+    ساخت همه اندازه‌های تعریف شده از یک تصویر و ذخیره آن‌ها در storage همان فیلد.
+    خروجی: {'source': نام تصویر اصلی، نام اندازه: مسیر نسخه مشتق شده}
+    """
+    storage = fieldfile.storage
+    with storage.open(fieldfile.name, 'rb') as file:
+        image = Image.open(file)
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if FORMAT == 'WEBP' and image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+        derivatives = {'source': fieldfile.name}
+        for size_name, options in DERIVATIVES.items():
+            content = render(image, options['size'], options['crop'])
+            name = derivative_name(fieldfile.name, size_name, content)
+            # نام وابسته به محتواست؛ فایل موجود همان تصویر است و دوباره نوشته نمی‌شود
+            if not storage.exists(name):
+                name = storage.save(name, ContentFile(content))
+            derivatives[size_name] = name
+    return derivatives
+
+
+def sync_derivatives(instance, field_name, derivatives_field, force=False):
+    """
+    ساخت نسخه‌های مشتق شده در صورت تغییر تصویر و ذخیره مسیرها با یک UPDATE (بدون save و سیگنال).
+    نسخه‌های تصویر قبلی حذف می‌شوند.
+    """
+    fieldfile = getattr(instance, field_name)
+    current = getattr(instance, derivatives_field) or {}
+    source = fieldfile.name or None
+    if source == instance._meta.get_field(field_name).get_default():
+        # تصویر پیش‌فرض فیلد (مثلاً profile.jpg پروفایل فروشنده) آپلود نشده و نسخه مشتق شده ندارد
+        source = None
+    if not force and current.get('source') == source:
+        return current
+
+    derivatives = {'source': source}
+    if source:
+        # تصویر ناموجود یا خراب: نسخه اصلی نمایش داده می‌شود و تا تغییر تصویر دوباره تلاش نمی‌شود
+        try:
+            derivatives = generate_derivatives(fieldfile)
+        except FileNotFoundError:
+            logger.warning('Image file %s does not exist', source)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            logger.warning('Could not generate derivatives for %s', source, exc_info=True)
+
+    storage = fieldfile.storage
+    for size_name in DERIVATIVES:
+        old = current.get(size_name)
+        if old and old != derivatives.get(size_name):
+            storage.delete(old)
+
+    setattr(instance, derivatives_field, derivatives)
+    type(instance)._base_manager.filter(pk=instance.pk).update(**{derivatives_field: derivatives})
+
+    from .media import get_derivative_names, update_references
+    update_references(get_derivative_names(current), get_derivative_names(derivatives))
+    return derivatives
+
+
+def get_derivative_url(fieldfile, derivatives, size_name):
+    """
+    آدرس نسخه مشتق شده، و در صورت نبودن آن آدرس تصویر اصلی.
+    """
+    if not fieldfile:
+        return None
+    name = (derivatives or {}).get(size_name)
+    if name and (derivatives or {}).get('source') == fieldfile.name:
+        return fieldfile.storage.url(name)
+    return fieldfile.url
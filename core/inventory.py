@@ -0,0 +1,118 @@
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import Case, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from .catalog_cache import invalidate_products
+from .feeds import refresh_products
+from .models import Categories, Products, default_reorder_level
+
+Reservation = namedtuple('Reservation', ['product_id', 'quantity', 'reserved'])
+
+
+def merge_lines(lines):
+    """
+    جمع تعداد خطوط تکراری یک محصول و مرتب کردن بر اساس شناسه محصول.
+    ترتیب ثابت باعث می‌شود قفل ردیف‌ها همیشه با یک ترتیب گرفته شوند و deadlock رخ ندهد.
+    """
+    merged = {}
+    for product_id, quantity in lines:
+        merged[product_id] = merged.get(product_id, 0) + quantity
+    return sorted(merged.items(), key=lambda line: str(line[0]))
+
+
+def reserve_stock(lines, all_or_nothing=True):
+    """
+    کم کردن موجودی محصولات با UPDATE شرطی (stock > n و در غیر این صورت stock = n) در یک تراکنش.
+    lines لیستی از (product_id, quantity) است و برای هر محصول یک Reservation برمی‌گردد.
+    با all_or_nothing اگر یکی از خطوط موجودی کافی نداشته باشد هیچ موجودی کم نمی‌شود.
+    فقط ستون‌های stock و is_active نوشته می‌شوند و سیگنال‌های محصول اجرا نمی‌شوند.
+    """
+    results = []
+    emptied = []
+    with transaction.atomic():
+        for product_id, quantity in merge_lines(lines):
+            # حالت معمول: موجودی مثبت می‌ماند و عضویت محصول در لیست‌ها و فیدها تغییر نمی‌کند
+            reserved = Products.objects.filter(pk=product_id, stock__gt=quantity).update(stock=F('stock') - quantity) == 1
+            if not reserved:
+                # آخرین موجودی: محصول غیرفعال می‌شود
+                reserved = Products.objects.filter(pk=product_id, stock=quantity).update(stock=0, is_active=False) == 1
+                if reserved:
+                    emptied.append(product_id)
+            results.append(Reservation(product_id, quantity, reserved))
+
+        if all_or_nothing and not all(result.reserved for result in results):
+            transaction.set_rollback(True)
+            results = [Reservation(product_id, quantity, False) for product_id, quantity, _ in results]
+        else:
+            reserved = [result.product_id for result in results if result.reserved]
+            # نسل لیست‌ها و فیدها فقط با خارج شدن محصول (موجودی صفر) تغییر می‌کنند
+            invalidate_products(reserved, lists=bool(emptied))
+            if emptied:
+                transaction.on_commit(lambda: refresh_products(emptied))
+    return results
+
+
+def release_stock(lines):
+    """
+    بازگرداندن موجودی همه خطوط با یک UPDATE و فعال کردن محصولات.
+    """
+    lines = merge_lines(lines)
+    if not lines:
+        return 0
+    product_ids = [product_id for product_id, _ in lines]
+    with transaction.atomic():
+        # محصولات غیرفعال یا تمام شده با بازگشت موجودی دوباره در لیست‌ها و فیدها می‌آیند
+        restocked = list(
+            Products.objects.filter(Q(is_active=False) | Q(stock=0), pk__in=product_ids).values_list('pk', flat=True)
+        )
+        released = Products.objects.filter(pk__in=product_ids).update(
+            stock=F('stock') + Case(*[When(pk=product_id, then=Value(quantity)) for product_id, quantity in lines]),
+            is_active=True,
+        )
+        invalidate_products(product_ids, lists=bool(restocked))
+        if restocked:
+            transaction.on_commit(lambda: refresh_products(restocked))
+    return released
+
+
+def sync_reorder_levels(queryset=None):
+    """
+    محاسبه دوباره آستانه نهایی موجودی کم (محصول، دسته‌بندی یا پیش‌فرض) با یک UPDATE؛
+    فقط ردیف‌هایی که آستانه آن‌ها تغییر کرده نوشته می‌شوند.
+    برای بعد از تغییر INVENTORY_ALERTS['REORDER_LEVEL'] یا ساخت دسته‌ای محصولات.
+    """
+    if queryset is None:
+        queryset = Products.objects.all()
+    threshold = Coalesce(
+        F('reorder_level'),
+        Subquery(Categories.objects.filter(pk=OuterRef('category_id')).values('reorder_level')[:1]),
+        Value(default_reorder_level()),
+    )
+    return queryset.annotate(threshold=threshold).exclude(low_stock_threshold=F('threshold')).update(
+        low_stock_threshold=threshold,
+    )
+
+
+def sync_category_reorder_level(category):
+    # محصولات دسته‌ای که آستانه خودشان را ندارند آستانه دسته را می‌گیرند (با ایندکس کلید خارجی category)
+    threshold = default_reorder_level() if category.reorder_level is None else category.reorder_level
+    return (
+        Products.objects.filter(category=category, reorder_level__isnull=True)
+        .exclude(low_stock_threshold=threshold)
+        .update(low_stock_threshold=threshold)
+    )
+
+
+def iter_low_stock(chunk_size=1000):
+    """
+    محصولات کم موجودی و تمام شده به ترتیب دسته‌بندی و موجودی، با ایندکس جزئی products_low_stock_idx.
+    """
+    queryset = (
+        Products.objects.low_stock()
+        .select_related('category')
+        .only('id', 'name', 'slug', 'stock', 'is_active', 'low_stock_threshold', 'category__name')
+        .order_by('category__name', 'stock', 'name')
+    )
+    return queryset.iterator(chunk_size=chunk_size)
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Orders, VendorLedgerEntry, VendorProfile, Vendors
+
+PROFIT_RATE = Decimal('0.1')  # 10% سود فروشنده
+
+
+def get_profit(order):
+    return round(order.total_price * PROFIT_RATE)
+
+
+def post_entry(vendor_id, order, kind, amount):
+    """
+    ثبت یک سند در دفتر سود و بروزرسانی مانده فروشنده و پروفایل آن با F().
+    """
+    VendorLedgerEntry.objects.create(vendor_id=vendor_id, order=order, kind=kind, amount=amount)
+    Vendors.objects.filter(pk=vendor_id).update(profit=F('profit') + amount)
+    VendorProfile.objects.filter(vendor_id=vendor_id).update(profit=F('profit') + amount, updated_at=timezone.now())
+
+
+def sync_order(order, deleted=False):
+    """
+    همگام کردن دفتر سود با وضعیت فعلی سفارش.
+    سفارش تحویل داده شده یک سند سود دارد و در غیر این صورت سندهای قبلی برگشت می‌خورند.
+    اجرای دوباره برای یک وضعیت تکراری هیچ سندی ثبت نمی‌کند.
+    """
+    with transaction.atomic():
+        # قفل ردیف سفارش تا دو ذخیره همزمان هر دو مانده صفر نخوانند و دو بار سود ثبت نکنند؛
+        # وضعیت، فروشنده و قیمت کل بعد از گرفتن قفل از دیتابیس خوانده می‌شوند
+        locked = Orders.objects.select_for_update().filter(pk=order.pk).first()
+        if locked is not None:
+            order = locked
+        balances = (
+            VendorLedgerEntry.objects.filter(order=order)
+            .order_by()
+            .values_list('vendor')
+            .annotate(balance=Sum('amount'))
+        )
+
+        target_vendor = None
+        target_amount = 0
+        if not deleted and order.status == 'Delivered' and order.vendor_id:
+            target_vendor = order.vendor_id
+            target_amount = get_profit(order)
+
+        for vendor_id, balance in balances:
+            if not balance:
+                continue
+            if vendor_id == target_vendor and balance == target_amount:
+                target_vendor = None  # سود قبلاً ثبت شده است
+                continue
+            # سند برگشت سفارش حذف شده بدون ارتباط با سفارش ثبت می‌شود
+            post_entry(vendor_id, None if deleted else order, 'Reversal', -balance)
+
+        if target_vendor and target_amount:
+            post_entry(target_vendor, order, 'Credit', target_amount)
@@ -0,0 +1,71 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.ids import uuid7
+from core.models import Orders
+
+GENERATORS = {
+    'uuid4': uuid.uuid4,
+    'uuid7': uuid7,
+}
+
+
+class Command(BaseCommand):
+    help = ('اندازه‌گیری زمان درج سفارش و لیست صفحه‌بندی شده. '
+            'داده‌ها در پایان rollback می‌شوند؛ برای مقایسه قبل و بعد از ایندکس‌ها روی دیتابیس مایگریت شده تا 0030 و 0031 اجرا کنید.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--id', choices=GENERATORS, default='uuid7')
+        parser.add_argument('--page-size', type=int, default=50)
+        parser.add_argument('--pages', type=int, default=20)
+
+    def handle(self, *args, **options):
+        generate_id = GENERATORS[options['id']]
+        rows = options['rows']
+        batch_size = options['batch_size']
+        statuses = ['Pending', 'Delivered', 'Canceled']
+
+        with transaction.atomic():
+            started = time.perf_counter()
+            orders = []
+            for offset in range(0, rows, batch_size):
+                orders += Orders.objects.bulk_create([
+                    Orders(
+                        id=generate_id(),
+                        full_name='benchmark',
+                        phone_number='09120000000',
+                        city='Tehran',
+                        address='benchmark',
+                        postal_code='0',
+                        status=statuses[i % 3],
+                    )
+                    for i in range(offset, min(offset + batch_size, rows))
+                ])
+            insert_time = time.perf_counter() - started
+            self.stdout.write(f"insert ({options['id']}): {rows} rows in {insert_time:.3f}s "
+                              f"({rows / insert_time:.0f} rows/s)")
+
+            # created_at با auto_now_add در bulk_create بازنویسی می‌شود؛ زمان‌های پراکنده بعد از درج (خارج از زمان‌سنجی) ثبت می‌شوند
+            now = timezone.now()
+            for i, order in enumerate(orders):
+                order.created_at = now - timezone.timedelta(seconds=rows - i)
+            Orders.objects.bulk_update(orders, ['created_at'], batch_size=batch_size)
+
+            page_size = options['page_size']
+            for label, queryset in (
+                ('list', Orders.objects.order_by('-created_at')),
+                ('status list', Orders.objects.filter(status='Pending').order_by('-created_at')),
+            ):
+                started = time.perf_counter()
+                for page in range(options['pages']):
+                    list(queryset.values_list('pk', flat=True)[page * page_size:(page + 1) * page_size])
+                elapsed = (time.perf_counter() - started) / options['pages']
+                self.stdout.write(f'{label}: {elapsed * 1000:.2f}ms per page')
+
+            transaction.set_rollback(True)
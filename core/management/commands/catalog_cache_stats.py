@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from core.catalog_cache import catalog_cache
+
+
+class Command(BaseCommand):
+    help = 'نمایش شمارنده‌های hit/miss کش کاتالوگ'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='صفر کردن شمارنده‌ها بعد از نمایش')
+        parser.add_argument('--clear', action='store_true', help='باطل کردن کل کش کاتالوگ')
+
+    def handle(self, *args, **options):
+        stats = catalog_cache.get_stats()
+        self.stdout.write(f"Hits: {stats['hit']}, misses: {stats['miss']}, hit rate: {stats['hit_rate']:.1%}")
+        if options['reset']:
+            catalog_cache.reset_stats()
+        if options['clear']:
+            catalog_cache.invalidate_all()
+            self.stdout.write(self.style.SUCCESS('Catalog cache invalidated'))
@@ -0,0 +1,40 @@
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from core.media import collect_orphans, collect_untracked, recount_references
+
+
+class Command(BaseCommand):
+    help = 'حذف دسته‌ای فایل‌های رسانه‌ای بدون ارجاع (ref_count صفر) و فایل‌های بدون ردیف MediaBlob'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace-hours', type=float, default=24, help='فایل‌های جدیدتر از این مدت حذف نمی‌شوند')
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--recount', action='store_true', help='محاسبه دوباره ref_count از روی مدل‌ها قبل از حذف')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['recount']:
+            updated = recount_references(batch_size=options['batch_size'])
+            self.stdout.write(f'Recounted blobs: {updated}')
+
+        collected, freed = collect_orphans(
+            default_storage,
+            timedelta(hours=options['grace_hours']),
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        label = 'Orphan blobs' if options['dry_run'] else 'Collected blobs'
+        self.stdout.write(self.style.SUCCESS(f'{label}: {collected} ({freed / 1024 / 1024:.1f} MB)'))
+
+        # فایل‌های بدون ردیف MediaBlob (تراکنش برگشت خورده یا فایل موقت رها شده)
+        collected, freed = collect_untracked(
+            default_storage,
+            timedelta(hours=options['grace_hours']),
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        label = 'Untracked files' if options['dry_run'] else 'Collected untracked files'
+        self.stdout.write(self.style.SUCCESS(f'{label}: {collected} ({freed / 1024 / 1024:.1f} MB)'))
@@ -0,0 +1,45 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.catalog import FORMATS, export_rows, write_rows
+from core.models import Products
+
+
+class Command(BaseCommand):
+    help = 'خروجی جریانی کاتالوگ محصولات به CSV یا JSONL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help='مسیر فایل یا - برای خروجی استاندارد')
+        parser.add_argument('--format', choices=FORMATS, help='پیش‌فرض بر اساس پسوند فایل')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--category', help='فقط محصولات این دسته‌بندی (اسلاگ)')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or ('jsonl' if path.endswith('.jsonl') else 'csv')
+        queryset = Products.objects.all()
+        if options['category']:
+            queryset = queryset.filter(category__slug=options['category'])
+
+        exported = 0
+
+        def counted(rows):
+            nonlocal exported
+            for row in rows:
+                exported += 1
+                yield row
+
+        started = time.perf_counter()
+        stream = sys.stdout if path == '-' else open(path, 'w', encoding='utf-8', newline='')
+        try:
+            write_rows(stream, format, counted(export_rows(queryset, chunk_size=options['chunk_size'])))
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        elapsed = time.perf_counter() - started
+
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported products: {exported} in {elapsed:.1f}s ({exported / elapsed if elapsed else 0:.0f} rows/s)'
+        ))
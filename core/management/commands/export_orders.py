@@ -0,0 +1,50 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from core.exports import FORMATS, iter_export
+from core.models import Orders
+
+
+class Command(BaseCommand):
+    help = 'خروجی جریانی سفارش‌ها همراه با اقلام و فروشنده برای حسابداری (CSV یا JSONL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default='-', help='مسیر فایل یا - برای خروجی استاندارد')
+        parser.add_argument('--format', choices=FORMATS, help='پیش‌فرض بر اساس پسوند فایل')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--since', help='از تاریخ (YYYY-MM-DD)')
+        parser.add_argument('--until', help='تا تاریخ، بدون خود روز (YYYY-MM-DD)')
+        parser.add_argument('--status', choices=[status for status, _ in Orders.STATUS_CHOICES])
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or ('jsonl' if path.endswith('.jsonl') else 'csv')
+
+        queryset = Orders.objects.all()
+        for option, lookup in (('since', 'created_at__date__gte'), ('until', 'created_at__date__lt')):
+            if options[option]:
+                value = parse_date(options[option])
+                if value is None:
+                    raise CommandError(f'Invalid date for --{option}: {options[option]}')
+                queryset = queryset.filter(**{lookup: value})
+        if options['status']:
+            queryset = queryset.filter(status=options['status'])
+
+        lines = 0
+        started = time.perf_counter()
+        stream = sys.stdout if path == '-' else open(path, 'w', encoding='utf-8', newline='')
+        try:
+            for line in iter_export(format, queryset, chunk_size=options['chunk_size']):
+                stream.write(line)
+                lines += 1
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        elapsed = time.perf_counter() - started
+
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported lines: {lines} in {elapsed:.1f}s ({lines / elapsed if elapsed else 0:.0f} lines/s)'
+        ))
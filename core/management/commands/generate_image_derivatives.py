@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from core.images import sync_derivatives
+from core.models import Products, ProductsImage, VendorProfile
+
+TARGETS = (
+    (Products, 'image', 'image_derivatives'),
+    (ProductsImage, 'image', 'image_derivatives'),
+    (VendorProfile, 'profile_image', 'profile_image_derivatives'),
+)
+
+
+class Command(BaseCommand):
+    help = 'ساخت نسخه‌های کوچک شده (thumbnail و medium) برای تصاویر موجود به صورت دسته‌ای'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--force', action='store_true', help='ساخت دوباره حتی اگر نسخه‌ها بروز باشند')
+
+    def handle(self, *args, **options):
+        for model, field_name, derivatives_field in TARGETS:
+            queryset = model.objects.exclude(**{field_name: ''}).filter(**{f'{field_name}__isnull': False})
+            queryset = queryset.only('pk', field_name, derivatives_field).order_by('pk')
+            generated = 0
+            last_pk = None
+            while True:
+                batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+                batch = list(batch[:options['batch_size']])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                for instance in batch:
+                    before = getattr(instance, derivatives_field)
+                    if sync_derivatives(instance, field_name, derivatives_field, force=options['force']) != before:
+                        generated += 1
+            self.stdout.write(f'{model.__name__}: generated {generated}')
@@ -0,0 +1,44 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.catalog import FORMATS, CatalogImporter, read_rows
+from core.feeds import rebuild_feeds
+
+
+class Command(BaseCommand):
+    help = 'درج و بروزرسانی دسته‌ای محصولات از فایل CSV یا JSONL (خواندن جریانی با حافظه ثابت)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='مسیر فایل یا - برای ورودی استاندارد')
+        parser.add_argument('--format', choices=FORMATS, help='پیش‌فرض بر اساس پسوند فایل')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--create-categories', action='store_true', help='ساخت دسته‌بندی‌های ناموجود')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or ('jsonl' if path.endswith('.jsonl') else 'csv')
+        importer = CatalogImporter(batch_size=options['batch_size'], create_categories=options['create_categories'])
+
+        started = time.perf_counter()
+        stream = sys.stdin if path == '-' else open(path, encoding='utf-8-sig', newline='')
+        try:
+            # ردیف‌های نامعتبر (JSON خراب، مقدار نامعتبر) در importer.errors ثبت می‌شوند و ورود ادامه می‌یابد
+            importer.import_rows(read_rows(stream, format))
+        except UnicodeDecodeError as e:
+            raise CommandError(str(e))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        # فیلدهای is_sale، is_suggestion، موجودی و دسته‌بندی با bulk_create/bulk_update تغییر کرده‌اند
+        rebuild_feeds()
+        elapsed = time.perf_counter() - started
+
+        for line, error in importer.errors:
+            self.stderr.write(f'  line {line}: {error}')
+        rows = importer.created + importer.updated + importer.unchanged
+        self.stdout.write(self.style.SUCCESS(
+            f'Created: {importer.created}, updated: {importer.updated}, unchanged: {importer.unchanged}, skipped: {importer.error_count} '
+            f'in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)'
+        ))
@@ -0,0 +1,83 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from core.checkout import place_order
+from core.ids import uuid7
+from core.models import Categories, Customer, Orders, Products
+
+
+class Command(BaseCommand):
+    help = ('تست بار نوشتن: ثبت همزمان سفارش توسط چند worker و گزارش سفارش در ثانیه. '
+            'داده‌های ساخته شده در پایان حذف می‌شوند؛ بدون DEBUG فقط با --force اجرا می‌شود.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+        parser.add_argument('--orders', type=int, default=50, help='تعداد سفارش هر worker')
+        parser.add_argument('--products', type=int, default=5)
+        parser.add_argument('--force', action='store_true', help='اجرا روی دیتابیس غیر DEBUG (مثلاً production)')
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('این دستور سفارش و محصول آزمایشی ثبت می‌کند؛ بدون DEBUG با --force اجرا کنید.')
+
+        # شناسه اجرا در اسلاگ‌ها و آدرس سفارش‌ها تا اجراهای قبلی یا همزمان تداخلی نداشته باشند
+        run = f'load-test-{uuid7().hex[-12:]}'
+        category, _ = Categories.objects.get_or_create(slug=run, defaults={'name': run})
+        try:
+            self.run(category, run, options)
+        finally:
+            Orders.objects.filter(address=run).delete()
+            Customer.objects.filter(address=run).delete()
+            # محصولات همراه با دسته‌بندی حذف می‌شوند
+            category.delete()
+
+    def run(self, category, run, options):
+        products = [
+            Products.objects.create(
+                name=f'{run}-{i}',
+                slug=f'{run}-{i}',
+                description='load test',
+                category=category,
+                stock=options['workers'] * options['orders'],
+                ir_price=1000,
+            )
+            for i in range(options['products'])
+        ]
+
+        completed = []
+        errors = []
+
+        def worker(number):
+            try:
+                for i in range(options['orders']):
+                    try:
+                        place_order(
+                            full_name='load test',
+                            phone_number=f'0912{number:03d}{i:04d}',
+                            city='Tehran',
+                            address=run,
+                            postal_code='0',
+                            lines=[(products[(number + i) % len(products)].pk, 1)],
+                        )
+                        completed.append(1)
+                    except Exception as e:
+                        errors.append(e)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker, args=(number,)) for number in range(options['workers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(f'{connection.vendor}: {len(completed)} orders in {elapsed:.2f}s '
+                          f'({len(completed) / elapsed:.0f} orders/s), {len(errors)} errors')
+        for error in errors[:5]:
+            self.stdout.write(self.style.ERROR(f'  {error!r}'))
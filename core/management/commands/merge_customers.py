@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.customers import merge_duplicate_customers, normalize_customers
+from core.models import Customer, Orders
+
+
+class Command(BaseCommand):
+    help = 'نرمال کردن شماره مشتری‌ها و ادغام مشتری‌های تکراری به صورت دسته‌ای'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        normalized, merged, _ = normalize_customers(Customer, batch_size=options['batch_size'], order_model=Orders)
+        self.stdout.write(f'Normalized customers: {normalized} (merged on conflict: {merged})')
+        merged = merge_duplicate_customers(Customer, Orders, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Merged duplicate customers: {merged}'))
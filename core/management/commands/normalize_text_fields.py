@@ -0,0 +1,129 @@
+from django.core.management.base import BaseCommand
+from django.db import IntegrityError, transaction
+
+from core.catalog_cache import invalidate_catalog
+from core.customers import normalize_customers
+from core.models import Categories, Customer, Orders, Products, Profile, User, VendorProfile, Vendors
+from core.normalization import normalize_persian, normalize_phone, normalize_text
+from core.search import index_products
+from core.slugs import allocate_slugs
+
+# مدل و فیلدهایی که با جدول نرمال‌سازی فارسی یکسان می‌شوند (مشتری‌ها جداگانه ادغام می‌شوند)
+TARGETS = (
+    (Categories, {'name': normalize_text}),
+    (Products, {'name': normalize_text}),
+    (Vendors, {'first_name': normalize_text, 'last_name': normalize_text, 'phone_number': normalize_phone}),
+    (VendorProfile, {'first_name': normalize_text, 'last_name': normalize_text, 'phone_number': normalize_phone}),
+    (User, {'phone_number': normalize_phone}),
+    (Profile, {'phone_number': normalize_phone}),
+    (Orders, {'phone_number': normalize_phone}),
+)
+
+# viewها اسلاگ آدرس را با normalize_persian جستجو می‌کنند؛ اسلاگ‌های قدیمی هم باید به همان شکل باشند
+SLUG_MODELS = (Categories, Products, Vendors)
+
+
+class Command(BaseCommand):
+    help = 'نرمال کردن نام‌ها، شماره‌ها و اسلاگ‌های موجود به صورت دسته‌ای'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model, fields in TARGETS:
+            updated, conflicts = self.normalize_model(model, fields, batch_size)
+            self.stdout.write(f'{model.__name__}: normalized {updated}, conflicts {len(conflicts)}')
+            for pk in conflicts:
+                self.stderr.write(f'  {model.__name__} {pk}: normalized value already exists')
+
+        for model in SLUG_MODELS:
+            updated, renamed = self.normalize_slugs(model, batch_size)
+            self.stdout.write(f'{model.__name__} slugs: normalized {updated}, renamed {len(renamed)}')
+            for pk, slug in renamed:
+                self.stderr.write(f'  {model.__name__} {pk}: normalized slug already exists, renamed to {slug}')
+
+        # نام و اسلاگ محصولات و دسته‌بندی‌ها با update دسته‌ای تغییر کرده‌اند
+        invalidate_catalog()
+
+        updated, merged, _ = normalize_customers(Customer, batch_size=batch_size, order_model=Orders)
+        self.stdout.write(self.style.SUCCESS(f'Customer: normalized {updated}, merged {merged}'))
+
+    def normalize_model(self, model, fields, batch_size):
+        queryset = model.objects.only('pk', *fields).order_by('pk')
+        updated = 0
+        conflicts = []
+        last_pk = None
+        while True:
+            batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            batch = list(batch[:batch_size])
+            if not batch:
+                return updated, conflicts
+            last_pk = batch[-1].pk
+
+            changed = []
+            for instance in batch:
+                values = {name: normalize(getattr(instance, name)) for name, normalize in fields.items()}
+                if any(getattr(instance, name) != value for name, value in values.items()):
+                    for name, value in values.items():
+                        setattr(instance, name, value)
+                    changed.append((instance, values))
+            if not changed:
+                continue
+
+            try:
+                with transaction.atomic():
+                    model.objects.bulk_update([instance for instance, _ in changed], list(fields))
+                updated += len(changed)
+            except IntegrityError:
+                # شماره یکتای نرمال شده با رکورد دیگری برخورد کرده؛ رکوردها یکی یکی بروز می‌شوند
+                for instance, values in changed:
+                    try:
+                        with transaction.atomic():
+                            model.objects.filter(pk=instance.pk).update(**values)
+                        updated += 1
+                    except IntegrityError:
+                        conflicts.append(instance.pk)
+
+            if model is Products:
+                index_products(model.objects.filter(pk__in=[instance.pk for instance, _ in changed]))
+
+    def normalize_slugs(self, model, batch_size):
+        """
+        تبدیل اسلاگ‌های دارای «ي»، «ك» و ... به شکل نرمال؛ اگر اسلاگ نرمال متعلق به رکورد دیگری باشد،
+        اسلاگ یکتا با پسوند عددی رزرو می‌شود.
+        """
+        queryset = model._base_manager.exclude(slug=None).only('pk', 'slug').order_by('pk')
+        updated = 0
+        renamed = []
+        last_pk = None
+        while True:
+            batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            batch = list(batch[:batch_size])
+            if not batch:
+                return updated, renamed
+            last_pk = batch[-1].pk
+
+            changed = []
+            for instance in batch:
+                slug = normalize_persian(instance.slug)
+                if slug != instance.slug:
+                    instance.slug = slug
+                    changed.append(instance)
+            if not changed:
+                continue
+
+            try:
+                with transaction.atomic():
+                    model._base_manager.bulk_update(changed, ['slug'])
+                updated += len(changed)
+            except IntegrityError:
+                for instance in changed:
+                    try:
+                        with transaction.atomic():
+                            model._base_manager.filter(pk=instance.pk).update(slug=instance.slug)
+                    except IntegrityError:
+                        slug = allocate_slugs(model, [instance.slug])[0]
+                        model._base_manager.filter(pk=instance.pk).update(slug=slug)
+                        renamed.append((instance.pk, slug))
+                    updated += 1
@@ -0,0 +1,18 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.feeds import rebuild_feeds
+from core.models import ProductFeed
+
+
+class Command(BaseCommand):
+    help = 'ساخت دوباره فیدهای محصولات پیشنهادی و حراج (برای backfill یا بعد از بروزرسانی مستقیم دیتابیس)'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        changed = rebuild_feeds()
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{ProductFeed.objects.count()} feeds, {changed} rewritten in {elapsed:.2f}s'
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Products
+from core.search import index_products
+
+
+class Command(BaseCommand):
+    help = 'بازسازی ایندکس جستجوی محصولات به صورت دسته‌ای'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Products.objects.only('pk', 'name', 'description').order_by('pk')
+        indexed = 0
+        last_pk = None
+        while True:
+            batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            index_products(batch)
+            indexed += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Indexed products: {indexed}'))
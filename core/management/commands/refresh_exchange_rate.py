@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.exchange import provider
+from core.pricing import record_rate
+
+
+class Command(BaseCommand):
+    help = 'دریافت نرخ دلار، بروزرسانی کش و قیمت‌گذاری مجدد محصولات (برای اجرای زمان‌بندی شده با cron)'
+
+    def handle(self, *args, **options):
+        rate = provider.refresh(force=True)
+        if rate is None:
+            raise CommandError('دریافت نرخ دلار با خطا مواجه شد.')
+        self.stdout.write(self.style.SUCCESS(f'USD to IRR: {rate}'))
+
+        if record_rate(rate) is None:
+            self.stdout.write('نرخ تغییری نکرده است.')
+        else:
+            self.stdout.write(self.style.SUCCESS('قیمت محصولات بروزرسانی شد.'))
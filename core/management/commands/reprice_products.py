@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import ExchangeRate
+from core.pricing import record_rate, reprice_products
+
+
+class Command(BaseCommand):
+    help = 'قیمت‌گذاری مجدد ir_price و ir_new_price همه محصولات با آخرین نرخ یا نرخ داده شده'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rate', type=int, help='نرخ دلار به ریال (در تاریخچه ذخیره می‌شود)')
+
+    def handle(self, *args, **options):
+        rate = options['rate']
+        if rate is not None:
+            record_rate(rate, source='manual', force=True)
+            self.stdout.write(self.style.SUCCESS(f'Repriced products with rate {rate}'))
+            return
+
+        try:
+            rate = ExchangeRate.objects.latest().rate
+        except ExchangeRate.DoesNotExist:
+            raise CommandError('هیچ نرخی ذخیره نشده است. از --rate استفاده کنید.')
+        updated = reprice_products(rate)
+        self.stdout.write(self.style.SUCCESS(f'Repriced {updated} products with rate {rate}'))
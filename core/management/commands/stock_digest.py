@@ -0,0 +1,40 @@
+from itertools import groupby
+
+from django.core.mail import mail_admins
+from django.core.management.base import BaseCommand
+
+from core.inventory import iter_low_stock, sync_reorder_levels
+
+
+class Command(BaseCommand):
+    help = 'گزارش محصولات کم موجودی و تمام شده (برای اجرای دوره‌ای با cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--sync', action='store_true', help='محاسبه دوباره آستانه‌ها قبل از گزارش (بعد از تغییر تنظیمات)')
+        parser.add_argument('--mail-admins', action='store_true', help='ارسال گزارش برای ADMINS')
+
+    def handle(self, *args, **options):
+        if options['sync']:
+            updated = sync_reorder_levels()
+            self.stderr.write(f'Thresholds updated: {updated}')
+
+        lines = []
+        low = out = 0
+        products = iter_low_stock(chunk_size=options['chunk_size'])
+        for category, items in groupby(products, key=lambda product: product.category.name):
+            lines.append(category)
+            for product in items:
+                if product.stock:
+                    low += 1
+                    state = f'{product.stock}/{product.low_stock_threshold}'
+                else:
+                    out += 1
+                    state = 'out of stock' if product.is_active else 'out of stock, inactive'
+                lines.append(f'  {product.name} ({product.slug}): {state}')
+
+        summary = f'Low stock: {low}, out of stock: {out}'
+        body = '\n'.join(lines + ['', summary])
+        self.stdout.write(body)
+        if options['mail_admins'] and (low or out):
+            mail_admins(summary, body)
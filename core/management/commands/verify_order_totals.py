@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import Orders
+
+
+class Command(BaseCommand):
+    help = 'بررسی ستون‌های total_price و item_count سفارش‌ها و گزارش/اصلاح اختلاف'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='اصلاح سفارش‌های دارای اختلاف')
+        parser.add_argument('--all', action='store_true', help='محاسبه مجدد همه سفارش‌ها (backfill)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fix = options['fix'] or options['all']
+
+        queryset = Orders.objects.all() if options['all'] else Orders.objects.with_drift()
+        queryset = queryset.order_by('pk')
+
+        found = 0
+        fixed = 0
+        last_pk = None
+        while True:
+            batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            batch = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            found += len(batch)
+
+            if fix:
+                with transaction.atomic():
+                    fixed += Orders.objects.filter(pk__in=batch).refresh_totals()
+            elif options['verbosity'] > 1:
+                for pk in batch:
+                    self.stdout.write(f'  {pk}')
+
+        label = 'Checked' if options['all'] else 'Drifted'
+        self.stdout.write(f'{label} orders: {found}')
+        if fix:
+            self.stdout.write(self.style.SUCCESS(f'Recomputed orders: {fixed}'))
@@ -0,0 +1,146 @@
+from collections import Counter
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import MediaBlob, Products, ProductsImage, VendorProfile
+
+# فیلدهای فایل و فیلد JSON نسخه‌های مشتق شده آن‌ها که به MediaBlob ارجاع می‌دهند
+MEDIA_FIELDS = {
+    Products: (('image', 'image_derivatives'),),
+    ProductsImage: (('image', 'image_derivatives'),),
+    VendorProfile: (('profile_image', 'profile_image_derivatives'),),
+}
+
+
+def get_derivative_names(derivatives):
+    return [name for key, name in (derivatives or {}).items() if key != 'source' and name]
+
+
+def get_file_names(instance):
+    return [getattr(instance, field_name).name for field_name, _ in MEDIA_FIELDS[type(instance)] if getattr(instance, field_name)]
+
+
+def get_media_names(instance):
+    names = get_file_names(instance)
+    for _, derivatives_field in MEDIA_FIELDS[type(instance)]:
+        names.extend(get_derivative_names(getattr(instance, derivatives_field)))
+    return names
+
+
+def acquire(names):
+    if names:
+        MediaBlob.objects.filter(name__in=set(names)).update(ref_count=F('ref_count') + 1, updated_at=timezone.now())
+
+
+def release(names):
+    if names:
+        MediaBlob.objects.filter(name__in=set(names)).update(
+            ref_count=Greatest(F('ref_count') - 1, Value(0)),
+            updated_at=timezone.now(),
+        )
+
+
+def update_references(old_names, new_names):
+    """
+    بروزرسانی ref_count بعد از تغییر ارجاع‌ها: یک UPDATE برای اضافه شده‌ها و یک UPDATE برای حذف شده‌ها.
+    """
+    old_names, new_names = set(old_names), set(new_names)
+    acquire(new_names - old_names)
+    release(old_names - new_names)
+
+
+def recount_references(batch_size=1000):
+    """
+    محاسبه دوباره ref_count همه فایل‌ها از روی مدل‌ها (برای اصلاح اختلاف بعد از update/bulk_update مستقیم).
+    """
+    counts = Counter()
+    for model, fields in MEDIA_FIELDS.items():
+        columns = [column for field in fields for column in field]
+        queryset = model._base_manager.order_by('pk').values_list('pk', *columns)
+        last_pk = None
+        while True:
+            batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            for row in batch:
+                values = iter(row[1:])
+                for file_name, derivatives in zip(values, values):
+                    if file_name:
+                        counts[file_name] += 1
+                    counts.update(get_derivative_names(derivatives))
+
+    updated = 0
+    with transaction.atomic():
+        blobs = MediaBlob.objects.select_for_update().only('pk', 'name', 'ref_count')
+        changed = []
+        for blob in blobs.iterator(chunk_size=batch_size):
+            ref_count = counts.get(blob.name, 0)
+            if blob.ref_count != ref_count:
+                blob.ref_count = ref_count
+                changed.append(blob)
+        MediaBlob.objects.bulk_update(changed, ['ref_count'], batch_size=batch_size)
+        updated = len(changed)
+    return updated
+
+
+def collect_orphans(storage, grace, batch_size=500, dry_run=False):
+    """
+    حذف فایل‌هایی که هیچ ارجاعی ندارند و در بازه grace تغییری نکرده‌اند (آپلودهای در حال ذخیره حذف نمی‌شوند).
+    برای هر دسته: یک SELECT، یک DELETE شرطی و حذف فایل‌ها از دیسک.
+    """
+    cutoff = timezone.now() - grace
+    orphans = MediaBlob.objects.filter(ref_count=0, updated_at__lt=cutoff).order_by('pk')
+    collected = 0
+    freed = 0
+    last_pk = None
+    while True:
+        batch = orphans if last_pk is None else orphans.filter(pk__gt=last_pk)
+        batch = list(batch.values_list('pk', 'name', 'size')[:batch_size])
+        if not batch:
+            return collected, freed
+        last_pk = batch[-1][0]
+        if dry_run:
+            collected += len(batch)
+            freed += sum(size for _, _, size in batch)
+            continue
+
+        with transaction.atomic():
+            # شرط دوباره بررسی می‌شود تا فایلی که در این فاصله ارجاع گرفته حذف نشود
+            deleted = set(
+                MediaBlob.objects.select_for_update()
+                .filter(pk__in=[pk for pk, _, _ in batch], ref_count=0, updated_at__lt=cutoff)
+                .values_list('pk', flat=True)
+            )
+            MediaBlob.objects.filter(pk__in=deleted).delete()
+        for pk, name, size in batch:
+            if pk in deleted:
+                storage.purge(name)
+                collected += 1
+                freed += size
+
+
+def collect_untracked(storage, grace, batch_size=500, dry_run=False):
+    """
+    حذف فایل‌های پوشه blobs که ردیف MediaBlob ندارند (مثلاً آپلود در تراکنشی که برگشت خورده)
+    و در بازه grace تغییری نکرده‌اند؛ برای هر دسته فقط یک SELECT روی نام‌ها.
+    """
+    cutoff = timezone.now() - grace
+    files = ((name, size) for name, size, modified in storage.iter_files() if modified < cutoff)
+    collected = 0
+    freed = 0
+    while batch := list(islice(files, batch_size)):
+        tracked = set(MediaBlob.objects.filter(name__in=[name for name, _ in batch]).values_list('name', flat=True))
+        for name, size in batch:
+            if name in tracked:
+                continue
+            if not dry_run:
+                storage.purge(name)
+            collected += 1
+            freed += size
+    return collected, freed
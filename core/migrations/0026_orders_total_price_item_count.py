@@ -0,0 +1,40 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:18
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_totals(apps, schema_editor):
+    Orders = apps.get_model('core', 'Orders')
+    OrderItem = apps.get_model('core', 'OrderItem')
+    items = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order')
+    total = items.annotate(total=Sum(F('quantity') * F('price'))).values('total')
+    count = items.annotate(count=Sum('quantity')).values('count')
+    Orders.objects.update(
+        total_price=Coalesce(Subquery(total, output_field=models.DecimalField()), Value(Decimal(0))),
+        item_count=Coalesce(Subquery(count, output_field=models.PositiveIntegerField()), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_exchangerate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='orders',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='orders',
+            name='total_price',
+            field=models.DecimalField(decimal_places=0, default=0, editable=False, max_digits=12),
+        ),
+        migrations.RunPython(backfill_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:19
+
+import django.db.models.deletion
+import uuid
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_ledger(apps, schema_editor):
+    Orders = apps.get_model('core', 'Orders')
+    Vendors = apps.get_model('core', 'Vendors')
+    VendorProfile = apps.get_model('core', 'VendorProfile')
+    VendorLedgerEntry = apps.get_model('core', 'VendorLedgerEntry')
+
+    orders = Orders.objects.filter(status='Delivered', vendor__isnull=False).values_list('pk', 'vendor_id', 'total_price')
+    entries = []
+    for order_id, vendor_id, total_price in orders.iterator(chunk_size=2000):
+        amount = round(total_price * Decimal('0.1'))
+        if amount:
+            entries.append(VendorLedgerEntry(vendor_id=vendor_id, order_id=order_id, kind='Credit', amount=amount))
+        if len(entries) >= 2000:
+            VendorLedgerEntry.objects.bulk_create(entries)
+            entries = []
+    VendorLedgerEntry.objects.bulk_create(entries)
+
+    balance = (
+        VendorLedgerEntry.objects.filter(vendor=OuterRef('pk')).order_by().values('vendor')
+        .annotate(balance=Sum('amount')).values('balance')
+    )
+    Vendors.objects.update(profit=Coalesce(Subquery(balance), Value(0)))
+    VendorProfile.objects.filter(vendor__isnull=False).update(
+        profit=Subquery(Vendors.objects.filter(pk=OuterRef('vendor')).values('profit'))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_orders_total_price_item_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VendorLedgerEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('Credit', 'Credit'), ('Reversal', 'Reversal')], max_length=10)),
+                ('amount', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ledger_entries', to='core.orders')),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='core.vendors')),
+            ],
+            options={
+                'verbose_name': 'Vendor Ledger Entry',
+                'verbose_name_plural': 'Vendor Ledger Entries',
+                'db_table': 'vendor_ledger',
+                'ordering': ['-created_at'],
+                'get_latest_by': 'created_at',
+            },
+        ),
+        migrations.RunPython(backfill_ledger, migrations.RunPython.noop),
+    ]
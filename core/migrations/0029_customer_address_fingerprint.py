@@ -0,0 +1,68 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:40
+
+import hashlib
+import re
+
+from django.db import migrations, models
+
+# کپی نرمال‌سازی همان زمان؛ مایگریشن نباید به کد فعلی core.normalization وابسته باشد
+DIGITS = str.maketrans('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩', '01234567890123456789')
+NON_DIGIT_RE = re.compile(r'\D')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_phone(value):
+    if not value:
+        return value
+    digits = NON_DIGIT_RE.sub('', value.translate(DIGITS))
+    if digits.startswith('0098'):
+        digits = '0' + digits[4:]
+    elif digits.startswith('98') and len(digits) == 12:
+        digits = '0' + digits[2:]
+    elif digits.startswith('9') and len(digits) == 10:
+        digits = '0' + digits
+    return digits
+
+
+def normalize_text(value):
+    return WHITESPACE_RE.sub(' ', (value or '').translate(DIGITS)).strip().lower()
+
+
+def address_fingerprint(city, address, postal_code):
+    value = '|'.join(normalize_text(part) for part in (city, address, postal_code))
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+
+def backfill_customers(apps, schema_editor, batch_size=1000):
+    # هنوز محدودیت یکتایی وجود ندارد؛ تکراری‌ها در 0030 ادغام می‌شوند
+    Customer = apps.get_model('core', 'Customer')
+    last_pk = None
+    while True:
+        queryset = Customer.objects.order_by('pk')
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+        batch = list(queryset.only('pk', 'phone_number', 'city', 'address', 'postal_code')[:batch_size])
+        if not batch:
+            return
+        last_pk = batch[-1].pk
+        for customer in batch:
+            customer.phone_number = normalize_phone(customer.phone_number)
+            customer.address_fingerprint = address_fingerprint(customer.city, customer.address, customer.postal_code)
+        Customer.objects.bulk_update(batch, ['phone_number', 'address_fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_orderstatushistory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='address_fingerprint',
+            field=models.CharField(default='', editable=False, max_length=40),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_customers, migrations.RunPython.noop),
+    ]
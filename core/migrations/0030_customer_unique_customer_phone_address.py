@@ -0,0 +1,66 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:40
+
+from django.db import migrations, models
+from django.db.models import Case, Count, Value, When
+
+
+def merge_customers(apps, schema_editor, batch_size=500):
+    """
+    کپی merge_duplicate_customers با مدل‌های تاریخی؛ معمولاً قبل از این مایگریشن با دستور merge_customers انجام شده است.
+    """
+    Customer = apps.get_model('core', 'Customer')
+    Orders = apps.get_model('core', 'Orders')
+    while True:
+        groups = list(
+            Customer.objects.order_by()
+            .values_list('phone_number', 'address_fingerprint')
+            .annotate(count=Count('pk'))
+            .filter(count__gt=1)[:batch_size]
+        )
+        if not groups:
+            return
+
+        keys = {(phone_number, fingerprint) for phone_number, fingerprint, _ in groups}
+        customers = Customer.objects.filter(
+            phone_number__in={phone_number for phone_number, _ in keys},
+            address_fingerprint__in={fingerprint for _, fingerprint in keys},
+        ).order_by('created_at', 'pk')
+
+        grouped = {}
+        for customer in customers:
+            key = (customer.phone_number, customer.address_fingerprint)
+            if key in keys:
+                grouped.setdefault(key, []).append(customer)
+
+        keepers = []
+        mapping = {}
+        for group in grouped.values():
+            keeper, latest = group[0], group[-1]
+            keeper.full_name = latest.full_name
+            keeper.city = latest.city
+            keeper.address = latest.address
+            keeper.postal_code = latest.postal_code
+            keepers.append(keeper)
+            for duplicate in group[1:]:
+                mapping[duplicate.pk] = keeper.pk
+
+        Orders.objects.filter(customer_id__in=mapping).update(
+            customer=Case(*[When(customer_id=duplicate, then=Value(keeper)) for duplicate, keeper in mapping.items()])
+        )
+        Customer.objects.bulk_update(keepers, ['full_name', 'city', 'address', 'postal_code'])
+        Customer.objects.filter(pk__in=mapping).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_customer_address_fingerprint'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_customers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.UniqueConstraint(fields=('phone_number', 'address_fingerprint'), name='unique_customer_phone_address'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_uuid7_and_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='products',
+            name='products_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='products',
+            index=models.Index(fields=['-created_at', '-id'], name='products_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,85 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:31
+
+import html
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.html import strip_tags
+
+# کپی tokenizer همان زمان؛ مایگریشن نباید به کد فعلی core.search وابسته باشد
+PERSIAN = str.maketrans({
+    **{chr(code): None for code in range(0x064B, 0x0653)},  # اعراب
+    'ـ': None,  # کشیده
+    'ي': 'ی',
+    'ى': 'ی',
+    'ئ': 'ی',
+    'ك': 'ک',
+    'ة': 'ه',
+    'ۀ': 'ه',
+    'أ': 'ا',
+    'إ': 'ا',
+    'ٱ': 'ا',
+    'ؤ': 'و',
+    **{digit: str(i % 10) for i, digit in enumerate('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩')},
+})
+ZWNJ = '\u200c'
+TOKEN_RE = re.compile(r'\w+')
+MAX_TERM_LENGTH = 64
+NAME_WEIGHT = 5
+DESCRIPTION_WEIGHT = 1
+
+
+def tokenize(text):
+    text = text.translate(PERSIAN).replace(ZWNJ, '').lower()
+    return [token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(text) if len(token) > 1]
+
+
+def get_document_terms(product):
+    terms = {}
+    for token in tokenize(product.name):
+        terms[token] = terms.get(token, 0) + NAME_WEIGHT
+    for token in tokenize(html.unescape(strip_tags(product.description or ''))):
+        terms[token] = terms.get(token, 0) + DESCRIPTION_WEIGHT
+    return terms
+
+
+def build_search_index(apps, schema_editor):
+    Products = apps.get_model('core', 'Products')
+    ProductSearchTerm = apps.get_model('core', 'ProductSearchTerm')
+    terms = []
+    for product in Products.objects.only('pk', 'name', 'description').iterator(chunk_size=500):
+        terms.extend(
+            ProductSearchTerm(product_id=product.pk, term=term, weight=min(weight, 32767))
+            for term, weight in get_document_terms(product).items()
+        )
+        if len(terms) >= 5000:
+            ProductSearchTerm.objects.bulk_create(terms)
+            terms = []
+    ProductSearchTerm.objects.bulk_create(terms)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0032_products_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='core.products')),
+            ],
+            options={
+                'verbose_name': 'Product Search Term',
+                'verbose_name_plural': 'Product Search Terms',
+                'db_table': 'product_search_term',
+                'indexes': [models.Index(fields=['term', 'product'], name='search_term_product_idx')],
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:33
+
+import core.fields
+import django.core.validators
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0033_productsearchterm'),
+    ]
+
+    operations = [
+        # فقط کلاس فیلد در پایتون تغییر کرده و ستون‌ها همان varchar(11) هستند؛ نیازی به بازسازی جدول‌ها نیست
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='customer',
+                    name='phone_number',
+                    field=core.fields.PhoneNumberField(max_length=11, validators=[django.core.validators.RegexValidator(message='شماره شما باید با فرمت 09 وارد شود', regex='^09\\d{9}$')]),
+                ),
+                migrations.AlterField(
+                    model_name='orders',
+                    name='phone_number',
+                    field=core.fields.PhoneNumberField(max_length=11, validators=[django.core.validators.RegexValidator(message='شماره شما باید با فرمت 09 وارد شود', regex='^09\\d{9}$')]),
+                ),
+                migrations.AlterField(
+                    model_name='profile',
+                    name='phone_number',
+                    field=core.fields.PhoneNumberField(max_length=11, unique=True, validators=[django.core.validators.RegexValidator(message='شماره خودرا با فرمت صحیح 09 وارد کنید', regex='^09\\d{9}$')]),
+                ),
+                migrations.AlterField(
+                    model_name='user',
+                    name='phone_number',
+                    field=core.fields.PhoneNumberField(max_length=11, unique=True, validators=[django.core.validators.RegexValidator(message='شماره خودرا با فرمت صحیح 09 وارد کنید', regex='^09\\d{9}$')]),
+                ),
+                migrations.AlterField(
+                    model_name='vendorprofile',
+                    name='phone_number',
+                    field=core.fields.PhoneNumberField(max_length=11, unique=True, validators=[django.core.validators.RegexValidator(message='شماره شما باید با فرمت 09 وارد شود', regex='^09\\d{9}$')]),
+                ),
+                migrations.AlterField(
+                    model_name='vendors',
+                    name='phone_number',
+                    field=core.fields.PhoneNumberField(max_length=11, unique=True, validators=[django.core.validators.RegexValidator(message='شماره شما باید با فرمت 09 وارد شود', regex='^09\\d{9}$')]),
+                ),
+            ],
+        ),
+    ]
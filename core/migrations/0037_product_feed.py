@@ -0,0 +1,32 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:52
+
+import core.ids
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0036_media_blob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFeed',
+            fields=[
+                ('id', models.UUIDField(default=core.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(choices=[('suggested', 'Suggested'), ('sale', 'Sale')], max_length=20)),
+                ('product_ids', models.JSONField(blank=True, default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='feeds', to='core.categories')),
+            ],
+            options={
+                'verbose_name': 'Product Feed',
+                'verbose_name_plural': 'Product Feeds',
+                'db_table': 'product_feed',
+                'ordering': ['name'],
+                'constraints': [models.UniqueConstraint(fields=('name', 'category'), name='unique_product_feed_category'), models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('name',), name='unique_product_feed_all')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-18 15:59
+
+import core.ids
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0037_product_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySalesRollup',
+            fields=[
+                ('id', models.UUIDField(default=core.ids.uuid7, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('city', models.CharField(max_length=255)),
+                ('order_count', models.PositiveIntegerField(default=0)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=0, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='core.categories')),
+                ('vendor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sales_rollups', to='core.vendors')),
+            ],
+            options={
+                'verbose_name': 'Daily Sales Rollup',
+                'verbose_name_plural': 'Daily Sales Rollups',
+                'db_table': 'daily_sales_rollup',
+                'ordering': ['-date'],
+                'get_latest_by': 'date',
+                'indexes': [models.Index(fields=['category', 'date'], name='sales_rollup_category_idx'), models.Index(fields=['vendor', 'date'], name='sales_rollup_vendor_idx'), models.Index(fields=['city', 'date'], name='sales_rollup_city_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'category', 'vendor', 'city'), name='unique_sales_rollup'), models.UniqueConstraint(condition=models.Q(('vendor__isnull', True)), fields=('date', 'category', 'city'), name='unique_sales_rollup_no_vendor')],
+            },
+        ),
+    ]
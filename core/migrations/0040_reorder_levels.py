@@ -0,0 +1,33 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:04
+
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0039_daily_sales_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categories',
+            name='reorder_level',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='products',
+            name='low_stock_threshold',
+            field=models.PositiveIntegerField(default=core.models.default_reorder_level, editable=False),
+        ),
+        migrations.AddField(
+            model_name='products',
+            name='reorder_level',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='products',
+            index=models.Index(condition=models.Q(('stock__lte', models.F('low_stock_threshold'))), fields=['stock'], name='products_low_stock_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.4 on 2026-10-18 16:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0040_reorder_levels'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailyproductsales',
+            name='revenue',
+            field=models.DecimalField(decimal_places=0, default=0, max_digits=20),
+        ),
+        migrations.AlterField(
+            model_name='dailysalesrollup',
+            name='revenue',
+            field=models.DecimalField(decimal_places=0, default=0, max_digits=20),
+        ),
+        migrations.AlterField(
+            model_name='dailysalestotal',
+            name='revenue',
+            field=models.DecimalField(decimal_places=0, default=0, max_digits=20),
+        ),
+        migrations.AlterField(
+            model_name='orderitem',
+            name='price',
+            field=models.DecimalField(decimal_places=0, max_digits=18),
+        ),
+        migrations.AlterField(
+            model_name='orders',
+            name='total_price',
+            field=models.DecimalField(decimal_places=0, default=0, editable=False, max_digits=20),
+        ),
+        migrations.AlterField(
+            model_name='products',
+            name='ir_new_price',
+            field=models.DecimalField(blank=True, decimal_places=0, max_digits=18, null=True),
+        ),
+        migrations.AlterField(
+            model_name='products',
+            name='ir_price',
+            field=models.DecimalField(blank=True, decimal_places=0, max_digits=18, null=True),
+        ),
+        migrations.AlterField(
+            model_name='vendorprofile',
+            name='profit',
+            field=models.DecimalField(decimal_places=0, default=0, max_digits=20),
+        ),
+    ]
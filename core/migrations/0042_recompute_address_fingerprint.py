@@ -0,0 +1,153 @@
+# Generated by Django 5.1.4 on 2026-10-18 19:10
+
+import hashlib
+import re
+
+from django.db import migrations, models
+from django.db.models import Case, Count, Value, When
+
+# کپی نرمال‌سازی مشترک (core.normalization بعد از یکپارچه شدن جدول PERSIAN)؛
+# اثر انگشت‌های ساخته شده با الگوریتم قبلی (فقط ارقام و فاصله) با این الگوریتم دوباره محاسبه می‌شوند
+PERSIAN = str.maketrans({
+    **{digit: str(i % 10) for i, digit in enumerate('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩')},
+    'ي': 'ی',
+    'ى': 'ی',
+    'ئ': 'ی',
+    'ك': 'ک',
+    'ة': 'ه',
+    'ۀ': 'ه',
+    'أ': 'ا',
+    'إ': 'ا',
+    'ٱ': 'ا',
+    'ؤ': 'و',
+    **{chr(code): None for code in range(0x064B, 0x0653)},  # اعراب
+    'ـ': None,  # کشیده
+    '\u200d': None,  # ZWJ
+    '\u200e': None,  # LRM
+    '\u200f': None,  # RLM
+    '\ufeff': None,  # BOM
+    **{space: ' ' for space in '\t\n\r\u00a0\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u202f\u205f\u3000'},
+})
+
+ZWNJ = '\u200c'
+NON_DIGIT_RE = re.compile(r'\D')
+SPACES_RE = re.compile(r' {2,}')
+ZWNJ_RE = re.compile(r' ?\u200c+ ?')
+
+
+def normalize_text(value):
+    if not value:
+        return value
+    value = ZWNJ_RE.sub(ZWNJ, SPACES_RE.sub(' ', value.translate(PERSIAN)))
+    return value.strip(' ' + ZWNJ)
+
+
+def normalize_phone(value):
+    if not value:
+        return value
+    digits = NON_DIGIT_RE.sub('', value.translate(PERSIAN))
+    if digits.startswith('0098'):
+        digits = '0' + digits[4:]
+    elif digits.startswith('98') and len(digits) == 12:
+        digits = '0' + digits[2:]
+    elif digits.startswith('9') and len(digits) == 10:
+        digits = '0' + digits
+    return digits
+
+
+def address_fingerprint(city, address, postal_code):
+    value = '|'.join((normalize_text(part) or '').lower() for part in (city, address, postal_code))
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
+
+
+def recompute_fingerprints(apps, schema_editor, batch_size=1000):
+    # محدودیت یکتایی در این مرحله برداشته شده است؛ تکراری‌های جدید در merge_customers ادغام می‌شوند
+    Customer = apps.get_model('core', 'Customer')
+    last_pk = None
+    while True:
+        queryset = Customer.objects.order_by('pk')
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+        batch = list(queryset.only('pk', 'phone_number', 'city', 'address', 'postal_code', 'address_fingerprint')[:batch_size])
+        if not batch:
+            return
+        last_pk = batch[-1].pk
+        changed = []
+        for customer in batch:
+            phone_number = normalize_phone(customer.phone_number)
+            fingerprint = address_fingerprint(customer.city, customer.address, customer.postal_code)
+            if customer.phone_number != phone_number or customer.address_fingerprint != fingerprint:
+                customer.phone_number = phone_number
+                customer.address_fingerprint = fingerprint
+                changed.append(customer)
+        Customer.objects.bulk_update(changed, ['phone_number', 'address_fingerprint'])
+
+
+def merge_customers(apps, schema_editor, batch_size=500):
+    # مانند 0030: قدیمی‌ترین رکورد با اطلاعات جدیدترین رکورد نگه داشته می‌شود و سفارش‌ها به آن منتقل می‌شوند
+    Customer = apps.get_model('core', 'Customer')
+    Orders = apps.get_model('core', 'Orders')
+    while True:
+        groups = list(
+            Customer.objects.order_by()
+            .values_list('phone_number', 'address_fingerprint')
+            .annotate(count=Count('pk'))
+            .filter(count__gt=1)[:batch_size]
+        )
+        if not groups:
+            return
+
+        keys = {(phone_number, fingerprint) for phone_number, fingerprint, _ in groups}
+        customers = Customer.objects.filter(
+            phone_number__in={phone_number for phone_number, _ in keys},
+            address_fingerprint__in={fingerprint for _, fingerprint in keys},
+        ).order_by('created_at', 'pk')
+
+        grouped = {}
+        for customer in customers:
+            key = (customer.phone_number, customer.address_fingerprint)
+            if key in keys:
+                grouped.setdefault(key, []).append(customer)
+
+        keepers = []
+        mapping = {}
+        for group in grouped.values():
+            keeper, latest = group[0], group[-1]
+            keeper.full_name = latest.full_name
+            keeper.city = latest.city
+            keeper.address = latest.address
+            keeper.postal_code = latest.postal_code
+            keepers.append(keeper)
+            for duplicate in group[1:]:
+                mapping[duplicate.pk] = keeper.pk
+
+        Orders.objects.filter(customer_id__in=mapping).update(
+            customer=Case(*[When(customer_id=duplicate, then=Value(keeper)) for duplicate, keeper in mapping.items()])
+        )
+        Customer.objects.bulk_update(keepers, ['full_name', 'city', 'address', 'postal_code'])
+        Customer.objects.filter(pk__in=mapping).delete()
+
+
+def backfill(apps, schema_editor):
+    recompute_fingerprints(apps, schema_editor)
+    merge_customers(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0041_widen_rial_amounts'),
+    ]
+
+    operations = [
+        # در حین محاسبه دوباره، دو مشتری ممکن است موقتاً اثر انگشت یکسان داشته باشند
+        migrations.RemoveConstraint(
+            model_name='customer',
+            name='unique_customer_phone_address',
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='customer',
+            constraint=models.UniqueConstraint(fields=('phone_number', 'address_fingerprint'), name='unique_customer_phone_address'),
+        ),
+    ]
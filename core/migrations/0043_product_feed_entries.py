@@ -0,0 +1,47 @@
+# Generated by Django 5.1.4 on 2026-10-18 21:40
+
+import datetime
+
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def feed_entry(pk, created_at):
+    # همان قالب core.feeds.feed_entry
+    return [created_at.astimezone(datetime.timezone.utc).isoformat(timespec='microseconds'), str(pk)]
+
+
+def to_entries(apps, schema_editor):
+    ProductFeed = apps.get_model('core', 'ProductFeed')
+    Products = apps.get_model('core', 'Products')
+    feeds = list(ProductFeed.objects.all())
+    ids = sorted({pk for feed in feeds for pk in feed.product_ids if isinstance(pk, str)})
+    created = {}
+    for start in range(0, len(ids), BATCH_SIZE):
+        rows = Products.objects.filter(pk__in=ids[start:start + BATCH_SIZE]).values_list('pk', 'created_at')
+        created.update((str(pk), created_at) for pk, created_at in rows)
+    for feed in feeds:
+        feed.product_ids = sorted(
+            feed_entry(pk, created[pk]) for pk in feed.product_ids if isinstance(pk, str) and pk in created
+        )
+    ProductFeed.objects.bulk_update(feeds, ['product_ids'], batch_size=BATCH_SIZE)
+
+
+def to_ids(apps, schema_editor):
+    ProductFeed = apps.get_model('core', 'ProductFeed')
+    feeds = list(ProductFeed.objects.all())
+    for feed in feeds:
+        feed.product_ids = [pk for _, pk in reversed(feed.product_ids)]
+    ProductFeed.objects.bulk_update(feeds, ['product_ids'], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0042_recompute_address_fingerprint'),
+    ]
+
+    operations = [
+        migrations.RunPython(to_entries, to_ids),
+    ]
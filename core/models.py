@@ -1,18 +1,23 @@
-import uuid
-
+from django.conf import settings
 from django.core.validators import RegexValidator
 from django.utils import timezone
 
-from django.db import models
+from django.db import models, transaction
+from django.db.models import ExpressionWrapper, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import BaseUserManager, AbstractBaseUser, PermissionsMixin
-from django.template.defaultfilters import slugify
+from django.utils.text import slugify
 from ckeditor.fields import RichTextField
-import requests
 import os
 from django.utils.safestring import mark_safe
 from decimal import Decimal
-from bs4 import BeautifulSoup
 from django.core.exceptions import ValidationError
+from .exchange import get_usd_to_irr_rate
+from .ids import uuid7
+from .fields import PhoneNumberField
+from .normalization import address_fingerprint, normalize_phone, normalize_text
+from .slugs import save_with_slug
+from .images import get_derivative_url
 
 
 # Create your models here.
@@ -33,6 +38,11 @@ def validate_image(file):
         raise ValidationError('اندازه تصویر نباید بیشتر از ۲ مگابایت باشد.')
 
 
+def default_reorder_level():
+    # آستانه موجودی کم برای محصولات و دسته‌بندی‌هایی که آستانه ندارند
+    return getattr(settings, 'INVENTORY_ALERTS', {}).get('REORDER_LEVEL', 5)
+
+
 class UserManager(BaseUserManager):
     def create_user(self, email, phone_number, password=None):
         if not email:
@@ -68,7 +78,7 @@ class UserManager(BaseUserManager):
 
 
 class User(AbstractBaseUser, PermissionsMixin):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     full_name = models.CharField(max_length=255)
     username = models.CharField(max_length=255, null=True, blank=True)
     email = models.EmailField(unique=True)
@@ -76,7 +86,7 @@ class User(AbstractBaseUser, PermissionsMixin):
         regex=r'^09\d{9}$',
         message='شماره خودرا با فرمت صحیح 09 وارد کنید'
     )
-    phone_number = models.CharField(validators=[phone_regex], max_length=11, unique=True)
+    phone_number = PhoneNumberField(validators=[phone_regex], max_length=11, unique=True)
     is_active = models.BooleanField(default=True)
     is_admin = models.BooleanField(default=False)
     is_staff = models.BooleanField(default=False)
@@ -109,7 +119,7 @@ class User(AbstractBaseUser, PermissionsMixin):
 
 
 class Profile(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     full_name = models.CharField(max_length=255)
     email = models.EmailField(unique=True)
     phone_regex = RegexValidator(
@@ -117,7 +127,7 @@ class Profile(models.Model):
         message='شماره خودرا با فرمت صحیح 09 وارد کنید'
 
     )
-    phone_number = models.CharField(validators=[phone_regex], max_length=11, unique=True)
+    phone_number = PhoneNumberField(validators=[phone_regex], max_length=11, unique=True)
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     purchases = models.JSONField(default=list, null=True, blank=True, verbose_name='purchases')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -135,9 +145,11 @@ class Profile(models.Model):
 
 
 class Categories(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True, allow_unicode=True, null=True, blank=True)
+    # آستانه موجودی کم برای محصولات این دسته که آستانه خودشان را ندارند
+    reorder_level = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -149,30 +161,48 @@ class Categories(models.Model):
         get_latest_by = 'created_at'
 
     def save(self, *args, **kwargs):
-        if self.slug is None:
-            self.slug = slugify(self.name, allow_unicode=True)
+        # نام و اسلاگ با جدول نرمال‌سازی فارسی یکسان می‌شوند
+        self.name = normalize_text(self.name)
+        if not self.slug:
+            # اسلاگ یکتا با یک کوئری رزرو می‌شود (نام‌های تکراری پسوند -2، -3، ... می‌گیرند)
+            return save_with_slug(self, super(Categories, self).save, self.name, *args, **kwargs)
+        self.slug = slugify(normalize_text(self.slug), allow_unicode=True)
         super(Categories, self).save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
 
+class ProductsQuerySet(models.QuerySet):
+    def low_stock(self):
+        """
+        محصولات با موجودی کمتر یا مساوی آستانه؛ شرط همان شرط ایندکس جزئی products_low_stock_idx است
+        و هزینه آن به تعداد محصولات کم موجودی بستگی دارد نه به اندازه جدول.
+        """
+        return self.filter(stock__lte=F('low_stock_threshold'))
+
+
 class Products(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True, allow_unicode=True, null=True, blank=True)
     description = RichTextField()
     price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
-    ir_price = models.DecimalField(max_digits=10, decimal_places=0, null=True, blank=True)
+    # قیمت ریالی = قیمت دلاری × نرخ؛ با نرخ‌های فعلی از ۱۰ رقم بیشتر می‌شود
+    ir_price = models.DecimalField(max_digits=18, decimal_places=0, null=True, blank=True)
     stock = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     is_sale = models.BooleanField(default=False)
     new_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
-    ir_new_price = models.DecimalField(max_digits=10, decimal_places=0, null=True, blank=True)
+    ir_new_price = models.DecimalField(max_digits=18, decimal_places=0, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_suggestion = models.BooleanField(default=False)
     category = models.ForeignKey(Categories, on_delete=models.CASCADE)
+    reorder_level = models.PositiveIntegerField(null=True, blank=True)  # در صورت خالی بودن، آستانه دسته‌بندی
+    # آستانه نهایی (محصول، دسته‌بندی یا پیش‌فرض) که برای ایندکس جزئی موجودی کم در همین جدول نگه داشته می‌شود
+    low_stock_threshold = models.PositiveIntegerField(default=default_reorder_level, editable=False)
+    objects = ProductsQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Product'
@@ -180,11 +210,38 @@ class Products(models.Model):
         db_table = 'products'
         ordering = ['-created_at']
         get_latest_by = 'created_at'
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='products_created_id_idx'),
+            models.Index(fields=['is_active', 'category', '-created_at'], name='products_active_cat_idx'),
+            models.Index(fields=['stock'], condition=models.Q(stock__lte=F('low_stock_threshold')), name='products_low_stock_idx'),
+        ]
+
+    def get_reorder_level(self):
+        if self.reorder_level is not None:
+            return self.reorder_level
+        if self.category.reorder_level is not None:
+            return self.category.reorder_level
+        return default_reorder_level()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # دسته‌بندی خوانده شده از دیتابیس تا فیدهای دسته قبلی بعد از تغییر دسته بروز شوند (core.feeds)
+        instance._loaded_category_id = instance.__dict__.get('category_id')
+        return instance
 
     def save(self, *args, **kwargs):
-        if self.slug is None:
-            self.slug = slugify(self.name, allow_unicode=True)
-        super(Products, self).save(*args, **kwargs)
+        # نام و اسلاگ با جدول نرمال‌سازی فارسی یکسان می‌شوند
+        self.name = normalize_text(self.name)
+        self.low_stock_threshold = self.get_reorder_level()
+        if not self.slug:
+            # اسلاگ یکتا با یک کوئری رزرو می‌شود (نام‌های تکراری پسوند -2، -3، ... می‌گیرند)
+            result = save_with_slug(self, super(Products, self).save, self.name, *args, **kwargs)
+        else:
+            self.slug = slugify(normalize_text(self.slug), allow_unicode=True)
+            result = super(Products, self).save(*args, **kwargs)
+        self._loaded_category_id = self.category_id
+        return result
 
     def get_upload_path(instance, filename):
         name = instance.name
@@ -195,39 +252,26 @@ class Products(models.Model):
         )
 
     image = models.ImageField(upload_to=get_upload_path, null=True, blank=True)
+    # مسیر نسخه‌های کوچک شده تصویر (core.images) که پس از ذخیره ساخته می‌شوند
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
+
+    def get_image_url(self, size='medium'):
+        return get_derivative_url(self.image, self.image_derivatives, size)
 
     def get_usd_to_irr_rate(self):
-        url = 'https://www.tgju.org/profile/price_dollar_rl'
-
-        try:
-            # ارسال درخواست به سایت
-            response = requests.get(url)
-
-            if response.status_code == 200:
-                # استفاده از BeautifulSoup برای تجزیه HTML
-                soup = BeautifulSoup(response.text, 'html.parser')
-
-                # پیدا کردن تگ <td> که قیمت دلار را در خود دارد
-                rate_tag = soup.find('td', class_='text-left')
-
-                # بررسی اینکه آیا نرخ پیدا شده است
-                if rate_tag:
-                    usd_to_irr = rate_tag.text.strip().replace(',', '')  # حذف کاما از عدد
-                    return int(usd_to_irr) * 10  # تبدیل به عدد صحیح (ریال)
-                else:
-                    return "Rate not found"
-            else:
-                return f"Failed to fetch the page. Status code: {response.status_code}"
-        except Exception as e:
-            return f"An error occurred: {e}"
+        # نرخ از کش مشترک خوانده می‌شود و برای هر ردیف درخواست جدیدی ارسال نمی‌شود
+        rate = get_usd_to_irr_rate()
+        if rate is None:
+            return "Rate not found"
+        return rate
 
     def get_thumbnail(self):
         """
         نمایش Thumbnail در پنل ادمین.
         """
         if self.image:
-            # تولید کد HTML برای نمایش تصویر
-            return mark_safe(f'<img src="{self.image.url}" width="100" height="100" style="object-fit: cover;" />')
+            # نسخه thumbnail نمایش داده می‌شود تا صفحه ادمین تصاویر اصلی را دانلود نکند
+            return mark_safe(f'<img src="{self.get_image_url("thumbnail")}" width="100" height="100" style="object-fit: cover;" />')
         return "No Image"
 
     get_thumbnail.short_description = 'Thumbnail'
@@ -236,8 +280,93 @@ class Products(models.Model):
         return self.name
 
 
+class ProductSearchTerm(models.Model):
+    # ایندکس معکوس جستجو: هر کلمه نرمال شده نام/توضیحات محصول با وزن آن
+    term = models.CharField(max_length=64)
+    product = models.ForeignKey(Products, on_delete=models.CASCADE, related_name='search_terms')
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        verbose_name = 'Product Search Term'
+        verbose_name_plural = 'Product Search Terms'
+        db_table = 'product_search_term'
+        indexes = [
+            models.Index(fields=['term', 'product'], name='search_term_product_idx'),
+        ]
+
+    def __str__(self):
+        return self.term
+
+
+class ProductFeed(models.Model):
+    # لیست مرتب اعضای هر فید (کل فروشگاه یا یک دسته‌بندی) به شکل [زمان ساخت، شناسه] که با تغییر محصولات بروز می‌شود (core.feeds)
+    FEED_CHOICES = (
+        ('suggested', 'Suggested'),
+        ('sale', 'Sale'),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    name = models.CharField(max_length=20, choices=FEED_CHOICES)
+    category = models.ForeignKey(Categories, on_delete=models.CASCADE, related_name='feeds', null=True, blank=True)
+    product_ids = models.JSONField(default=list, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Product Feed'
+        verbose_name_plural = 'Product Feeds'
+        db_table = 'product_feed'
+        ordering = ['name']
+        constraints = [
+            models.UniqueConstraint(fields=['name', 'category'], name='unique_product_feed_category'),
+            models.UniqueConstraint(fields=['name'], condition=models.Q(category__isnull=True), name='unique_product_feed_all'),
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.category or "all"})'
+
+
+class ExchangeRate(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    rate = models.PositiveBigIntegerField()  # نرخ دلار به ریال
+    source = models.CharField(max_length=255, default='tgju')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Exchange Rate'
+        verbose_name_plural = 'Exchange Rates'
+        db_table = 'exchange_rate'
+        ordering = ['-created_at']
+        get_latest_by = 'created_at'
+
+    def __str__(self):
+        return f'{self.rate}'
+
+
+class MediaBlob(models.Model):
+    # هر فایل یکتا (بر اساس هش محتوا) یک بار ذخیره می‌شود؛ ref_count تعداد ارجاع‌های مدل‌ها به آن است
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Media Blob'
+        verbose_name_plural = 'Media Blobs'
+        db_table = 'media_blob'
+        ordering = ['-created_at']
+        get_latest_by = 'created_at'
+        indexes = [
+            models.Index(fields=['ref_count', 'updated_at'], name='media_blob_orphan_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
 class ProductsImage(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     product = models.ForeignKey(Products, on_delete=models.CASCADE, related_name='images')
 
     def get_upload_path(instance, filename):
@@ -249,25 +378,56 @@ class ProductsImage(models.Model):
         )
 
     image = models.ImageField(upload_to=get_upload_path, null=True, blank=True)
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
+
+    def get_image_url(self, size='medium'):
+        return get_derivative_url(self.image, self.image_derivatives, size)
+
+    def get_thumbnail(self):
+        if self.image:
+            return mark_safe(f'<img src="{self.get_image_url("thumbnail")}" width="100" height="100" style="object-fit: cover;" />')
+        return "No Image"
+
+    get_thumbnail.short_description = 'Thumbnail'
 
     def __str__(self):
         return self.product.name
 
 
+class CustomerManager(models.Manager):
+    def upsert(self, full_name, phone_number, city, address, postal_code):
+        """
+        پیدا کردن مشتری با شماره نرمال شده و اثر انگشت آدرس یا ایجاد آن.
+        """
+        customer, created = self.update_or_create(
+            phone_number=normalize_phone(phone_number),
+            address_fingerprint=address_fingerprint(city, address, postal_code),
+            defaults={
+                'full_name': full_name,
+                'city': city,
+                'address': address,
+                'postal_code': postal_code,
+            },
+        )
+        return customer
+
+
 class Customer(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     full_name = models.CharField(max_length=255)
     regex_phone = RegexValidator(
         regex=r'^09\d{9}$',
         message='شماره شما باید با فرمت 09 وارد شود'
     )
 
-    phone_number = models.CharField(validators=[regex_phone], max_length=11)
+    phone_number = PhoneNumberField(validators=[regex_phone], max_length=11)
     city = models.CharField(max_length=255)
     address = models.CharField(max_length=2500)
     postal_code = models.CharField(max_length=20)
+    address_fingerprint = models.CharField(max_length=40, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    objects = CustomerManager()
 
     class Meta:
         verbose_name = 'Customer'
@@ -275,13 +435,23 @@ class Customer(models.Model):
         db_table = 'customer'
         ordering = ['-created_at']
         get_latest_by = 'created_at'
+        indexes = [
+            models.Index(fields=['-created_at'], name='customer_created_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['phone_number', 'address_fingerprint'], name='unique_customer_phone_address'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.address_fingerprint = address_fingerprint(self.city, self.address, self.postal_code)
+        super(Customer, self).save(*args, **kwargs)
 
     def __str__(self):
         return self.full_name
 
 
 class Vendors(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True, null=True, blank=True, allow_unicode=True)
@@ -293,7 +463,7 @@ class Vendors(models.Model):
         message='شماره شما باید با فرمت 09 وارد شود'
     )
 
-    phone_number = models.CharField(validators=[phone_regex], max_length=11, unique=True)
+    phone_number = PhoneNumberField(validators=[phone_regex], max_length=11, unique=True)
 
     code = models.CharField(max_length=20, unique=True, editable=False, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -308,28 +478,80 @@ class Vendors(models.Model):
         get_latest_by = 'created_at'
 
     def save(self, *args, **kwargs):
+        self.first_name = normalize_text(self.first_name)
+        self.last_name = normalize_text(self.last_name)
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # ستون profit فقط توسط دفتر سود (core.ledger) بروزرسانی می‌شود
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'profit'
+            ]
         if not self.slug:
-            self.slug = slugify(f'{self.first_name} {self.last_name}', allow_unicode=True)
+            return save_with_slug(self, super(Vendors, self).save, f'{self.first_name} {self.last_name}', *args, **kwargs)
         super(Vendors, self).save(*args, **kwargs)
 
     def get_total_profit(self):
-        # محاسبه مجموع سود از همه سفارشات مرتبط
-        orders = self.orders.all()  # دسترسی به سفارشات مرتبط با فروشنده
-        total_profit = round(sum(
-            order.calculate_total_price() * Decimal(0.1) for order in orders if order.status == 'Delivered'))
-        return total_profit
+        # مانده سود فروشنده که با ثبت هر سند در دفتر سود بروز می‌شود
+        return self.profit
 
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
 
+class OrdersQuerySet(models.QuerySet):
+    item_total = ExpressionWrapper(
+        F('order_items__quantity') * F('order_items__price'),
+        output_field=models.DecimalField(max_digits=20, decimal_places=0),
+    )
+
+    def with_totals(self):
+        """
+        افزودن قیمت کل و تعداد اقلام هر سفارش از روی OrderItem ها (total_amount و units).
+        برای بررسی صحت ستون‌های total_price و item_count استفاده می‌شود.
+        """
+        return self.annotate(
+            total_amount=Coalesce(Sum(self.item_total), Value(Decimal(0))),
+            units=Coalesce(Sum('order_items__quantity'), Value(0)),
+        )
+
+    def with_drift(self):
+        """
+        سفارش‌هایی که ستون‌های ذخیره شده آن‌ها با OrderItem ها همخوانی ندارد.
+        """
+        return self.with_totals().exclude(total_price=F('total_amount'), item_count=F('units'))
+
+    def total_amount(self):
+        """
+        مجموع قیمت کل سفارش‌های این کوئری با یک کوئری (از ستون total_price).
+        """
+        return self.aggregate(total=Coalesce(Sum('total_price'), Value(Decimal(0))))['total']
+
+    def refresh_totals(self):
+        """
+        محاسبه مجدد total_price و item_count با یک UPDATE.
+        """
+        items = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order')
+        total = items.annotate(total=Sum(F('quantity') * F('price'))).values('total')
+        count = items.annotate(count=Sum('quantity')).values('count')
+        return self.update(
+            total_price=Coalesce(Subquery(total, output_field=models.DecimalField()), Value(Decimal(0))),
+            item_count=Coalesce(Subquery(count, output_field=models.PositiveIntegerField()), Value(0)),
+        )
+
+
 class Orders(models.Model):
     STATUS_CHOICES = (
         ('Pending', 'Pending'),
         ('Delivered', 'Delivered'),
         ('Canceled', 'Canceled'),
     )
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # تغییر وضعیت‌های مجاز؛ سفارش لغو شده قابل تغییر نیست
+    STATUS_TRANSITIONS = {
+        'Pending': ('Delivered', 'Canceled'),
+        'Delivered': ('Canceled',),
+        'Canceled': (),
+    }
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     full_name = models.CharField(max_length=255)
     regex_phone = RegexValidator(
         regex=r'^09\d{9}$',
@@ -338,7 +560,7 @@ class Orders(models.Model):
 
     customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='orders', null=True, blank=True)
 
-    phone_number = models.CharField(validators=[regex_phone], max_length=11)
+    phone_number = PhoneNumberField(validators=[regex_phone], max_length=11)
     city = models.CharField(max_length=255)
     address = models.CharField(max_length=1500)
     postal_code = models.CharField(max_length=20)
@@ -349,6 +571,10 @@ class Orders(models.Model):
     products = models.ManyToManyField(Products, through='OrderItem')
     date_shipped = models.DateTimeField(null=True, blank=True)
     vendor = models.ForeignKey(Vendors, on_delete=models.SET_NULL, related_name='orders', null=True, blank=True)
+    # مقادیر زیر توسط سیگنال‌های OrderItem بروز نگه داشته می‌شوند
+    total_price = models.DecimalField(max_digits=20, decimal_places=0, default=0, editable=False)
+    item_count = models.PositiveIntegerField(default=0, editable=False)  # مجموع تعداد اقلام
+    objects = OrdersQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Order'
@@ -356,6 +582,11 @@ class Orders(models.Model):
         db_table = 'orders'
         ordering = ['-created_at']
         get_latest_by = 'created_at'
+        indexes = [
+            models.Index(fields=['-created_at'], name='orders_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='orders_status_created_idx'),
+            models.Index(fields=['vendor', 'status'], name='orders_vendor_status_idx'),
+        ]
 
     # def save(self, *args, **kwargs):
     #     if self.status == 'Delivered':
@@ -363,19 +594,65 @@ class Orders(models.Model):
     #
     #     super(Orders, self).save(*args, **kwargs)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # نگهداری وضعیت خوانده شده از دیتابیس برای تشخیص تغییر وضعیت
+        instance._loaded_status = instance.__dict__.get('status')
+        return instance
+
+    def get_loaded_status(self):
+        loaded_status = getattr(self, '_loaded_status', None)
+        if loaded_status is None:
+            loaded_status = Orders.objects.filter(pk=self.pk).values_list('status', flat=True).first()
+        return loaded_status
+
+    def clean(self):
+        if not self._state.adding:
+            previous = self.get_loaded_status()
+            if self.status != previous and self.status not in self.STATUS_TRANSITIONS.get(previous, ()):
+                raise ValidationError({'status': f'تغییر وضعیت از {previous} به {self.status} مجاز نیست.'})
+
+    def apply_status_transition(self):
+        """
+        انجام تغییر وضعیت با UPDATE شرطی روی وضعیت قبلی.
+        فقط یک ذخیره می‌تواند یک تغییر وضعیت را انجام دهد و ذخیره‌های تکراری تغییری ایجاد نمی‌کنند.
+        """
+        previous = self.get_loaded_status()
+        if previous is None or previous == self.status:
+            return
+        if self.status not in self.STATUS_TRANSITIONS.get(previous, ()):
+            raise ValueError(f'تغییر وضعیت از {previous} به {self.status} مجاز نیست.')
+        if not Orders.objects.filter(pk=self.pk, status=previous).update(status=self.status):
+            raise ValueError('وضعیت سفارش همزمان تغییر کرده است.')
+        self._status_transition = (previous, self.status)
+
+    @transaction.atomic
     def save(self, *args, **kwargs):
-        if not self.pk:
-            super().save(*args, **kwargs)
-            if self.vendor:
-                # افزودن سود به فروشنده
-                self.vendor.profit += self.calculate_total_price() * Decimal(0.1)  # 10% سود
-                self.vendor.save()
-            if self.identification_code and not self.vendor:
-                try:
-                    self.vendor = Vendors.objects.get(code=self.identification_code)
-                except Vendors.DoesNotExist:
-                    raise ValueError("فروشنده‌ای با این کد وجود ندارد.")
+        self._status_transition = None
+        if not self._state.adding:
+            self.apply_status_transition()
+            if kwargs.get('update_fields') is None:
+                # ستون‌های total_price و item_count فقط توسط refresh_totals نوشته می‌شوند
+                kwargs['update_fields'] = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key and field.name not in ('total_price', 'item_count')
+                ]
+        elif self.identification_code and not self.vendor_id:
+            # پیدا کردن فروشنده قبل از ذخیره تا سفارش فقط یک بار نوشته شود
+            try:
+                self.vendor = Vendors.objects.get(code=self.identification_code)
+            except Vendors.DoesNotExist:
+                raise ValueError("فروشنده‌ای با این کد وجود ندارد.")
+        # سود فروشنده توسط دفتر سود (core.ledger) ثبت می‌شود
         super().save(*args, **kwargs)
+        self._loaded_status = self.status
+        if self._status_transition:
+            OrderStatusHistory.objects.create(
+                order=self,
+                from_status=self._status_transition[0],
+                to_status=self._status_transition[1],
+            )
 
     # def get_usd_to_irr_rate(self):
     #     url = 'https://www.tgju.org/profile/price_dollar_rl'
@@ -416,8 +693,10 @@ class Orders(models.Model):
 
     # به دلل متغیر بودن قیمت ها از روش بالا صرف نظر شد
     def calculate_total_price(self):
-        total_price = sum(item.get_total_price() for item in self.order_items.all())
-        return total_price
+        return self.total_price
+
+    calculate_total_price.short_description = 'Total price'
+    calculate_total_price.admin_order_field = 'total_price'
 
     # def save(self, *args, **kwargs):
     #     # ابتدا شیء را ذخیره کنید
@@ -433,7 +712,7 @@ class OrderItem(models.Model):
     order = models.ForeignKey(Orders, on_delete=models.CASCADE, related_name='order_items')  # سفارش مرتبط
     product = models.ForeignKey('Products', on_delete=models.CASCADE, related_name='order_items')  # محصول مرتبط
     quantity = models.PositiveIntegerField(default=1)  # تعداد محصول
-    price = models.DecimalField(max_digits=10, decimal_places=0)
+    price = models.DecimalField(max_digits=18, decimal_places=0)  # قیمت ریالی محصول هنگام ثبت سفارش
 
     def __str__(self):
         return f"{self.quantity} x {self.product.name}"
@@ -441,17 +720,144 @@ class OrderItem(models.Model):
     def get_total_price(self):
         return self.quantity * self.price
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # محصول خوانده شده از دیتابیس تا بعد از تغییر محصول آیتم، فروش روزانه محصول قبلی هم اصلاح شود
+        instance._loaded_product_id = instance.__dict__.get('product_id')
+        return instance
+
+    @transaction.atomic
     def save(self, *args, **kwargs):
         if not self.pk:  # فقط برای آیتم‌های جدید
-            if self.product.stock < self.quantity:
+            # کم کردن موجودی با UPDATE شرطی تا در خریدهای همزمان موجودی منفی نشود
+            from .inventory import reserve_stock
+            reservation, = reserve_stock([(self.product_id, self.quantity)])
+            if not reservation.reserved:
                 raise ValueError(f"Not enough stock for {self.product.name}")
-            self.product.stock -= self.quantity
-            if self.product.stock == 0:  # غیرفعال کردن محصول در صورت صفر شدن موجودی
-                self.product.is_active = False
-            self.product.save()
         super(OrderItem, self).save(*args, **kwargs)
 
 
+class OrderStatusHistory(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    order = models.ForeignKey(Orders, on_delete=models.CASCADE, related_name='status_history')
+    from_status = models.CharField(max_length=10, choices=Orders.STATUS_CHOICES)
+    to_status = models.CharField(max_length=10, choices=Orders.STATUS_CHOICES)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Order Status History'
+        verbose_name_plural = 'Order Status History'
+        db_table = 'order_status_history'
+        ordering = ['-created_at']
+        get_latest_by = 'created_at'
+
+    def __str__(self):
+        return f'{self.from_status} -> {self.to_status}'
+
+
+class VendorLedgerEntry(models.Model):
+    KIND_CHOICES = (
+        ('Credit', 'Credit'),
+        ('Reversal', 'Reversal'),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    vendor = models.ForeignKey(Vendors, on_delete=models.CASCADE, related_name='ledger_entries')
+    order = models.ForeignKey(Orders, on_delete=models.SET_NULL, related_name='ledger_entries', null=True, blank=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    amount = models.BigIntegerField()  # مثبت برای ثبت سود و منفی برای برگشت آن
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Vendor Ledger Entry'
+        verbose_name_plural = 'Vendor Ledger Entries'
+        db_table = 'vendor_ledger'
+        ordering = ['-created_at']
+        get_latest_by = 'created_at'
+
+    def __str__(self):
+        return f'{self.kind} {self.amount}'
+
+
+class DailySalesRollup(models.Model):
+    # جمع فروش سفارش‌های تحویل داده شده برای هر روز، دسته‌بندی، فروشنده و شهر (core.reports)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    date = models.DateField()  # تاریخ ثبت سفارش
+    category = models.ForeignKey(Categories, on_delete=models.CASCADE, related_name='sales_rollups')
+    vendor = models.ForeignKey(Vendors, on_delete=models.CASCADE, related_name='sales_rollups', null=True, blank=True)
+    city = models.CharField(max_length=255)
+    order_count = models.PositiveIntegerField(default=0)  # تعداد سفارش‌هایی که از این دسته‌بندی کالا دارند
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=20, decimal_places=0, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Daily Sales Rollup'
+        verbose_name_plural = 'Daily Sales Rollups'
+        db_table = 'daily_sales_rollup'
+        ordering = ['-date']
+        get_latest_by = 'date'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'category', 'vendor', 'city'], name='unique_sales_rollup'),
+            models.UniqueConstraint(
+                fields=['date', 'category', 'city'], condition=models.Q(vendor__isnull=True),
+                name='unique_sales_rollup_no_vendor',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'date'], name='sales_rollup_category_idx'),
+            models.Index(fields=['vendor', 'date'], name='sales_rollup_vendor_idx'),
+            models.Index(fields=['city', 'date'], name='sales_rollup_city_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.date} {self.city} {self.revenue}'
+
+
+class DailySalesTotal(models.Model):
+    # جمع فروش هر روز؛ تعداد سفارش‌ها دقیق است (هر سفارش یک بار شمرده می‌شود)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    date = models.DateField(unique=True)
+    order_count = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=20, decimal_places=0, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Daily Sales Total'
+        verbose_name_plural = 'Daily Sales Totals'
+        db_table = 'daily_sales_total'
+        ordering = ['-date']
+        get_latest_by = 'date'
+
+    def __str__(self):
+        return f'{self.date} {self.revenue}'
+
+
+class DailyProductSales(models.Model):
+    # فروش هر محصول در هر روز برای پرفروش‌ترین محصولات داشبورد
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    date = models.DateField()
+    product = models.ForeignKey(Products, on_delete=models.CASCADE, related_name='daily_sales')
+    order_count = models.PositiveIntegerField(default=0)
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=20, decimal_places=0, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Daily Product Sales'
+        verbose_name_plural = 'Daily Product Sales'
+        db_table = 'daily_product_sales'
+        ordering = ['-date']
+        get_latest_by = 'date'
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'product'], name='unique_daily_product_sales'),
+        ]
+
+    def __str__(self):
+        return f'{self.date} {self.product_id} {self.revenue}'
+
+
 class VendorProfile(models.Model):
     first_name = models.CharField(max_length=255)
     last_name = models.CharField(max_length=255)
@@ -462,8 +868,8 @@ class VendorProfile(models.Model):
         regex=r'^09\d{9}$',
         message='شماره شما باید با فرمت 09 وارد شود'
     )
-    phone_number = models.CharField(validators=[phone_regex], max_length=11, unique=True)
-    profit = models.DecimalField(max_digits=10, decimal_places=0, default=0)
+    phone_number = PhoneNumberField(validators=[phone_regex], max_length=11, unique=True)
+    profit = models.DecimalField(max_digits=20, decimal_places=0, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     vendor = models.ForeignKey(Vendors, on_delete=models.SET_NULL, related_name='profiles', null=True, blank=True)
@@ -477,11 +883,9 @@ class VendorProfile(models.Model):
 
     def get_total_profit(self):
         """
-        محاسبه مجموع سود از سفارش‌هایی که توسط فروشنده انجام شده است.
+        مجموع سود از سفارش‌هایی که توسط فروشنده انجام شده است (از دفتر سود).
         """
-        orders = self.vendors.orders.all()  # فرض اینکه مدل Vendor متصل به Orders است
-        total_profit = sum(order.calculate_total_price() for order in orders if order.status == 'Delivered')
-        return total_profit
+        return self.profit
 
     def get_upload_path(instance, filename):
         full_name = f'{instance.first_name} {instance.last_name}'
@@ -489,6 +893,17 @@ class VendorProfile(models.Model):
 
     profile_image = models.ImageField(upload_to=get_upload_path, null=True, blank=True, default='profile.jpg',
                                       validators=[validate_image])
+    profile_image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
+
+    def get_profile_image_url(self, size='medium'):
+        return get_derivative_url(self.profile_image, self.profile_image_derivatives, size)
+
+    def get_thumbnail(self):
+        if self.profile_image:
+            return mark_safe(f'<img src="{self.get_profile_image_url("thumbnail")}" width="100" height="100" style="object-fit: cover;" />')
+        return "No Image"
+
+    get_thumbnail.short_description = 'Thumbnail'
 
     def get_profile_info(self):
         """
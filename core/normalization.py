@@ -0,0 +1,70 @@
+import hashlib
+import re
+
+# جدول یکتای نرمال‌سازی (یک بار ساخته می‌شود و با str.translate اعمال می‌شود):
+# ارقام فارسی و عربی به انگلیسی، حروف عربی به فارسی، حذف اعراب، کشیده و نویسه‌های جهت‌دهی،
+# و تبدیل انواع فاصله به فاصله معمولی
+PERSIAN = str.maketrans({
+    **{digit: str(i % 10) for i, digit in enumerate('۰۱۲۳۴۵۶۷۸۹٠١٢٣٤٥٦٧٨٩')},
+    'ي': 'ی',
+    'ى': 'ی',
+    'ئ': 'ی',
+    'ك': 'ک',
+    'ة': 'ه',
+    'ۀ': 'ه',
+    'أ': 'ا',
+    'إ': 'ا',
+    'ٱ': 'ا',
+    'ؤ': 'و',
+    **{chr(code): None for code in range(0x064B, 0x0653)},  # اعراب
+    'ـ': None,  # کشیده
+    '\u200d': None,  # ZWJ
+    '\u200e': None,  # LRM
+    '\u200f': None,  # RLM
+    '\ufeff': None,  # BOM
+    **{space: ' ' for space in '\t\n\r\u00a0\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a\u202f\u205f\u3000'},
+})
+
+ZWNJ = '\u200c'
+
+NON_DIGIT_RE = re.compile(r'\D')
+SPACES_RE = re.compile(r' {2,}')
+ZWNJ_RE = re.compile(r' ?\u200c+ ?')
+
+
+def normalize_persian(value):
+    return value.translate(PERSIAN)
+
+
+def normalize_text(value):
+    """
+    نرمال کردن متن فارسی برای ذخیره: جدول PERSIAN، حذف فاصله‌های تکراری و نیم‌فاصله‌های اضافه.
+    """
+    if not value:
+        return value
+    value = ZWNJ_RE.sub(ZWNJ, SPACES_RE.sub(' ', normalize_persian(value)))
+    return value.strip(' ' + ZWNJ)
+
+
+def normalize_phone(value):
+    """
+    تبدیل شماره موبایل به قالب 09xxxxxxxxx (ارقام انگلیسی، بدون فاصله و پیش‌شماره کشور).
+    """
+    if not value:
+        return value
+    digits = NON_DIGIT_RE.sub('', normalize_persian(value))
+    if digits.startswith('0098'):
+        digits = '0' + digits[4:]
+    elif digits.startswith('98') and len(digits) == 12:
+        digits = '0' + digits[2:]
+    elif digits.startswith('9') and len(digits) == 10:
+        digits = '0' + digits
+    return digits
+
+
+def address_fingerprint(city, address, postal_code):
+    """
+    اثر انگشت آدرس برای تشخیص مشتری تکراری (شهر، آدرس و کد پستی نرمال شده).
+    """
+    value = '|'.join((normalize_text(part) or '').lower() for part in (city, address, postal_code))
+    return hashlib.sha1(value.encode('utf-8')).hexdigest()
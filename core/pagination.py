@@ -0,0 +1,70 @@
+import base64
+import json
+import uuid
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(obj, *values):
+    # values مقادیر مرتب‌سازی قبل از (created_at, id) هستند، مثلاً امتیاز جستجو
+    value = json.dumps([*values, obj.created_at.isoformat(), str(obj.pk)])
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, values=0):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        *extra, created_at, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = parse_datetime(created_at)
+        if created_at is None or len(extra) != values:
+            raise ValueError(cursor)
+        return (*extra, created_at, uuid.UUID(pk))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f'Invalid cursor: {cursor}') from e
+
+
+def paginate(queryset, cursor=None, limit=20):
+    """
+    صفحه‌بندی keyset روی (created_at, id) به ترتیب نزولی به جای OFFSET.
+    هزینه هر صفحه مستقل از عمق صفحه است. خروجی: (لیست رکوردها، cursor صفحه بعد یا None).
+    """
+    queryset = queryset.order_by('-created_at', '-pk')
+    if cursor:
+        created_at, pk = decode_cursor(cursor)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+
+    objects = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(objects) > limit:
+        objects = objects[:limit]
+        next_cursor = encode_cursor(objects[-1])
+    return objects, next_cursor
+
+
+def paginate_search(queryset, cursor=None, limit=20):
+    """
+    صفحه‌بندی keyset نتایج جستجو روی (search_rank, created_at, id) به ترتیب نزولی؛
+    queryset باید search_rank داشته باشد (search.search).
+    """
+    queryset = queryset.order_by('-search_rank', '-created_at', '-pk')
+    if cursor:
+        rank, created_at, pk = decode_cursor(cursor, values=1)
+        if not isinstance(rank, int):
+            raise InvalidCursor(f'Invalid cursor: {cursor}')
+        queryset = queryset.filter(
+            Q(search_rank__lt=rank)
+            | Q(search_rank=rank, created_at__lt=created_at)
+            | Q(search_rank=rank, created_at=created_at, pk__lt=pk)
+        )
+
+    objects = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(objects) > limit:
+        objects = objects[:limit]
+        next_cursor = encode_cursor(objects[-1], objects[-1].search_rank)
+    return objects, next_cursor
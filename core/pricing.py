@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from .catalog_cache import invalidate_catalog
+from .models import ExchangeRate, Products
+
+
+def ir_price_expression(field, rate):
+    return Round(ExpressionWrapper(F(field) * rate, output_field=DecimalField(max_digits=20, decimal_places=2)))
+
+
+def reprice_products(rate):
+    """
+    محاسبه مجدد ir_price و ir_new_price همه محصولات با یک UPDATE برای هر ستون.
+    از save() و سیگنال‌های محصول استفاده نمی‌شود.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        updated = Products.objects.filter(price__isnull=False).update(
+            ir_price=ir_price_expression('price', rate),
+            updated_at=now,
+        )
+        Products.objects.filter(new_price__isnull=False).update(
+            ir_new_price=ir_price_expression('new_price', rate),
+            updated_at=now,
+        )
+        invalidate_catalog()
+    return updated
+
+
+def record_rate(rate, source='tgju', force=False):
+    """
+    ذخیره نرخ جدید در تاریخچه و قیمت‌گذاری مجدد محصولات.
+    اگر نرخ نسبت به آخرین نرخ ذخیره شده تغییری نکرده باشد کاری انجام نمی‌شود.
+    """
+    with transaction.atomic():
+        latest = ExchangeRate.objects.order_by('-created_at').first()
+        if latest is not None and latest.rate == rate and not force:
+            return None
+        exchange_rate = ExchangeRate.objects.create(rate=rate, source=source)
+        reprice_products(rate)
+    return exchange_rate
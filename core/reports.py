@@ -0,0 +1,249 @@
+import datetime
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Min, Max, Q, Sum
+from django.db.models.functions import TruncDate, TruncMonth
+from django.utils import timezone
+
+from .models import DailyProductSales, DailySalesRollup, DailySalesTotal, OrderItem, Orders
+from .serializers import serialize_decimal
+
+# فقط سفارش‌های تحویل داده شده فروش حساب می‌شوند (مانند دفتر سود فروشنده)
+SALES_STATUS = 'Delivered'
+
+# ستون‌های گروه‌بندی گزارش و ستون نام نمایشی هر گروه
+GROUPS = {
+    'date': ('date', None),
+    'month': ('month', None),
+    'category': ('category', 'category__name'),
+    'vendor': ('vendor', 'vendor__code'),
+    'city': ('city', None),
+}
+FILTERS = {'category': 'category__slug', 'vendor': 'vendor__code', 'city': 'city'}
+
+
+def created_between(start, end=None, field='order__created_at'):
+    # سفارش‌های ثبت شده در روزهای [start, end) به وقت محلی
+    end = end or start + datetime.timedelta(days=1)
+    to_datetime = lambda day: timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    return Q(**{f'{field}__gte': to_datetime(start), f'{field}__lt': to_datetime(end)})
+
+
+class DateRange:
+    # بازه [start, end) روزها برای بررسی عضویت با in
+    def __init__(self, start, end):
+        self.start, self.end = start, end
+
+    def __contains__(self, date):
+        return self.start <= date < self.end
+
+    def days(self):
+        return [self.start + datetime.timedelta(days=i) for i in range((self.end - self.start).days)]
+
+
+def get_order_cell(order):
+    # هر سفارش فقط روی ردیف‌های یک روز، فروشنده و شهر اثر دارد
+    return timezone.localdate(order.created_at), order.vendor_id, order.city
+
+
+def aggregate_items(items, model, *fields, **columns):
+    """
+    جمع اقلام فروخته شده با یک GROUP BY روی روز و ستون‌های داده شده
+    (fields ستون‌های خود OrderItem مانند product که با attname مدل مقصد ساخته می‌شوند).
+    """
+    return [
+        model(**{model._meta.get_field(name).attname if name in fields else name: value for name, value in row.items()})
+        for row in items.filter(order__status=SALES_STATUS).order_by().values(
+            *fields, date=TruncDate('order__created_at'), **columns,
+        ).annotate(
+            # revenue قبل از quantity تا F('quantity') به ستون اقلام اشاره کند نه به جمع آن
+            revenue=Sum(ExpressionWrapper(F('quantity') * F('price'), output_field=DecimalField(max_digits=20, decimal_places=0))),
+            order_count=Count('order', distinct=True),
+            quantity=Sum('quantity'),
+        )
+    ]
+
+
+def aggregate_rollups(items):
+    return aggregate_items(
+        items, DailySalesRollup,
+        category_id=F('product__category_id'), vendor_id=F('order__vendor_id'), city=F('order__city'),
+    )
+
+
+def aggregate_days(items, dates):
+    # جمع روزانه و فروش روزانه هر محصول برای روزهای داده شده (dates یک بازه یا مجموعه روزها)
+    return (
+        [total for total in aggregate_items(items, DailySalesTotal) if total.date in dates],
+        [sales for sales in aggregate_items(items, DailyProductSales, 'product') if sales.date in dates],
+    )
+
+
+def sum_days(dates):
+    """
+    جمع روزانه از روی ردیف‌های DailyProductSales همان روزها و تعداد سفارش‌های تحویل شده هر روز
+    (با ایندکس orders_status_created_idx)؛ بدون خواندن اقلام سفارش‌های روز.
+    """
+    day_filter = Q()
+    for date in dates:
+        day_filter |= created_between(date, field='created_at')
+    totals = {
+        row['date']: DailySalesTotal(date=row['date'], quantity=row['total_quantity'], revenue=row['total_revenue'])
+        for row in DailyProductSales.objects.filter(date__in=dates).order_by().values('date').annotate(
+            total_quantity=Sum('quantity'), total_revenue=Sum('revenue'),
+        )
+    }
+    orders = (
+        Orders.objects.filter(day_filter, status=SALES_STATUS, item_count__gt=0).order_by()
+        .values(day=TruncDate('created_at')).annotate(count=Count('pk'))
+    )
+    for row in orders:
+        if row['day'] in totals:
+            totals[row['day']].order_count = row['count']
+    return list(totals.values())
+
+
+def lock_dates(dates):
+    """
+    قفل ردیف DailySalesTotal روزهای داده شده (ردیف روزهای بدون ردیف با مقدار صفر ساخته می‌شود).
+    هر محاسبه گزارش یک روز بعد از گرفتن این قفل و داخل همان تراکنش انجام می‌شود
+    تا نتیجه یک محاسبه قدیمی‌تر روی نتیجه جدیدتر نوشته نشود.
+    """
+    dates = sorted(dates)
+    DailySalesTotal.objects.bulk_create([DailySalesTotal(date=date) for date in dates], ignore_conflicts=True)
+    return list(DailySalesTotal.objects.select_for_update().filter(date__in=dates).order_by('date'))
+
+
+def save_totals(locked, totals):
+    # ردیف‌های قفل شده در جای خود بروز می‌شوند (حذف نمی‌شوند تا قفل روز از بین نرود)
+    totals = {total.date: total for total in totals}
+    now = timezone.now()
+    changed = []
+    for row in locked:
+        total = totals.get(row.date)
+        values = (total.order_count, total.quantity, total.revenue) if total else (0, 0, 0)
+        if (row.order_count, row.quantity, row.revenue) != values:
+            row.order_count, row.quantity, row.revenue = values
+            row.updated_at = now
+            changed.append(row)
+    DailySalesTotal.objects.bulk_update(changed, ['order_count', 'quantity', 'revenue', 'updated_at'])
+
+
+def replace_rows(*tables):
+    # جایگزینی ردیف‌های قبلی هر جدول (queryset) با ردیف‌های جدید؛ داخل تراکنش و بعد از lock_dates
+    for rows, existing in tables:
+        existing.delete()
+        existing.model.objects.bulk_create(rows)
+    return len(tables[0][0])
+
+
+def refresh_cells(cells, products=None):
+    """
+    محاسبه دوباره ردیف‌های چند (روز، فروشنده، شهر) از روی اقلام سفارش‌های همان ردیف‌ها؛
+    با products (محصولات سفارش‌های تغییر کرده) فقط ردیف‌های DailyProductSales همان محصولات در همان روزها
+    دوباره محاسبه می‌شوند و جمع روزها از روی آن‌ها بروز می‌شود (بدون محاسبه دوباره کل روز).
+    همه در یک تراکنش و بعد از قفل ردیف روزها.
+    """
+    cells = set(cells)
+    if not cells:
+        return 0
+    dates = {date for date, _, _ in cells}
+    item_filter = Q()
+    rollup_filter = Q()
+    for date, vendor_id, city in cells:
+        vendor = Q(vendor__isnull=True) if vendor_id is None else Q(vendor_id=vendor_id)
+        order_vendor = Q(order__vendor__isnull=True) if vendor_id is None else Q(order__vendor_id=vendor_id)
+        item_filter |= created_between(date) & Q(order__city=city) & order_vendor
+        rollup_filter |= Q(date=date, city=city) & vendor
+
+    with transaction.atomic():
+        locked = lock_dates(dates)
+        rollups = [
+            rollup for rollup in aggregate_rollups(OrderItem.objects.filter(item_filter))
+            if (rollup.date, rollup.vendor_id, rollup.city) in cells
+        ]
+        count = replace_rows((rollups, DailySalesRollup.objects.filter(rollup_filter)))
+        if products is None:
+            # اقلام فروخته شده تغییری نکرده‌اند (مثلاً حذف فروشنده)
+            return count
+
+        products = set(products)
+        day_filter = Q()
+        for date in dates:
+            day_filter |= created_between(date)
+        sales = [
+            sales for sales in aggregate_items(OrderItem.objects.filter(day_filter, product_id__in=products), DailyProductSales, 'product')
+            if sales.date in dates
+        ]
+        replace_rows((sales, DailyProductSales.objects.filter(date__in=dates, product_id__in=products)))
+        save_totals(locked, sum_days(dates))
+        return count
+
+
+def schedule_refresh(cells, products=None):
+    # محاسبه بعد از commit تا همه تغییرات تراکنش (وضعیت و اقلام) دیده شوند
+    cells = set(cells)
+    if cells:
+        products = None if products is None else set(products)
+        transaction.on_commit(lambda: refresh_cells(cells, products))
+
+
+def rebuild_rollups(start=None, end=None, days=31):
+    """
+    ساخت کامل جدول‌های گزارش از روی اقلام سفارش‌ها در بازه‌های چند روزه؛ هر بازه در یک تراکنش
+    (با قفل ردیف روزهای بازه) با یک SELECT گروه‌بندی شده، یک DELETE و یک INSERT دسته‌ای برای هر جدول جایگزین می‌شود.
+    """
+    if start is None or end is None:
+        bounds = OrderItem.objects.filter(order__status=SALES_STATUS).aggregate(
+            first=Min('order__created_at'), last=Max('order__created_at'),
+        )
+        if bounds['first'] is None:
+            return
+        start = start or timezone.localdate(bounds['first'])
+        end = end or timezone.localdate(bounds['last']) + datetime.timedelta(days=1)
+
+    while start < end:
+        chunk_end = min(start + datetime.timedelta(days=days), end)
+        items = OrderItem.objects.filter(created_between(start, chunk_end))
+        dates = DateRange(start, chunk_end)
+        with transaction.atomic():
+            locked = lock_dates(dates.days())
+            rollups = [rollup for rollup in aggregate_rollups(items) if rollup.date in dates]
+            totals, products = aggregate_days(items, dates)
+            save_totals(locked, totals)
+            count = replace_rows(
+                (rollups, DailySalesRollup.objects.filter(date__gte=start, date__lt=chunk_end)),
+                (products, DailyProductSales.objects.filter(date__gte=start, date__lt=chunk_end)),
+            )
+        yield start, chunk_end, count
+        start = chunk_end
+
+
+def get_sales_report(start, end, group_by='date', **filters):
+    """
+    گزارش فروش فقط از روی جدول DailySalesRollup (بدون خواندن سفارش‌ها).
+    order_count در گروه‌بندی غیر از دسته‌بندی، سفارش‌های چند دسته‌ای را بیش از یک بار می‌شمارد.
+    """
+    key, label = GROUPS[group_by]
+    queryset = DailySalesRollup.objects.filter(date__gte=start, date__lt=end)
+    for name, value in filters.items():
+        if value:
+            queryset = queryset.filter(**{FILTERS[name]: value})
+    if group_by == 'month':
+        queryset = queryset.annotate(month=TruncMonth('date'))
+    columns = [key] + ([label] if label else [])
+    rows = queryset.order_by().values(*columns).annotate(
+        order_count=Sum('order_count'),
+        quantity=Sum('quantity'),
+        revenue=Sum('revenue'),
+    ).order_by(key)
+    return [
+        {
+            'key': str(row[key]) if row[key] is not None else None,
+            'label': row[label] if label else None,
+            'order_count': row['order_count'],
+            'quantity': row['quantity'],
+            'revenue': serialize_decimal(row['revenue']),
+        }
+        for row in rows
+    ]
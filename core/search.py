@@ -0,0 +1,101 @@
+import html
+import re
+
+from django.db import transaction
+from django.db.models import Case, Count, OuterRef, Q, Subquery, Sum, Value, When
+from django.utils.html import strip_tags
+
+from .models import ProductSearchTerm, Products
+from .normalization import ZWNJ, normalize_persian
+
+TOKEN_RE = re.compile(r'\w+')
+MAX_TERM_LENGTH = 64
+NAME_WEIGHT = 5
+DESCRIPTION_WEIGHT = 1
+
+
+def tokenize(text):
+    """
+    تبدیل متن به کلمات نرمال شده برای جستجو.
+    حروف عربی به فارسی و ارقام به انگلیسی تبدیل می‌شوند و نیم‌فاصله حذف می‌شود
+    تا «می‌خواهم» و «میخواهم» یکسان باشند.
+    """
+    text = normalize_persian(text).replace(ZWNJ, '').lower()
+    return [token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(text) if len(token) > 1]
+
+
+def get_document_terms(product):
+    """
+    کلمات نام و توضیحات (بدون HTML) همراه با وزن آن‌ها.
+    """
+    terms = {}
+    for token in tokenize(product.name):
+        terms[token] = terms.get(token, 0) + NAME_WEIGHT
+    for token in tokenize(html.unescape(strip_tags(product.description or ''))):
+        terms[token] = terms.get(token, 0) + DESCRIPTION_WEIGHT
+    return terms
+
+
+def build_terms(product):
+    return [
+        ProductSearchTerm(product_id=product.pk, term=term, weight=min(weight, 32767))
+        for term, weight in get_document_terms(product).items()
+    ]
+
+
+def index_product(product):
+    with transaction.atomic():
+        ProductSearchTerm.objects.filter(product_id=product.pk).delete()
+        ProductSearchTerm.objects.bulk_create(build_terms(product))
+
+
+def index_products(products):
+    """
+    بازسازی ایندکس چند محصول با یک DELETE و یک bulk_create.
+    """
+    products = list(products)
+    terms = [term for product in products for term in build_terms(product)]
+    with transaction.atomic():
+        ProductSearchTerm.objects.filter(product_id__in=[product.pk for product in products]).delete()
+        ProductSearchTerm.objects.bulk_create(terms, batch_size=1000)
+
+
+def prefix_q(token):
+    # جستجوی پیشوندی به صورت بازه (term >= x AND term < x') تا از ایندکس استفاده شود
+    return Q(term__gte=token, term__lt=token[:-1] + chr(ord(token[-1]) + 1))
+
+
+def search(queryset, query):
+    """
+    فیلتر کردن محصولات بر اساس ایندکس جستجو و افزودن امتیاز (search_rank).
+    همه کلمات جستجو باید (به صورت پیشوندی) در محصول وجود داشته باشند.
+    """
+    tokens = list(dict.fromkeys(tokenize(query)))
+    if not tokens:
+        return queryset.none()
+
+    token_q = Q()
+    for token in tokens:
+        token_q |= prefix_q(token)
+    matched_token = Case(*[When(prefix_q(token), then=Value(i)) for i, token in enumerate(tokens)])
+
+    terms = ProductSearchTerm.objects.filter(token_q).order_by()
+    matches = (
+        terms.values('product')
+        .annotate(matched=Count(matched_token, distinct=True))
+        .filter(matched=len(tokens))
+        .values('product')
+    )
+    rank = (
+        terms.filter(product=OuterRef('pk'))
+        .values('product')
+        .annotate(score=Sum('weight'))
+        .values('score')
+    )
+    return queryset.filter(pk__in=matches).annotate(search_rank=Subquery(rank))
+
+
+def search_products(query, queryset=None):
+    if queryset is None:
+        queryset = Products.objects.all()
+    return search(queryset, query).order_by('-search_rank', '-created_at', '-pk')
@@ -0,0 +1,45 @@
+def serialize_decimal(value):
+    return None if value is None else str(value)
+
+
+def serialize_image(instance, size='medium'):
+    # API نسخه‌های کوچک شده را برمی‌گرداند؛ تصویر اصلی فقط به صورت original
+    if not instance.image:
+        return None
+    return {
+        'url': instance.get_image_url(size),
+        'thumbnail': instance.get_image_url('thumbnail'),
+        'original': instance.image.url,
+    }
+
+
+def serialize_category(category):
+    return {
+        'id': str(category.id),
+        'name': category.name,
+        'slug': category.slug,
+    }
+
+
+def serialize_product(product):
+    """
+    تبدیل محصول به dict برای API؛ دسته‌بندی و تصاویر باید با select_related/prefetch_related خوانده شده باشند.
+    """
+    return {
+        'id': str(product.id),
+        'name': product.name,
+        'slug': product.slug,
+        'description': product.description,
+        'price': serialize_decimal(product.price),
+        'ir_price': serialize_decimal(product.ir_price),
+        'new_price': serialize_decimal(product.new_price),
+        'ir_new_price': serialize_decimal(product.ir_new_price),
+        'stock': product.stock,
+        'is_active': product.is_active,
+        'is_sale': product.is_sale,
+        'is_suggestion': product.is_suggestion,
+        'image': serialize_image(product),
+        'images': [serialize_image(image) for image in product.images.all()],
+        'category': serialize_category(product.category),
+        'created_at': product.created_at.isoformat(),
+    }
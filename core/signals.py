@@ -1,13 +1,22 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete, pre_delete, pre_save
 from django.dispatch import receiver
-from .models import Orders, Customer, Products, VendorProfile, Vendors, User, Profile, OrderItem
+from django.utils import timezone
+from .models import Orders, Customer, Categories, Products, ProductsImage, VendorProfile, Vendors, User, Profile, OrderItem
+from .catalog_cache import invalidate_catalog, invalidate_products
+from . import feeds
+from .images import sync_derivatives
+from . import media
+from . import ledger
+from . import reports
+from .inventory import release_stock, sync_category_reorder_level
+from .search import index_product
 
 
 @receiver(post_save, sender=Orders)
 def create_customer_from_order(sender, instance, created, **kwargs):
-    if created:
-        # فقط زمانی که یک سفارش جدید ایجاد می‌شود
-        customer = Customer.objects.create(
+    if created and not instance.customer_id:
+        # فقط زمانی که یک سفارش جدید بدون مشتری ایجاد می‌شود
+        customer = Customer.objects.upsert(
             full_name=instance.full_name,
             phone_number=instance.phone_number,
             city=instance.city,
@@ -15,26 +24,150 @@ def create_customer_from_order(sender, instance, created, **kwargs):
             postal_code=instance.postal_code,
         )
         instance.customer = customer  # به سفارش مشتری جدید را نسبت می‌دهیم
-        instance.save()  # ذخیره مجدد سفارش برای ذخیره ارتباط با مشتری
+        # ذخیره ارتباط با مشتری بدون ذخیره مجدد سفارش و اجرای دوباره سیگنال‌ها
+        Orders.objects.filter(pk=instance.pk).update(customer=customer)
 
 
-@receiver(post_save, sender=Products)
+@receiver(pre_save, sender=Products)
 def activate_product(sender, instance, **kwargs):
+    # قبل از ذخیره انجام می‌شود تا محصول دوباره ذخیره نشود
     if instance.stock > 0 and not instance.is_active:
         instance.is_active = True
-        instance.save()
+
+
+@receiver(post_save, sender=Products)
+def update_search_index(sender, instance, update_fields=None, **kwargs):
+    # فقط در صورت تغییر احتمالی نام یا توضیحات، کلمات محصول در ایندکس جستجو بروز می‌شوند
+    if update_fields is None or {'name', 'description'} & set(update_fields):
+        index_product(instance)
+
+
+@receiver(post_save, sender=Products)
+@receiver(post_delete, sender=Products)
+def invalidate_product_cache(sender, instance, **kwargs):
+    # حذف محصول از کش (با شناسه و اسلاگ) و افزایش نسل لیست‌ها پس از commit
+    invalidate_products([instance.pk], [instance.slug])
+
+
+@receiver(post_save, sender=Products)
+def update_product_feeds(sender, instance, **kwargs):
+    # فقط فیدهایی که عضویت محصول در آن‌ها تغییر کرده بازنویسی می‌شوند
+    feeds.update_products([instance])
+
+
+@receiver(post_delete, sender=Products)
+def remove_product_from_feeds(sender, instance, **kwargs):
+    feeds.update_products([instance], deleted=True)
+
+
+@receiver(post_save, sender=ProductsImage)
+@receiver(post_delete, sender=ProductsImage)
+def invalidate_product_image_cache(sender, instance, **kwargs):
+    invalidate_products([instance.product_id])
+
+
+@receiver(post_save, sender=Categories)
+@receiver(post_delete, sender=Categories)
+def invalidate_category_cache(sender, instance, **kwargs):
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=Products)
+@receiver(post_save, sender=ProductsImage)
+def update_image_derivatives(sender, instance, update_fields=None, **kwargs):
+    # نسخه‌های کوچک شده فقط وقتی ساخته می‌شوند که تصویر عوض شده باشد
+    if update_fields is None or 'image' in update_fields:
+        sync_derivatives(instance, 'image', 'image_derivatives')
+
+
+@receiver(post_save, sender=VendorProfile)
+def update_profile_image_derivatives(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'profile_image' in update_fields:
+        sync_derivatives(instance, 'profile_image', 'profile_image_derivatives')
+
+
+@receiver(pre_save, sender=Products)
+@receiver(pre_save, sender=ProductsImage)
+@receiver(pre_save, sender=VendorProfile)
+def load_media_references(sender, instance, **kwargs):
+    # فایل‌های قبلی رکورد برای بروزرسانی ref_count بعد از ذخیره
+    instance._old_media_files = []
+    if not instance._state.adding:
+        fields = [field_name for field_name, _ in media.MEDIA_FIELDS[sender]]
+        row = sender._base_manager.filter(pk=instance.pk).values_list(*fields).first()
+        instance._old_media_files = [name for name in row or () if name]
+
+
+@receiver(post_save, sender=Products)
+@receiver(post_save, sender=ProductsImage)
+@receiver(post_save, sender=VendorProfile)
+def update_media_references(sender, instance, **kwargs):
+    media.update_references(getattr(instance, '_old_media_files', []), media.get_file_names(instance))
+
+
+@receiver(post_delete, sender=Products)
+@receiver(post_delete, sender=ProductsImage)
+@receiver(post_delete, sender=VendorProfile)
+def release_media_references(sender, instance, **kwargs):
+    media.release(media.get_media_names(instance))
 
 
 @receiver(post_save, sender=Orders)
 def restore_stock_on_cancellation(sender, instance, **kwargs):
-    # بررسی اینکه وضعیت به "Cancelled" تغییر کرده است
-    if instance.status == 'Canceled':
-        # پیمایش همه محصولات مرتبط با سفارش
-        order_items = OrderItem.objects.filter(order=instance)
-        for order_item in order_items:
-            product = order_item.product
-            product.stock += order_item.quantity  # بازگرداندن موجودی
-            product.save()  # ذخیره تغییرات
+    # فقط زمانی که وضعیت واقعاً به "Canceled" تغییر کرده است (نه در هر ذخیره سفارش لغو شده)
+    transition = getattr(instance, '_status_transition', None)
+    if transition and transition[1] == 'Canceled':
+        # بازگرداندن موجودی همه محصولات سفارش با یک UPDATE
+        lines = OrderItem.objects.filter(order=instance).values_list('product_id', 'quantity')
+        release_stock(lines)
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def update_order_totals(sender, instance, **kwargs):
+    # بروزرسانی قیمت کل و تعداد اقلام سفارش در همان تراکنش ذخیره/حذف آیتم
+    Orders.objects.filter(pk=instance.order_id).refresh_totals()
+    # اگر سفارش تحویل داده شده باشد، سود فروشنده و گزارش فروش با قیمت جدید اصلاح می‌شوند
+    order = Orders.objects.filter(pk=instance.order_id, status=reports.SALES_STATUS).first()
+    if order is not None:
+        ledger.sync_order(order)
+        # فقط فروش روزانه محصول آیتم (و محصول قبلی آن در صورت تغییر) دوباره محاسبه می‌شود
+        products = {instance.product_id, getattr(instance, '_loaded_product_id', None) or instance.product_id}
+        reports.schedule_refresh([reports.get_order_cell(order)], products)
+
+
+@receiver(pre_save, sender=Orders)
+def load_sales_cell(sender, instance, **kwargs):
+    # روز، فروشنده و شهر قبلی سفارشی که در گزارش فروش آمده (یا با این ذخیره وارد آن می‌شود)
+    instance._old_sales_cell = None
+    if instance._state.adding:
+        return
+    if reports.SALES_STATUS in (instance.get_loaded_status(), instance.status):
+        instance._old_sales_cell = Orders.objects.filter(pk=instance.pk).values_list('created_at', 'vendor_id', 'city').first()
+
+
+@receiver(post_save, sender=Orders)
+def refresh_sales_rollups(sender, instance, **kwargs):
+    old_cell = getattr(instance, '_old_sales_cell', None)
+    if old_cell is not None:
+        created_at, vendor_id, city = old_cell
+        reports.schedule_refresh([
+            (timezone.localdate(created_at), vendor_id, city),
+            reports.get_order_cell(instance),
+        ], OrderItem.objects.filter(order=instance).values_list('product_id', flat=True).distinct())
+
+
+@receiver(post_save, sender=Orders)
+def sync_vendor_ledger(sender, instance, created, **kwargs):
+    # ثبت سود فروشنده هنگام تحویل و برگشت آن هنگام لغو سفارش
+    if created and instance.status != 'Delivered':
+        return  # سفارش جدید هنوز سندی در دفتر سود ندارد
+    ledger.sync_order(instance)
+
+
+@receiver(pre_delete, sender=Orders)
+def reverse_vendor_ledger(sender, instance, **kwargs):
+    ledger.sync_order(instance, deleted=True)
 
 
 @receiver(post_save, sender=Vendors)
@@ -48,17 +181,18 @@ def create_vendor_profile(sender, instance, created, **kwargs):
             city=instance.city,
             address=instance.address,
             phone_number=instance.phone_number,
-            profit=instance.get_total_profit(),  # متد باید فراخوانی شود
+            profit=instance.get_total_profit(),
         )
     else:
-        vendor_profile = VendorProfile.objects.get(vendor=instance)  # دریافت پروفایل موجود
-        vendor_profile.first_name = instance.first_name  # به‌روزرسانی فیلدها
-        vendor_profile.last_name = instance.last_name
-        vendor_profile.city = instance.city
-        vendor_profile.address = instance.address
-        vendor_profile.phone_number = instance.phone_number
-        vendor_profile.profit = instance.get_total_profit()  # متد را فراخوانی کنید
-        vendor_profile.save()
+        # به‌روزرسانی فیلدها با یک کوئری؛ سود توسط دفتر سود بروز نگه داشته می‌شود
+        VendorProfile.objects.filter(vendor=instance).update(
+            first_name=instance.first_name,
+            last_name=instance.last_name,
+            city=instance.city,
+            address=instance.address,
+            phone_number=instance.phone_number,
+            updated_at=timezone.now(),
+        )
 
 
 @receiver(post_save, sender=User)
@@ -80,3 +214,16 @@ def create_or_update_user_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
     instance.profile.save()
+
+
+@receiver(pre_delete, sender=Vendors)
+def refresh_vendor_sales_rollups(sender, instance, **kwargs):
+    # ردیف‌های فروشنده حذف می‌شوند و سفارش‌های آن بدون فروشنده در گزارش می‌آیند
+    cells = instance.sales_rollups.values_list('date', 'city').distinct()
+    reports.schedule_refresh((date, None, city) for date, city in cells)
+
+
+@receiver(post_save, sender=Categories)
+def sync_product_reorder_levels(sender, instance, **kwargs):
+    # آستانه موجودی کم محصولات دسته همراه با آستانه دسته بروز می‌شود
+    sync_category_reorder_level(instance)
@@ -0,0 +1,92 @@
+from functools import reduce
+from operator import or_
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from .normalization import normalize_text
+
+# تعداد اسلاگ پایه در هر کوئری (برای ماندن زیر محدودیت عمق عبارت SQLite)
+LOOKUP_BATCH_SIZE = 200
+SAVE_ATTEMPTS = 3
+# جای خالی برای پسوند عددی تا اسلاگ پایه هنگام افزودن پسوند کوتاه نشود
+SUFFIX_LENGTH = 10
+
+
+def make_slug(value, max_length, fallback):
+    slug = slugify(normalize_text(value or ''), allow_unicode=True)[:max_length].strip('-')
+    return slug or fallback
+
+
+def get_taken_slugs(model, bases, field='slug'):
+    """
+    اسلاگ‌های موجود برابر با هر پایه یا به شکل «پایه-عدد» با یک کوئری برای هر دسته از پایه‌ها.
+    """
+    bases = list(bases)
+    taken = set()
+    for start in range(0, len(bases), LOOKUP_BATCH_SIZE):
+        chunk = bases[start:start + LOOKUP_BATCH_SIZE]
+        condition = reduce(or_, (Q(**{f'{field}__startswith': f'{base}-'}) for base in chunk), Q(**{f'{field}__in': chunk}))
+        taken.update(model._base_manager.filter(condition).values_list(field, flat=True))
+    return taken
+
+
+def allocate_slugs(model, values, field='slug'):
+    """
+    رزرو اسلاگ یکتا برای یک دسته از نام‌ها: اسلاگ‌های موجود یک بار خوانده می‌شوند
+    و پسوندهای -2، -3، ... در حافظه اختصاص داده می‌شوند (بدون کوئری برای هر ردیف).
+    خروجی به همان ترتیب values است.
+    """
+    max_length = model._meta.get_field(field).max_length
+    fallback = model._meta.model_name
+    bases = [make_slug(value, max_length - SUFFIX_LENGTH, fallback) for value in values]
+    taken = get_taken_slugs(model, set(bases), field)
+
+    # بزرگ‌ترین پسوند عددی موجود برای هر پایه
+    counters = {}
+    for slug in taken:
+        base, _, number = slug.rpartition('-')
+        if base and number.isascii() and number.isdigit():
+            counters[base] = max(counters.get(base, 1), int(number))
+
+    slugs = []
+    for base in bases:
+        slug = base
+        while slug in taken:
+            counters[base] = counters.get(base, 1) + 1
+            slug = f'{base}-{counters[base]}'
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def assign_slugs(instances, source, field='slug'):
+    """
+    مقداردهی اسلاگ نمونه‌هایی که اسلاگ ندارند (مثلاً قبل از bulk_create).
+    source تابعی است که متن اسلاگ را از نمونه برمی‌گرداند.
+    """
+    pending = [instance for instance in instances if not getattr(instance, field)]
+    if not pending:
+        return instances
+    slugs = allocate_slugs(type(pending[0]), [source(instance) for instance in pending], field)
+    for instance, slug in zip(pending, slugs):
+        setattr(instance, field, slug)
+    return instances
+
+
+def save_with_slug(instance, save, source, *args, field='slug', **kwargs):
+    """
+    ذخیره نمونه با اسلاگ تازه رزرو شده. اگر بین رزرو و درج، پروسه دیگری همان اسلاگ را
+    ثبت کرده باشد، اسلاگ دوباره رزرو می‌شود.
+    """
+    model = type(instance)
+    for attempt in range(SAVE_ATTEMPTS):
+        setattr(instance, field, allocate_slugs(model, [source], field)[0])
+        try:
+            with transaction.atomic():
+                return save(*args, **kwargs)
+        except IntegrityError:
+            slug_taken = model._base_manager.filter(**{field: getattr(instance, field)}).exists()
+            if attempt == SAVE_ATTEMPTS - 1 or not slug_taken:
+                raise
@@ -0,0 +1,16 @@
+'use strict';
+{
+    const $ = django.jQuery;
+
+    $(function() {
+        // رفتن به آدرس فیلتر شده پس از انتخاب رکورد در autocomplete
+        $('.autocomplete-filter select').on('change', function() {
+            const container = this.closest('.autocomplete-filter');
+            if (this.value) {
+                window.location.href = container.dataset.queryString.replace('__value__', encodeURIComponent(this.value));
+            } else {
+                window.location.href = container.dataset.clearQueryString;
+            }
+        });
+    });
+}
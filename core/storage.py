@@ -0,0 +1,97 @@
+import datetime
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+
+BLOB_DIR = 'blobs'
+
+
+def blob_name(digest, extension):
+    # blobs/ab/cd/abcd...ef.jpg؛ دو سطح پوشه تا تعداد فایل‌های هر پوشه محدود بماند
+    return '/'.join((BLOB_DIR, digest[:2], digest[2:4], f'{digest}{extension}'))
+
+
+def is_blob(name):
+    return bool(name) and name.startswith(f'{BLOB_DIR}/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    ذخیره فایل‌ها بر اساس هش محتوا: هش هنگام نوشتن جریانی فایل روی دیسک محاسبه می‌شود،
+    هر محتوای یکتا فقط یک بار ذخیره می‌شود و مسیر upload_to (مثلاً نام محصول) در نام نهایی نقشی ندارد.
+    آدرس هر فایل تغییرناپذیر است و می‌تواند با کش طولانی سرو شود.
+    فایل‌ها با delete حذف نمی‌شوند؛ حذف فقط توسط دستور collect_media و بر اساس ref_count انجام می‌شود.
+    فایل قبل از commit تراکنش نوشته می‌شود؛ فایل‌های تراکنش‌های برگشت خورده (بدون ردیف MediaBlob)
+    با iter_files پیدا و توسط collect_media حذف می‌شوند.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # نام نهایی در _save از روی هش محتوا تعیین می‌شود
+        return name
+
+    def _save(self, name, content):
+        from .models import MediaBlob
+
+        extension = os.path.splitext(name)[1].lower()
+        temp_dir = self.path(os.path.join(BLOB_DIR, 'tmp'))
+        os.makedirs(temp_dir, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        with tempfile.NamedTemporaryFile(dir=temp_dir, delete=False) as temp:
+            for chunk in content.chunks():
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                digest.update(chunk)
+                temp.write(chunk)
+                size += len(chunk)
+
+        name = blob_name(digest.hexdigest(), extension)
+        path = self.path(name)
+        if os.path.exists(path):
+            # همین محتوا قبلاً ذخیره شده است؛ زمان فایل بروز می‌شود تا collect_media تا commit این تراکنش آن را حذف نکند
+            os.remove(temp.name)
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp.name, path)
+            if self.file_permissions_mode is not None:
+                os.chmod(path, self.file_permissions_mode)
+
+        blob, created = MediaBlob.objects.get_or_create(
+            name=name,
+            defaults={'sha256': digest.hexdigest(), 'size': size},
+        )
+        if not created:
+            # جلوگیری از حذف همزمان توسط collect_media در بازه انتظار
+            MediaBlob.objects.filter(pk=blob.pk).update(updated_at=timezone.now())
+        return name
+
+    def delete(self, name):
+        if is_blob(name):
+            # ممکن است مدل‌های دیگری به همین فایل ارجاع داشته باشند
+            return
+        super().delete(name)
+
+    def purge(self, name):
+        super().delete(name)
+
+    def iter_files(self):
+        """
+        پیمایش جریانی فایل‌های پوشه blobs (شامل فایل‌های موقت): (نام، اندازه، زمان آخرین تغییر).
+        """
+        root = self.path(BLOB_DIR)
+        for directory, _, files in os.walk(root):
+            for filename in files:
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                name = '/'.join((BLOB_DIR, *os.path.relpath(path, root).split(os.sep)))
+                yield name, stat.st_size, datetime.datetime.fromtimestamp(stat.st_mtime, datetime.timezone.utc)
@@ -1,3 +1,459 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import shutil
+import tempfile
+import threading
+import time
 
-# Create your tests here.
+import requests
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from PIL import Image
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .catalog import CatalogImporter, read_rows
+from .checkout import place_order
+from .exchange import RateProvider
+from .media import recount_references
+from .feeds import get_feed, rebuild_feeds
+from .inventory import reserve_stock
+from .models import (
+    Categories, DailyProductSales, DailySalesRollup, DailySalesTotal, ExchangeRate, MediaBlob, OrderItem,
+    OrderStatusHistory, ProductFeed, Products, VendorLedgerEntry, Vendors,
+)
+from .normalization import address_fingerprint, normalize_phone, normalize_text
+from .reports import get_sales_report, rebuild_rollups
+from .slugs import allocate_slugs
+
+
+class ReserveStockConcurrencyTests(TransactionTestCase):
+    """
+    رزرو همزمان موجودی از چند thread (هر کدام با اتصال جداگانه به دیتابیس) نباید بیش از موجودی بفروشد.
+    """
+    THREADS = 8
+    ATTEMPTS = 20
+    STOCK = 50
+
+    def setUp(self):
+        category = Categories.objects.create(name='کیک')
+        self.products = [
+            Products.objects.create(name=f'p{i}', description='d', category=category, stock=self.STOCK, ir_price=1000)
+            for i in range(2)
+        ]
+
+    def test_no_oversell(self):
+        lines = [(self.products[0].pk, 1), (self.products[1].pk, 2)]
+        reserved = []
+        errors = []
+        start = threading.Barrier(self.THREADS)
+
+        def buy():
+            try:
+                start.wait()
+                for _ in range(self.ATTEMPTS):
+                    results = reserve_stock(lines)
+                    if all(result.reserved for result in results):
+                        reserved.append(results)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buy) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        first, second = Products.objects.order_by('name')
+        # خط دوم دو عدد برمی‌دارد؛ حداکثر STOCK // 2 سفارش کامل ممکن است
+        self.assertEqual(len(reserved), self.STOCK // 2)
+        self.assertEqual(first.stock, self.STOCK - len(reserved))
+        self.assertEqual(second.stock, 0)
+        self.assertFalse(second.is_active)
+
+
+class PlaceOrderQueryTests(TestCase):
+    """
+    تعداد کوئری‌های ثبت سفارش (با savepointهای تراکنش) فقط با تعداد محصولات متفاوت بالا می‌رود:
+    یک SELECT محصولات، یک UPDATE شرطی برای هر محصول، ثبت مشتری، درج سفارش و یک درج دسته‌ای اقلام.
+    """
+    def setUp(self):
+        category = Categories.objects.create(name='کیک')
+        self.products = [
+            Products.objects.create(name=f'p{i}', description='d', category=category, stock=10, ir_price=1000)
+            for i in range(3)
+        ]
+
+    def place(self, phone_number, products):
+        return place_order(
+            'علی رضایی', phone_number, 'تهران', 'خیابان آزادی', '1234567890',
+            [(product.pk, 2) for product in products],
+        )
+
+    def test_single_product(self):
+        with self.assertNumQueries(16):
+            order = self.place('09120000001', self.products[:1])
+        self.assertEqual(order.order_items.count(), 1)
+
+    def test_query_count_grows_by_one_update_per_product(self):
+        with self.assertNumQueries(18):
+            order = self.place('09120000002', self.products)
+        self.assertEqual(order.order_items.count(), 3)
+        self.assertEqual(order.total_price, 6000)
+
+
+class CatalogImportTests(TestCase):
+    def setUp(self):
+        Categories.objects.create(name='کیک', slug='cake')
+
+    def import_jsonl(self, *lines):
+        stream = io.StringIO(''.join(line + '\n' for line in lines))
+        return CatalogImporter(batch_size=2).import_rows(read_rows(stream, 'jsonl'))
+
+    def row(self, **values):
+        return json.dumps(dict({'slug': 'p', 'name': 'p', 'category': 'cake', 'price': '1'}, **values))
+
+    def test_bad_rows_are_reported_and_import_continues(self):
+        importer = self.import_jsonl(
+            self.row(slug='ok1'),
+            '',
+            '{broken',
+            '[1, 2]',
+            self.row(slug='n', name=1984),
+            self.row(slug='x', name={'fa': 'کیک'}),
+            self.row(slug='y', category=['cake']),
+            self.row(slug='z', stock=True),
+            self.row(slug='long', name='x' * 300),
+            self.row(slug='big', price='123456789'),
+            self.row(slug='ok2'),
+        )
+        self.assertEqual(importer.created, 3)
+        self.assertEqual(sorted(Products.objects.values_list('slug', flat=True)), ['n', 'ok1', 'ok2'])
+        self.assertEqual(Products.objects.get(slug='n').name, '1984')
+        # شماره خط خطاها با احتساب خط خالی
+        self.assertEqual([line for line, _ in importer.errors], [3, 4, 6, 7, 8, 9, 10])
+        self.assertEqual(importer.error_count, 7)
+
+    def test_csv_line_numbers(self):
+        stream = io.StringIO('slug,name,category,description\na,A,cake,"two\nlines"\nb,,cake,x\n')
+        importer = CatalogImporter().import_rows(read_rows(stream, 'csv'))
+        self.assertEqual(importer.created, 1)
+        self.assertEqual(importer.errors, [(4, 'name is required')])
+
+
+class LegacySlugTests(TestCase):
+    """
+    اسلاگ‌های ذخیره شده قبل از نرمال‌سازی («ي» و «ك» عربی) بعد از backfill با آدرس قبلی هم پیدا می‌شوند.
+    """
+
+    def setUp(self):
+        self.category = Categories.objects.create(name='کیک', slug='cake')
+        self.product = Products.objects.create(name='p', description='d', category=self.category, stock=1, ir_price=1000)
+        self.taken = Products.objects.create(name='p', description='d', category=self.category, stock=1, ir_price=1000, slug='کیک-ویژه')
+        Categories.objects.filter(pk=self.category.pk).update(slug='كيك')
+        Products.objects.filter(pk=self.product.pk).update(slug='كيك-ويژه')
+
+    def test_old_urls_after_backfill(self):
+        call_command('normalize_text_fields', stdout=io.StringIO(), stderr=io.StringIO())
+
+        self.category.refresh_from_db()
+        self.product.refresh_from_db()
+        self.assertEqual(self.category.slug, 'کیک')
+        # اسلاگ نرمال متعلق به محصول دیگری است؛ اسلاگ یکتای جدید رزرو می‌شود
+        self.assertEqual(self.product.slug, 'کیک-ویژه-2')
+
+        self.assertEqual(self.client.get('/api/categories/كيك/').json()['id'], str(self.category.pk))
+        self.assertEqual(self.client.get('/api/products/كيك-ويژه/').json()['id'], str(self.taken.pk))
+        self.assertEqual(self.client.get('/api/products/کیک-ویژه-2/').json()['id'], str(self.product.pk))
+
+
+class FeedTests(TestCase):
+    def setUp(self):
+        self.category = Categories.objects.create(name='کیک', slug='cake')
+        self.products = [
+            Products.objects.create(name=f'p{i}', description='d', category=self.category, stock=1, ir_price=1000, is_sale=True)
+            for i in range(3)
+        ]
+
+    def feed_ids(self, category_id=None):
+        return [item['id'] for item in get_feed('sale', category_id)]
+
+    def test_members_newest_first(self):
+        newest_first = [str(product.pk) for product in reversed(self.products)]
+        self.assertEqual(self.feed_ids(), newest_first)
+        self.assertEqual(self.feed_ids(self.category.pk), newest_first)
+
+        # خروج و بازگشت به فید بدون خواندن محصولات دیگر فید
+        middle = self.products[1]
+        middle.is_sale = False
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connection) as queries:
+            middle.save(update_fields=['is_sale'])
+        sqls = [query['sql'] for query in queries]
+        first_feed_query = next(i for i, sql in enumerate(sqls) if 'product_feed' in sql)
+        self.assertFalse([sql for sql in sqls[first_feed_query:] if 'FROM "products"' in sql])
+        self.assertEqual(self.feed_ids(), [newest_first[0], newest_first[2]])
+        middle.is_sale = True
+        with self.captureOnCommitCallbacks(execute=True):
+            middle.save(update_fields=['is_sale'])
+        self.assertEqual(self.feed_ids(), newest_first)
+
+        # بروزرسانی تدریجی همان اعضا و ترتیب ساخت کامل را دارد
+        stored = dict(ProductFeed.objects.filter(name='sale').values_list('category_id', 'product_ids'))
+        rebuild_feeds()
+        self.assertEqual(dict(ProductFeed.objects.filter(name='sale').values_list('category_id', 'product_ids')), stored)
+
+
+class RateProviderTests(TestCase):
+    """
+    کش خالی نرخ، درخواست را منتظر fetcher نمی‌گذارد؛ آخرین نرخ ثبت شده برگردانده و نرخ در پس‌زمینه دریافت می‌شود.
+    """
+
+    def setUp(self):
+        self.provider = RateProvider(cache_key='test:exchange_rate')
+        self.calls = []
+        self.release = threading.Event()
+        self.provider.set_fetcher(self.fetch)
+        self.addCleanup(self.provider.reset)
+        self.addCleanup(self.release.set)
+        ExchangeRate.objects.create(rate=500000)
+
+    def fetch(self, timeout):
+        self.calls.append(timeout)
+        self.release.wait(5)
+        if self.result is None:
+            raise requests.Timeout
+        return self.result
+
+    def test_cold_cache_serves_last_known_rate(self):
+        self.result = 600000
+        self.assertEqual(self.provider.get_rate(), 500000)
+        thread = self.provider.refresh_in_background()
+        self.assertIsNone(thread)  # دریافت قبلی هنوز در جریان است
+        self.release.set()
+        self.wait_for_fetch()
+        self.assertEqual(self.provider.get_rate(), 600000)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_failed_fetch_keeps_fallback_until_retry(self):
+        self.result = None
+        self.release.set()
+        self.assertEqual(self.provider.get_rate(), 500000)
+        self.wait_for_fetch()
+        self.assertEqual(self.provider.get_rate(), 500000)
+        self.assertEqual(len(self.calls), 1)
+
+    def wait_for_fetch(self):
+        for _ in range(500):
+            if not self.provider._refreshing:
+                return
+            time.sleep(0.01)
+        self.fail('background fetch did not finish')
+
+
+class VendorLedgerTests(TestCase):
+    """
+    سود فروشنده فقط با تغییر واقعی وضعیت ثبت یا برگشت می‌خورد و ذخیره‌های تکراری سند جدیدی ثبت نمی‌کنند.
+    """
+
+    def setUp(self):
+        category = Categories.objects.create(name='کیک')
+        self.product = Products.objects.create(name='p', description='d', category=category, stock=10, ir_price=1000)
+        self.vendor = Vendors.objects.create(
+            first_name='a', last_name='b', email='v@example.com', city='تهران', address='a',
+            phone_number='09123333333', code='V1',
+        )
+        self.order = place_order(
+            'علی رضایی', '09120000001', 'تهران', 'خیابان آزادی', '1234567890', [(self.product.pk, 3)],
+            identification_code='V1',
+        )
+
+    def entries(self):
+        return list(VendorLedgerEntry.objects.order_by('created_at').values_list('kind', 'amount'))
+
+    def set_status(self, status):
+        self.order.status = status
+        self.order.save()
+        self.vendor.refresh_from_db()
+
+    def test_deliver_and_cancel(self):
+        self.assertEqual(self.entries(), [])
+
+        self.set_status('Delivered')
+        self.set_status('Delivered')
+        self.assertEqual(self.entries(), [('Credit', 300)])
+        self.assertEqual(self.vendor.profit, 300)
+
+        self.set_status('Canceled')
+        self.assertEqual(self.entries(), [('Credit', 300), ('Reversal', -300)])
+        self.assertEqual(self.vendor.profit, 0)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+
+        self.assertEqual(
+            list(OrderStatusHistory.objects.filter(order=self.order).order_by('created_at').values_list('from_status', 'to_status')),
+            [('Pending', 'Delivered'), ('Delivered', 'Canceled')],
+        )
+
+    def test_invalid_transition(self):
+        self.set_status('Canceled')
+        self.order.status = 'Delivered'
+        with self.assertRaises(ValueError):
+            self.order.save()
+        self.assertEqual(self.entries(), [])
+
+    def test_deleting_delivered_order_reverses_profit(self):
+        self.set_status('Delivered')
+        self.order.delete()
+        self.vendor.refresh_from_db()
+        self.assertEqual(self.vendor.profit, 0)
+        self.assertEqual(sorted(amount for _, amount in self.entries()), [-300, 300])
+
+
+class SlugAllocationTests(TestCase):
+    def test_batch_allocation_with_one_query(self):
+        Categories.objects.create(name='کیک', slug='کیک')
+        Categories.objects.create(name='کیک', slug='کیک-3')
+        with self.assertNumQueries(1):
+            slugs = allocate_slugs(Categories, ['كيك', 'کیک', 'نان ', ''])
+        # «ي» و «ك» عربی نرمال می‌شوند و پسوند بعد از بزرگ‌ترین پسوند موجود است
+        self.assertEqual(slugs, ['کیک-4', 'کیک-5', 'نان', 'categories'])
+
+    def test_save_assigns_unique_slugs(self):
+        category = Categories.objects.create(name='کیک')
+        products = [
+            Products.objects.create(name='کیک شکلاتی', description='d', category=category, stock=1, ir_price=1000)
+            for _ in range(2)
+        ]
+        self.assertEqual([product.slug for product in products], ['کیک-شکلاتی', 'کیک-شکلاتی-2'])
+
+
+class NormalizationTests(TestCase):
+    def test_normalize_text(self):
+        self.assertEqual(normalize_text('  كيك\u0640  شكلاتي\u064e '), 'کیک شکلاتی')
+        self.assertEqual(normalize_text('می \u200c\u200cخواهم\u200f'), 'می\u200cخواهم')
+        self.assertEqual(normalize_text('\u06f1\u06f2\u0663 ة'), '123 ه')
+        self.assertEqual(normalize_text(''), '')
+        self.assertIsNone(normalize_text(None))
+
+    def test_normalize_phone(self):
+        for value in ('۰۹۱۲ ۳۴۵ ۶۷۸۹', '+98 912 345 6789', '00989123456789', '9123456789', '0912-345-6789'):
+            self.assertEqual(normalize_phone(value), '09123456789', value)
+
+    def test_address_fingerprint(self):
+        self.assertEqual(
+            address_fingerprint('تهران', 'خيابان  آزادي، پلاك ۱۲', '۱۲۳'),
+            address_fingerprint('تهران', 'خیابان آزادی، پلاک 12', '123'),
+        )
+
+    def test_saved_names_are_normalized(self):
+        category = Categories.objects.create(name='كيك')
+        product = Products.objects.create(name='كيك  ويژه', description='d', category=category, stock=1, ir_price=1000)
+        self.assertEqual(category.name, 'کیک')
+        self.assertEqual(product.name, 'کیک ویژه')
+        self.assertEqual(product.slug, 'کیک-ویژه')
+
+
+class MediaReferenceTests(TestCase):
+    """
+    هر محتوای یکتا یک MediaBlob دارد و ref_count با ذخیره، تغییر و حذف رکوردها (همراه با نسخه‌های مشتق شده) بروز می‌شود.
+    """
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+        self.category = Categories.objects.create(name='کیک')
+
+    def image(self, color):
+        content = io.BytesIO()
+        Image.new('RGB', (40, 40), color).save(content, 'PNG')
+        return ContentFile(content.getvalue(), name='cake.png')
+
+    def create_product(self, color):
+        product = Products(name='p', description='d', category=self.category, stock=1, ir_price=1000)
+        product.image.save('cake.png', self.image(color), save=False)
+        product.save()
+        return product
+
+    def ref_count(self, name):
+        return MediaBlob.objects.get(name=name).ref_count
+
+    def test_shared_content_is_counted(self):
+        first = self.create_product('red')
+        second = self.create_product('red')
+        name = first.image.name
+        self.assertEqual(second.image.name, name)
+        self.assertEqual(MediaBlob.objects.filter(name=name).count(), 1)
+        self.assertEqual(self.ref_count(name), 2)
+        thumbnail = first.image_derivatives['thumbnail']
+        self.assertEqual(self.ref_count(thumbnail), 2)
+
+        first.delete()
+        self.assertEqual(self.ref_count(name), 1)
+
+        second.image.save('cake.png', self.image('blue'), save=False)
+        second.save()
+        self.assertEqual(self.ref_count(name), 0)
+        self.assertEqual(self.ref_count(thumbnail), 0)
+        self.assertEqual(self.ref_count(second.image.name), 1)
+
+        # شمارش دوباره از روی مدل‌ها با شمارنده‌های بروز شده یکی است
+        self.assertEqual(recount_references(), 0)
+
+
+class SalesRollupTests(TestCase):
+    """
+    بروزرسانی تدریجی جدول‌های گزارش بعد از تحویل، لغو و ویرایش اقلام باید با ساخت کامل آن‌ها یکی باشد.
+    """
+
+    def setUp(self):
+        self.cakes = Categories.objects.create(name='کیک')
+        self.breads = Categories.objects.create(name='نان')
+        self.cake = Products.objects.create(name='کیک', description='d', category=self.cakes, stock=20, ir_price=1000)
+        self.bread = Products.objects.create(name='نان', description='d', category=self.breads, stock=20, ir_price=300)
+        self.orders = [
+            place_order('علی', f'0912000000{i}', 'تهران', 'خیابان آزادی', '1', [(self.cake.pk, 1 + i), (self.bread.pk, 2)])
+            for i in range(2)
+        ]
+
+    def set_status(self, order, status):
+        order.status = status
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save()
+
+    def snapshot(self):
+        return [
+            sorted(DailySalesRollup.objects.values_list('date', 'category_id', 'vendor_id', 'city', 'order_count', 'quantity', 'revenue')),
+            sorted(DailySalesTotal.objects.values_list('date', 'order_count', 'quantity', 'revenue')),
+            sorted(DailyProductSales.objects.filter(order_count__gt=0).values_list('date', 'product_id', 'order_count', 'quantity', 'revenue')),
+        ]
+
+    def assertMatchesRebuild(self):
+        incremental = self.snapshot()
+        list(rebuild_rollups())
+        self.assertEqual(incremental, self.snapshot())
+
+    def revenue(self):
+        return {row['label']: row['revenue'] for row in get_sales_report(datetime.date.min, datetime.date.max, 'category')}
+
+    def test_incremental_updates_match_rebuild(self):
+        for order in self.orders:
+            self.set_status(order, 'Delivered')
+        self.assertEqual(self.revenue(), {'کیک': '3000', 'نان': '1200'})
+        self.assertMatchesRebuild()
+
+        item = OrderItem.objects.get(order=self.orders[0], product=self.cake)
+        item.quantity = 5
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+        self.assertEqual(self.revenue(), {'کیک': '7000', 'نان': '1200'})
+        self.assertMatchesRebuild()
+
+        self.set_status(self.orders[1], 'Canceled')
+        self.assertEqual(self.revenue(), {'کیک': '5000', 'نان': '600'})
+        self.assertMatchesRebuild()
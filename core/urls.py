@@ -0,0 +1,14 @@
+from django.urls import path
+
+from . import views
+
+app_name = 'core'
+
+urlpatterns = [
+    path('products/', views.product_list, name='product_list'),
+    path('products/<str:slug>/', views.product_detail, name='product_detail'),
+    path('categories/', views.category_list, name='category_list'),
+    path('categories/<str:slug>/', views.category_detail, name='category_detail'),
+    path('feeds/<str:name>/', views.feed, name='feed'),
+    path('reports/sales/', views.sales_report, name='sales_report'),
+]
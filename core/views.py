@@ -1,3 +1,160 @@
-from django.shortcuts import render
+import datetime
 
-# Create your views here.
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, JsonResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET
+
+from .catalog_cache import catalog_cache
+from .feeds import FEEDS, get_feed
+from .models import Categories, Products
+from .normalization import normalize_persian
+from .pagination import InvalidCursor, paginate, paginate_search
+from .reports import GROUPS, get_sales_report
+from .search import search
+from .serializers import serialize_category, serialize_product
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+BOOLEAN_FILTERS = ('is_active', 'is_sale', 'is_suggestion')
+TRUE_VALUES = ('1', 'true', 'True')
+FALSE_VALUES = ('0', 'false', 'False')
+REPORT_DAYS = 30  # بازه پیش‌فرض گزارش فروش
+
+
+def get_page_size(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def get_products_queryset():
+    return Products.objects.select_related('category').prefetch_related('images')
+
+
+@require_GET
+def product_list(request):
+    try:
+        # هر صفحه (با فیلترها، جستجو و cursor) زیر نسل فعلی لیست‌ها کش می‌شود
+        data = catalog_cache.get_list('products', request.GET.lists(), lambda: load_product_list(request))
+    except InvalidCursor as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(data)
+
+
+def load_product_list(request):
+    queryset = get_products_queryset()
+
+    for name in BOOLEAN_FILTERS:
+        value = request.GET.get(name)
+        if value in TRUE_VALUES:
+            queryset = queryset.filter(**{name: True})
+        elif value in FALSE_VALUES:
+            queryset = queryset.filter(**{name: False})
+
+    category = request.GET.get('category')
+    if category:
+        queryset = queryset.filter(category__slug=normalize_persian(category))
+
+    query = request.GET.get('q', '').strip()
+    if query:
+        # نتایج جستجو بر اساس امتیاز مرتب می‌شوند؛ cursor صفحه بعد امتیاز را هم دارد
+        products, next_cursor = paginate_search(search(queryset, query), request.GET.get('cursor'), get_page_size(request))
+    else:
+        products, next_cursor = paginate(queryset, request.GET.get('cursor'), get_page_size(request))
+    return {
+        'results': [serialize_product(product) for product in products],
+        'next': next_cursor,
+    }
+
+
+@require_GET
+def product_detail(request, slug):
+    # اسلاگ‌ها نرمال ذخیره می‌شوند (اسلاگ‌های قدیمی با normalize_text_fields)؛ «ي» و «ك» عربی در آدرس هم به همان محصول می‌رسند
+    slug = normalize_persian(slug)
+
+    def load():
+        product = get_products_queryset().filter(slug=slug).first()
+        return serialize_product(product) if product else None
+
+    data = catalog_cache.get_object('product', 'slug', slug, load)
+    if data is None:
+        raise Http404
+    return JsonResponse(data)
+
+
+@require_GET
+def category_list(request):
+    def load():
+        categories = Categories.objects.order_by('name')
+        return {'results': [serialize_category(category) for category in categories]}
+
+    return JsonResponse(catalog_cache.get_list('categories', (), load))
+
+
+def get_category(slug):
+    def load():
+        category = Categories.objects.filter(slug=slug).first()
+        return serialize_category(category) if category else None
+
+    return catalog_cache.get_object('category', 'slug', slug, load)
+
+
+@require_GET
+def category_detail(request, slug):
+    data = get_category(normalize_persian(slug))
+    if data is None:
+        raise Http404
+    return JsonResponse(data)
+
+
+@require_GET
+def feed(request, name):
+    """
+    فید محصولات پیشنهادی یا حراج (کل فروشگاه یا یک دسته‌بندی) از کش؛ بدون پیمایش جدول محصولات.
+    """
+    if name not in FEEDS:
+        raise Http404
+    category_id = None
+    if request.GET.get('category'):
+        category = get_category(normalize_persian(request.GET['category']))
+        if category is None:
+            raise Http404
+        category_id = category['id']
+    return JsonResponse({'results': get_feed(name, category_id)[:get_page_size(request)]})
+
+
+@require_GET
+@staff_member_required
+def sales_report(request):
+    """
+    گزارش فروش روزانه/ماهانه یا بر اساس دسته‌بندی، فروشنده و شهر؛ فقط از جدول DailySalesRollup خوانده می‌شود.
+    """
+    group_by = request.GET.get('group_by', 'date')
+    if group_by not in GROUPS:
+        return JsonResponse({'error': f'group_by must be one of {", ".join(GROUPS)}'}, status=400)
+
+    dates = {}
+    for name in ('start', 'end'):
+        value = request.GET.get(name)
+        if value:
+            try:
+                dates[name] = parse_date(value)
+            except ValueError:
+                dates[name] = None
+            if dates[name] is None:
+                return JsonResponse({'error': f'Invalid {name} date: {value}'}, status=400)
+    end = dates.get('end') or timezone.localdate() + datetime.timedelta(days=1)
+    start = dates.get('start') or end - datetime.timedelta(days=REPORT_DAYS)
+
+    results = get_sales_report(
+        start, end, group_by,
+        category=normalize_persian(request.GET.get('category', '')),
+        vendor=request.GET.get('vendor'),
+        city=request.GET.get('city'),
+    )
+    return JsonResponse({'start': str(start), 'end': str(end), 'group_by': group_by, 'results': results})